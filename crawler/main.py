@@ -1,26 +1,130 @@
 import asyncio
 import json
 import os
-from typing import Optional, List
-from contextlib import asynccontextmanager
+import time
+from typing import AsyncIterator, Dict, Optional, List
+from contextlib import aclosing, asynccontextmanager
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 
+from xhs.circuit_breaker import DEFAULT_COOLDOWNS, CircuitBreaker
 from xhs.client import XiaoHongShuClient, CookieExpiredError
-from xhs.field import SearchSortType, SearchNoteType
+from xhs.exception import CircuitOpenError
+from xhs.http_pool import HttpClientPool
+from xhs.jobs import JOB_DB_FILE, JobManager, JobStore
+from xhs.normalizer import (
+    NOTE_BATCH_FIELDS,
+    NOTE_URL_BATCH_FIELDS,
+    comments as normalize_comments,
+    dumps,
+    note_cards,
+    note_detail,
+    user_profile,
+)
+from xhs.field import search_types
 from xhs.help import parse_note_info_from_note_url, parse_user_info_from_user_url, parse_urls_batch
 from xhs.cache import SessionCache
+from xhs.playwright_sign import get_b1_from_localstorage
+from xhs.proxy_pool import DEFAULT_PROBE_URL, ProxyPool
+from xhs.response_cache import ResponseCache
+from xhs.rate_limit import RateLimiter
+from xhs.retry import RetryPolicy
+from xhs.search_session import SearchSessionStore
+from xhs.sign_pool import SignPagePool
+from xhs.signer import FallbackSigner, NodeSigner, PlaywrightSigner, SignerBackend
+from xhs.term_index import TermIndex
+from xhs.wordcloud_service import WORDCLOUD_OPTIONS, WordCloudService
 
 # Cookie 缓存实例
 cookie_cache = SessionCache()
 
+# 签名页面池配置：页面数量、单页同时签名数量
+SIGN_POOL_SIZE = int(os.getenv("XHS_SIGN_POOL_SIZE", "2"))
+SIGN_PAGE_MAX_INFLIGHT = int(os.getenv("XHS_SIGN_PAGE_MAX_INFLIGHT", "1"))
+# 等待空闲签名页面的超时（秒），超时后改用备用签名后端或返回错误
+SIGN_LEASE_TIMEOUT = float(os.getenv("XHS_SIGN_LEASE_TIMEOUT", "10"))
+# 签名后端：playwright（默认）或 node（需要 XHS_SIGN_SCRIPT 指向提取出的签名脚本，Playwright 作为备用）
+SIGNER_BACKEND = os.getenv("XHS_SIGNER_BACKEND", "playwright")
+SIGN_SCRIPT = os.getenv("XHS_SIGN_SCRIPT", "")
+# HTTP 连接池配置：每条代理线路的连接数上限、空闲连接保持时间、线路空闲关闭时间
+HTTP2_ENABLED = os.getenv("XHS_HTTP2", "1") != "0"
+HTTP_MAX_CONNECTIONS = int(os.getenv("XHS_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("XHS_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("XHS_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_ROUTE_IDLE_TIMEOUT = float(os.getenv("XHS_HTTP_ROUTE_IDLE_TIMEOUT", "300"))
+# 获取二级评论的默认并发线程数
+SUB_COMMENT_CONCURRENCY = int(os.getenv("XHS_SUB_COMMENT_CONCURRENCY", "5"))
+# 批量接口默认并发数和单项超时（秒）
+BATCH_CONCURRENCY = int(os.getenv("XHS_BATCH_CONCURRENCY", "4"))
+BATCH_ITEM_TIMEOUT = float(os.getenv("XHS_BATCH_ITEM_TIMEOUT", "60"))
+# 后台抓取任务：同时运行的任务数、SQLite 文件路径
+JOB_WORKERS = int(os.getenv("XHS_JOB_WORKERS", "2"))
+JOB_DB = os.getenv("XHS_JOB_DB", JOB_DB_FILE)
+# 词云渲染进程数和结果缓存数量
+WORDCLOUD_WORKERS = int(os.getenv("XHS_WORDCLOUD_WORKERS", "1"))
+WORDCLOUD_CACHE_SIZE = int(os.getenv("XHS_WORDCLOUD_CACHE_SIZE", "128"))
+# 评论词频索引保留单篇词频的笔记数
+TERM_INDEX_MAX_NOTES = int(os.getenv("XHS_TERM_INDEX_MAX_NOTES", "1000"))
+
+# 请求重试：最多尝试次数、退避基数和上限（秒）
+RETRY_MAX_ATTEMPTS = int(os.getenv("XHS_RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("XHS_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("XHS_RETRY_MAX_DELAY", "8"))
+
+# 限速：XHS_RATE_LIMITS 为 JSON，覆盖各接口及 account / proxy 的 [每秒请求数, 突发容量]，
+# 如 {"feed": [5, 10], "account": [10, 20]}；被封或验证码时速率最低降到 XHS_RATE_LIMIT_MIN
+RATE_LIMITS = {k: tuple(v) for k, v in json.loads(os.getenv("XHS_RATE_LIMITS", "{}")).items()}
+RATE_LIMIT_MIN = float(os.getenv("XHS_RATE_LIMIT_MIN", "0.2"))
+
+# 熔断：连续第 1、2、3... 次打开的冷却时间（秒，逗号分隔），半开探测请求的超时时间（秒）
+BREAKER_COOLDOWNS = [float(v) for v in os.getenv("XHS_BREAKER_COOLDOWNS", ",".join(map(str, DEFAULT_COOLDOWNS))).split(",") if v.strip()]
+BREAKER_PROBE_TIMEOUT = float(os.getenv("XHS_BREAKER_PROBE_TIMEOUT", "60"))
+
+# 代理池：XHS_PROXIES 为逗号分隔的代理地址，为空时直连；后台探测地址和间隔（秒，0 表示不探测）、
+# 失败后的首次冷却时间和冷却上限（秒）
+PROXIES = [p.strip() for p in os.getenv("XHS_PROXIES", "").split(",") if p.strip()]
+PROXY_PROBE_URL = os.getenv("XHS_PROXY_PROBE_URL", DEFAULT_PROBE_URL)
+PROXY_PROBE_INTERVAL = float(os.getenv("XHS_PROXY_PROBE_INTERVAL", "60"))
+PROXY_COOLDOWN = float(os.getenv("XHS_PROXY_COOLDOWN", "10"))
+PROXY_MAX_COOLDOWN = float(os.getenv("XHS_PROXY_MAX_COOLDOWN", "600"))
+
+# 搜索会话：多久不用后过期、已获取的页缓存多久（秒）、最多保留的会话数
+SEARCH_SESSION_TTL = float(os.getenv("XHS_SEARCH_SESSION_TTL", "600"))
+SEARCH_PAGE_TTL = float(os.getenv("XHS_SEARCH_PAGE_TTL", "300"))
+SEARCH_MAX_SESSIONS = int(os.getenv("XHS_SEARCH_MAX_SESSIONS", "256"))
+
+# 笔记详情 / 用户信息响应缓存：内存条目数、TTL（秒），XHS_RESPONSE_CACHE_DB 为空时不使用磁盘缓存
+RESPONSE_CACHE_SIZE = int(os.getenv("XHS_RESPONSE_CACHE_SIZE", "2000"))
+NOTE_CACHE_TTL = float(os.getenv("XHS_NOTE_CACHE_TTL", "600"))
+USER_CACHE_TTL = float(os.getenv("XHS_USER_CACHE_TTL", "1800"))
+RESPONSE_CACHE_DB = os.getenv("XHS_RESPONSE_CACHE_DB", "")
+
+# 深度搜索：单次最多页数和同时请求的页数
+DEEP_SEARCH_MAX_PAGES = int(os.getenv("XHS_DEEP_SEARCH_MAX_PAGES", "20"))
+DEEP_SEARCH_CONCURRENCY = int(os.getenv("XHS_DEEP_SEARCH_CONCURRENCY", "3"))
+
+# 多关键词搜索：单次最多关键词数、全部关键词同时请求的页数、每个关键词同时请求的页数
+BATCH_SEARCH_MAX_KEYWORDS = int(os.getenv("XHS_BATCH_SEARCH_MAX_KEYWORDS", "50"))
+BATCH_SEARCH_CONCURRENCY = int(os.getenv("XHS_BATCH_SEARCH_CONCURRENCY", "6"))
+BATCH_SEARCH_PER_KEYWORD = int(os.getenv("XHS_BATCH_SEARCH_PER_KEYWORD", "2"))
+
+# 批量接口的流式返回格式（请求体 stream 字段或 Accept 头）
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
 browser: Optional[Browser] = None
 browser_context: Optional[BrowserContext] = None
 page: Optional[Page] = None
+sign_pool: Optional[SignPagePool] = None
+signer: Optional[SignerBackend] = None
 xhs_client: Optional[XiaoHongShuClient] = None
+job_manager: Optional[JobManager] = None
+wordcloud_service: Optional[WordCloudService] = None
+term_index: Optional[TermIndex] = None
+proxy_pool: Optional[ProxyPool] = None
 
 class SearchRequest(BaseModel):
     keyword: str
@@ -28,14 +132,38 @@ class SearchRequest(BaseModel):
     page_size: int = 20
     sort: str = "general"
     note_type: str = "all"  # all, video, image
+    session: Optional[str] = None  # 上一页返回的 session，翻页时带上以继续同一次搜索
+    refresh: bool = False  # 重新开始搜索（不使用已有会话和缓存）
+
+class DeepSearchRequest(BaseModel):
+    keyword: str
+    pages: int = 5  # 最多获取的页数（不超过 XHS_DEEP_SEARCH_MAX_PAGES）
+    page_size: int = 20
+    sort: str = "general"
+    note_type: str = "all"  # all, video, image
+    max_concurrency: int = DEEP_SEARCH_CONCURRENCY  # 同时请求的页数
+    session: Optional[str] = None  # /search 返回的 session，与之前的翻页共用同一次搜索
+    refresh: bool = False
+    stream: Optional[str] = None  # 流式返回："ndjson" 或 "sse"，不传时按 Accept 头判断
+
+class BatchSearchRequest(BaseModel):
+    keywords: List[str]
+    pages: int = 1  # 每个关键词获取的页数
+    page_size: int = 20
+    sort: str = "general"
+    note_type: str = "all"  # all, video, image
+    max_concurrency: int = BATCH_SEARCH_CONCURRENCY  # 全部关键词同时请求的页数
+    per_keyword_concurrency: int = BATCH_SEARCH_PER_KEYWORD  # 每个关键词同时请求的页数
 
 class NoteDetailRequest(BaseModel):
     note_id: str
     xsec_token: str = ""
     xsec_source: str = ""
+    refresh: bool = False  # 不使用缓存，重新获取
 
 class NoteUrlRequest(BaseModel):
     url: str
+    refresh: bool = False  # 不使用缓存，重新获取
 
 class CommentsRequest(BaseModel):
     note_id: str
@@ -43,9 +171,23 @@ class CommentsRequest(BaseModel):
     cursor: str = ""
     num: int = 10  # 获取评论数量
     get_sub_comments: bool = True  # 是否获取二级评论
+    sub_comment_concurrency: Optional[int] = None  # 同时获取二级评论的线程数
+
+class CommentsHarvestRequest(BaseModel):
+    note_id: str
+    xsec_token: str = ""
+    concurrency: int = 5  # 同时翻页的二级评论线程数
+    max_comments: Optional[int] = 5000  # 最多抓取的评论数
+    max_seconds: Optional[float] = 120  # 最长耗时（秒）
+    max_requests: Optional[int] = 500  # 最多请求数
+    checkpoint: Optional[dict] = None  # 上一次未完成时返回的 checkpoint
 
 class NoteIdsRequest(BaseModel):
     note_ids: List[str]  # 笔记ID列表
+    max_concurrency: int = BATCH_CONCURRENCY  # 同时请求的笔记数
+    item_timeout: Optional[float] = BATCH_ITEM_TIMEOUT  # 单条笔记超时（秒）
+    stream: Optional[str] = None  # 流式返回："ndjson" 或 "sse"，不传时按 Accept 头判断
+    refresh: bool = False  # 不使用缓存，重新获取
 
 class UserNotesRequest(BaseModel):
     user_id: str
@@ -54,19 +196,201 @@ class UserNotesRequest(BaseModel):
 
 class UserInfoRequest(BaseModel):
     user_id: str
+    refresh: bool = False  # 不使用缓存，重新获取
 
 class WordCloudRequest(BaseModel):
-    comments: List[str]  # 评论文本列表
+    comments: List[str] = []  # 评论文本列表，为空时使用评论词频索引
+    note_id: Optional[str] = None  # 使用词频索引时只取该笔记的词频，不传则为全局词频
 
 class CookieRequest(BaseModel):
     cookies: str
 
 class NoteUrlsRequest(BaseModel):
     urls: str  # 多个 URL，用换行或逗号分隔
+    max_concurrency: int = BATCH_CONCURRENCY  # 同时请求的笔记数
+    item_timeout: Optional[float] = BATCH_ITEM_TIMEOUT  # 单条笔记超时（秒）
+    stream: Optional[str] = None  # 流式返回："ndjson" 或 "sse"，不传时按 Accept 头判断
+    refresh: bool = False  # 不使用缓存，重新获取
 
 class UserUrlRequest(BaseModel):
     url: str  # 用户主页 URL 或用户 ID
     num: int = 20  # 获取笔记数量
+    stream: Optional[str] = None  # 流式返回："ndjson" 或 "sse"，不传时按 Accept 头判断
+    refresh: bool = False  # 不使用缓存，重新获取
+
+class BreakerResetRequest(BaseModel):
+    key: Optional[str] = None  # GET /breakers 中 breakers 的键，如 account:3f1c9a0b2d4e；为空时关闭全部
+
+class JobRequest(BaseModel):
+    kind: str  # search / user_notes / notes / comments
+    params: dict  # 各类型的参数见 xhs/jobs.py
+
+class FastJSONResponse(JSONResponse):
+    """用 normalizer.dumps（orjson）序列化，直接返回时跳过 FastAPI 的 jsonable_encoder"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+def _format_batch_note(result: Dict, info: Dict, with_video: bool = False) -> Dict:
+    """批量接口中单条笔记详情的输出格式（with_video 时包含 video_url 和 share_count）"""
+    fields = NOTE_URL_BATCH_FIELDS if with_video else NOTE_BATCH_FIELDS
+    return note_detail(result, info.get("note_id", ""), info.get("xsec_token", ""), fields)
+
+def _circuit_open(e: CircuitOpenError) -> HTTPException:
+    """熔断中的请求返回 503 和 Retry-After，调用方按剩余冷却时间退避"""
+    retry_after = max(1, round(e.retry_after))
+    return HTTPException(
+        status_code=503,
+        detail={"error": "CIRCUIT_OPEN", "key": e.key, "reason": e.reason, "retry_after": round(e.retry_after, 2), "message": str(e)},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+def _user_note_items(notes_result: Optional[Dict]) -> List[Dict]:
+    if not notes_result:
+        return []
+    return notes_result.get("notes", []) or notes_result.get("data", {}).get("notes", [])
+
+def _stream_mode(flag: Optional[str], request: Request) -> Optional[str]:
+    """确定流式返回格式：请求体 stream 字段优先，其次 Accept 头；返回 None 表示普通 JSON"""
+    if flag:
+        if flag not in STREAM_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unsupported stream mode: {flag}")
+        return flag
+    accept = request.headers.get("accept", "")
+    for mode, media_type in STREAM_MEDIA_TYPES.items():
+        if media_type in accept:
+            return mode
+    return None
+
+def _encode_stream_record(record: Dict, mode: str) -> bytes:
+    data = dumps(record)
+    if mode == "sse":
+        return b"event: " + record["type"].encode() + b"\ndata: " + data + b"\n\n"
+    return data + b"\n"
+
+def _stream_response(records: AsyncIterator[Dict], mode: str) -> StreamingResponse:
+    """把逐条产出的记录编码为 NDJSON / SSE 流
+
+    每条记录都带 type 字段（note / user / error / summary），最后一条总是 summary。
+    客户端断开时立即关闭 records（及其中的客户端生成器），未完成的请求随之取消。
+    """
+    async def body():
+        try:
+            async with aclosing(records):
+                async for record in records:
+                    yield _encode_stream_record(record, mode)
+        except Exception as e:
+            print(f"[Crawler] Stream aborted: {e}")
+            yield _encode_stream_record({"type": "summary", "success": False, "error": str(e)}, mode)
+
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_MEDIA_TYPES[mode],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _stream_batch_notes(
+    note_infos: List[Dict],
+    max_concurrency: int,
+    item_timeout: Optional[float],
+    with_video: bool = False,
+    refresh: bool = False,
+) -> AsyncIterator[Dict]:
+    """批量笔记的流式记录：每条笔记完成后立即产出，index 为其在请求中的位置"""
+    start = time.monotonic()
+    fetched = failed = 0
+    results = xhs_client.iter_notes_by_ids(note_infos, max_concurrency, item_timeout, refresh)
+    async with aclosing(results):
+        async for index, result in results:
+            info = note_infos[index]
+            if isinstance(result, Exception) or not result:
+                failed += 1
+                error = str(result) if result else "Note not found"
+                print(f"[Crawler] Error fetching note {info.get('note_id', '')}: {error}")
+                yield {"type": "error", "index": index, "note_id": info.get("note_id", ""), "error": error}
+            else:
+                fetched += 1
+                yield {"type": "note", "index": index, "note": _format_batch_note(result, info, with_video)}
+    yield {
+        "type": "summary",
+        "success": True,
+        "total": len(note_infos),
+        "fetched": fetched,
+        "failed": failed,
+        "elapsed_ms": round((time.monotonic() - start) * 1000, 2),
+    }
+
+async def _stream_deep_search(req: DeepSearchRequest, pages: int) -> AsyncIterator[Dict]:
+    """深度搜索的流式记录：按排名顺序逐页产出笔记，rank 为去重后的名次"""
+    start = time.monotonic()
+    sort_type, note_type = search_types(req.sort, req.note_type)
+    session = xhs_client.search_session(req.keyword, sort_type, note_type, req.session, req.refresh)
+    rank = fetched_pages = 0
+    has_more = False
+    results = xhs_client.iter_search_pages(
+        keyword=req.keyword,
+        pages=pages,
+        page_size=req.page_size,
+        sort=sort_type,
+        note_type=note_type,
+        max_concurrency=req.max_concurrency,
+        session=session,
+    )
+    async with aclosing(results):
+        async for page, items, has_more in results:
+            fetched_pages += 1
+            for note in note_cards(items):
+                yield {"type": "note", "index": rank, "page": page, "note": note}
+                rank += 1
+    yield {
+        "type": "summary",
+        "success": True,
+        "keyword": req.keyword,
+        "session": session.token,
+        "pages": fetched_pages,
+        "fetched": rank,
+        "has_more": has_more,
+        "elapsed_ms": round((time.monotonic() - start) * 1000, 2),
+    }
+
+async def _stream_user_from_url(user_id: str, num: int, refresh: bool = False) -> AsyncIterator[Dict]:
+    """用户信息和笔记列表并发请求，哪个先完成先产出"""
+    start = time.monotonic()
+    user_task = asyncio.ensure_future(xhs_client.get_user_info(user_id=user_id, refresh=refresh))
+    notes_task = asyncio.ensure_future(xhs_client.get_user_notes(user_id=user_id, cursor="", num=num))
+    pending = {user_task, notes_task}
+    fetched = 0
+    notes_result = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                source = "user" if task is user_task else "notes"
+                try:
+                    result = task.result()
+                except Exception as e:
+                    print(f"[Crawler] Error fetching user {source}: {e}")
+                    yield {"type": "error", "source": source, "error": str(e)}
+                    continue
+                if task is user_task:
+                    yield {"type": "user", "user": user_profile(result, user_id) if result else None}
+                else:
+                    notes_result = result
+                    for index, note in enumerate(note_cards(_user_note_items(result), user_id)):
+                        fetched += 1
+                        yield {"type": "note", "index": index, "note": note}
+    finally:
+        for task in pending:
+            task.cancel()
+    yield {
+        "type": "summary",
+        "success": True,
+        "user_id": user_id,
+        "fetched": fetched,
+        "has_more": notes_result.get("has_more", False) if notes_result else False,
+        "cursor": notes_result.get("cursor", "") if notes_result else "",
+        "elapsed_ms": round((time.monotonic() - start) * 1000, 2),
+    }
 
 async def init_browser():
     global browser, browser_context, page
@@ -81,8 +405,48 @@ async def init_browser():
     print("[Crawler] Browser initialized and page loaded")
     return page
 
+async def init_sign_pool():
+    global sign_pool
+    sign_pool = SignPagePool(
+        browser_context,
+        size=SIGN_POOL_SIZE,
+        max_inflight_per_page=SIGN_PAGE_MAX_INFLIGHT,
+        lease_timeout=SIGN_LEASE_TIMEOUT,
+    )
+    # 主页面已经加载过 /explore，直接作为池中的第一个页面
+    await sign_pool.start(pages=[page])
+    return sign_pool
+
+async def init_signer():
+    global signer
+    playwright_signer = PlaywrightSigner(sign_pool=sign_pool, page=page)
+    if SIGNER_BACKEND == "node" and SIGN_SCRIPT:
+        # 沙箱里没有真实的 localStorage，用浏览器页面中的 b1 初始化
+        b1 = await get_b1_from_localstorage(page) if page else ""
+        # 设置 Cookie 后 b1 可能改变，下一次签名时从当前页面重新读取
+        node_signer = NodeSigner(
+            SIGN_SCRIPT,
+            local_storage={"b1": b1} if b1 else None,
+            b1_source=lambda: get_b1_from_localstorage(page),
+        )
+        try:
+            await node_signer.start()
+            signer = FallbackSigner(node_signer, playwright_signer)
+        except Exception as e:
+            print(f"[Crawler] Node signer unavailable, using Playwright: {e}")
+            signer = playwright_signer
+    else:
+        signer = playwright_signer
+    return signer
+
 async def close_browser():
-    global browser, browser_context, page
+    global browser, browser_context, page, sign_pool, signer
+    if signer:
+        await signer.close()
+        signer = None
+    if sign_pool:
+        await sign_pool.close()
+        sign_pool = None
     if browser:
         await browser.close()
         browser = None
@@ -91,7 +455,10 @@ async def close_browser():
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global page, xhs_client, browser_context
+    global page, xhs_client, browser_context, job_manager, wordcloud_service, term_index, proxy_pool
+    # 词云进程池最先启动，在浏览器加载期间完成预热
+    wordcloud_service = WordCloudService(workers=WORDCLOUD_WORKERS, cache_size=WORDCLOUD_CACHE_SIZE)
+    await wordcloud_service.start()
     page = await init_browser()
 
     # 优先从缓存加载 Cookie
@@ -100,7 +467,6 @@ async def lifespan(app: FastAPI):
     if cached_cookies:
         # 使用缓存的 Cookie
         cookie_dict = cached_cookies
-        cookie_str = "; ".join([f"{k}={v}" for k, v in cookie_dict.items()])
         print(f"[Crawler] Loaded {len(cookie_dict)} cookies from cache, a1={cookie_dict.get('a1', 'N/A')[:20] if cookie_dict.get('a1') else 'N/A'}...")
 
         # 将缓存的 Cookie 添加到浏览器上下文
@@ -113,22 +479,64 @@ async def lifespan(app: FastAPI):
         # 从浏览器上下文提取 Cookie
         cookies = await browser_context.cookies()
         cookie_dict = {c["name"]: c["value"] for c in cookies}
-        cookie_str = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
         print(f"[Crawler] Extracted {len(cookies)} cookies from browser, a1={cookie_dict.get('a1', 'N/A')[:20] if cookie_dict.get('a1') else 'N/A'}...")
 
+    await init_sign_pool()
+    await init_signer()
+    term_index = TermIndex(max_notes=TERM_INDEX_MAX_NOTES)
+    await term_index.start()
+    if PROXIES:
+        proxy_pool = ProxyPool(
+            PROXIES,
+            base_cooldown=PROXY_COOLDOWN,
+            max_cooldown=PROXY_MAX_COOLDOWN,
+            probe_url=PROXY_PROBE_URL,
+            probe_interval=PROXY_PROBE_INTERVAL,
+        )
+        await proxy_pool.start()
+        print(f"[Crawler] Proxy pool with {len(PROXIES)} proxies, probing {PROXY_PROBE_URL} every {PROXY_PROBE_INTERVAL:g}s")
+
     xhs_client = XiaoHongShuClient(
         headers={
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Origin": "https://www.xiaohongshu.com",
             "Referer": "https://www.xiaohongshu.com/",
-            "Cookie": cookie_str,
         },
         playwright_page=page,
         cookie_dict=cookie_dict,
+        proxy_pool=proxy_pool,
+        sign_pool=sign_pool,
+        signer=signer,
+        http_pool=HttpClientPool(
+            http2=HTTP2_ENABLED,
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            idle_timeout=HTTP_ROUTE_IDLE_TIMEOUT,
+        ),
+        sub_comment_concurrency=SUB_COMMENT_CONCURRENCY,
+        term_index=term_index,
+        search_sessions=SearchSessionStore(SEARCH_SESSION_TTL, SEARCH_PAGE_TTL, SEARCH_MAX_SESSIONS),
+        response_cache=ResponseCache(
+            max_entries=RESPONSE_CACHE_SIZE,
+            ttls={"note": NOTE_CACHE_TTL, "user": USER_CACHE_TTL},
+            db_file=RESPONSE_CACHE_DB or None,
+        ),
+        retry_policy=RetryPolicy(RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY),
+        rate_limiter=RateLimiter(RATE_LIMITS, min_rate=RATE_LIMIT_MIN),
+        circuit_breaker=CircuitBreaker(BREAKER_COOLDOWNS, probe_timeout=BREAKER_PROBE_TIMEOUT),
     )
     print("[Crawler] XHS Client initialized")
+    job_manager = JobManager(xhs_client, JobStore(JOB_DB), workers=JOB_WORKERS)
+    await job_manager.start()
     yield
+    await job_manager.close()
+    await xhs_client.close()
+    if proxy_pool:
+        await proxy_pool.close()
+    await term_index.close()
     await close_browser()
+    await wordcloud_service.close()
 
 app = FastAPI(title="XHS Crawler API", lifespan=lifespan)
 
@@ -142,7 +550,36 @@ app.add_middleware(
 
 @app.get("/health")
 async def health():
-    return {"status": "ok", "browser_ready": browser is not None}
+    return {
+        "status": "ok",
+        "browser_ready": browser is not None,
+        "signer": signer.get_stats() if signer else None,
+        "http": xhs_client.http.get_stats() if xhs_client else None,
+        "wordcloud": wordcloud_service.get_stats() if wordcloud_service else None,
+        "terms": term_index.get_stats() if term_index else None,
+        "search": xhs_client.search_sessions.get_stats() if xhs_client else None,
+        "response_cache": xhs_client.response_cache.get_stats() if xhs_client else None,
+        "single_flight": xhs_client.single_flight.get_stats() if xhs_client else None,
+        "retry": xhs_client.retry_policy.get_stats() if xhs_client else None,
+        "rate_limit": xhs_client.rate_limiter.get_stats() if xhs_client else None,
+        "breakers": xhs_client.circuit_breaker.get_stats() if xhs_client else None,
+        "proxy": proxy_pool.get_stats() if proxy_pool else None,
+    }
+
+@app.get("/breakers")
+async def get_breakers():
+    """各账号 / 代理的熔断状态（state 为 open 时 retry_after 秒内的请求直接返回 503）"""
+    if not xhs_client:
+        raise HTTPException(status_code=500, detail="Client not initialized")
+    return xhs_client.circuit_breaker.get_stats()
+
+@app.post("/breakers/reset")
+async def reset_breakers(req: BreakerResetRequest):
+    """手动关闭熔断器（如已在浏览器中完成验证码）"""
+    if not xhs_client:
+        raise HTTPException(status_code=500, detail="Client not initialized")
+    count = xhs_client.circuit_breaker.reset(req.key)
+    return {"success": True, "reset": count, **xhs_client.circuit_breaker.get_stats()}
 
 @app.get("/cookie-status")
 async def cookie_status():
@@ -194,8 +631,7 @@ async def set_cookies(req: CookieRequest):
         cookie_dict = {c["name"]: c["value"] for c in cookies}
 
         if xhs_client:
-            xhs_client.cookie_dict = cookie_dict
-            xhs_client.headers["Cookie"] = req.cookies
+            xhs_client.set_cookies(cookie_dict)
 
         # 保存到缓存（有效期7天）
         user_id = cookie_dict.get("web_session", "").split("_")[0] if cookie_dict.get("web_session") else "default"
@@ -215,30 +651,14 @@ async def search_notes(req: SearchRequest):
         raise HTTPException(status_code=500, detail="Client not initialized")
     
     try:
-        sort_map = {
-            "general": SearchSortType.GENERAL,
-            "popular": SearchSortType.MOST_POPULAR,
-            "latest": SearchSortType.LATEST,
-        }
-        sort_type = sort_map.get(req.sort, SearchSortType.GENERAL)
-
-        note_type_map = {
-            "all": SearchNoteType.ALL,
-            "video": SearchNoteType.VIDEO,
-            "image": SearchNoteType.IMAGE,
-        }
-        note_type = note_type_map.get(req.note_type, SearchNoteType.ALL)
+        sort_type, note_type = search_types(req.sort, req.note_type)
 
         print(f"[Crawler] Searching: keyword={req.keyword}, page={req.page}, sort={req.sort}, note_type={req.note_type}")
         print(f"[Crawler] Cookie a1: {xhs_client.cookie_dict.get('a1', 'N/A')[:20] if xhs_client.cookie_dict.get('a1') else 'N/A'}...")
 
-        result = await xhs_client.get_note_by_keyword(
-            keyword=req.keyword,
-            page=req.page,
-            page_size=req.page_size,
-            sort=sort_type,
-            note_type=note_type,
-        )
+        # 同一会话的各页共用 search_id，已获取的页直接从缓存返回
+        session = xhs_client.search_session(req.keyword, sort_type, note_type, req.session, req.refresh)
+        result, cached = await xhs_client.search_page(session, page=req.page, page_size=req.page_size)
         
         print(f"[Crawler] Search result keys: {result.keys() if isinstance(result, dict) else type(result)}")
         print(f"[Crawler] Search result type: {type(result)}")
@@ -252,48 +672,128 @@ async def search_notes(req: SearchRequest):
         
         print(f"[Crawler] Found {len(items)} items")
         
-        notes = []
-        for item in items:
-            # 处理不同的数据结构
-            note = item.get("note_card", {}) or item
-            if note:
-                note_type = note.get("type", "")
-
-                # 获取用户信息
-                user_info = note.get("user", {}) or {}
-                if not user_info and item.get("user"):
-                    user_info = item.get("user", {})
-
-                # 获取封面图
-                cover_info = note.get("cover", {}) or {}
-                cover_url = cover_info.get("url_default", "") or cover_info.get("url", "") or note.get("cover", "")
-
-                notes.append({
-                    "id": item.get("id", "") or note.get("note_id", ""),
-                    "xsec_token": item.get("xsec_token", ""),
-                    "title": note.get("display_title", "") or note.get("title", ""),
-                    "desc": note.get("desc", ""),
-                    "type": note_type,
-                    "user": {
-                        "user_id": user_info.get("user_id", ""),
-                        "nickname": user_info.get("nickname", ""),
-                        "avatar": user_info.get("avatar", "") or user_info.get("image", ""),
-                    },
-                    "cover": cover_url,
-                    "liked_count": (note.get("interact_info", {}) or {}).get("liked_count", "0"),
-                })
+        notes = note_cards(items)
         
         response_data = {
             "success": True,
             "has_more": result.get("has_more", False) if isinstance(result, dict) else False,
+            "session": session.token,
+            "cached": cached,
             "notes": notes
         }
         print(f"[Crawler] Returning {len(notes)} notes")
-        return response_data
+        return FastJSONResponse(response_data)
+    except CircuitOpenError as e:
+        raise _circuit_open(e)
     except Exception as e:
         print(f"[Crawler] Search error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/search/deep")
+async def deep_search_notes(req: DeepSearchRequest, request: Request):
+    """深度搜索：并发获取第 1..pages 页，按笔记ID去重后按排名返回（stream 为 ndjson / sse 时逐页流式返回）"""
+    global xhs_client
+    if not xhs_client:
+        raise HTTPException(status_code=500, detail="Client not initialized")
+
+    pages = max(1, min(req.pages, DEEP_SEARCH_MAX_PAGES))
+    print(f"[Crawler] Deep search: keyword={req.keyword}, pages={pages}, concurrency={req.max_concurrency}")
+    mode = _stream_mode(req.stream, request)
+    if mode:
+        return _stream_response(_stream_deep_search(req, pages), mode)
+
+    notes = []
+    summary = {}
+    try:
+        async for record in _stream_deep_search(req, pages):
+            if record["type"] == "note":
+                notes.append(record["note"])
+            else:
+                summary = record
+    except CookieExpiredError:
+        raise HTTPException(status_code=401, detail={"error": "COOKIE_EXPIRED", "message": "Cookie已失效，请重新设置"})
+    except Exception as e:
+        print(f"[Crawler] Deep search error: {e}")
+        if not notes:
+            if isinstance(e, CircuitOpenError):
+                raise _circuit_open(e)
+            raise HTTPException(status_code=500, detail=str(e))
+        # 已获取的页仍然返回
+        summary = {"success": True, "keyword": req.keyword, "fetched": len(notes), "has_more": True, "error": str(e)}
+
+    print(f"[Crawler] Deep search returning {len(notes)} notes")
+    summary.pop("type", None)
+    return FastJSONResponse({**summary, "notes": notes})
+
+@app.post("/search/batch")
+async def batch_search_notes(req: BatchSearchRequest):
+    """多关键词搜索：各关键词并发搜索，合并去重
+
+    notes 中每篇笔记只出现一次，matched_keywords 为搜到它的关键词；keywords 按请求顺序列出
+    每个关键词按排名的 note_ids。
+    """
+    global xhs_client
+    if not xhs_client:
+        raise HTTPException(status_code=500, detail="Client not initialized")
+
+    keywords = list(dict.fromkeys(k.strip() for k in req.keywords if k.strip()))
+    if not keywords:
+        raise HTTPException(status_code=400, detail="No keywords")
+    if len(keywords) > BATCH_SEARCH_MAX_KEYWORDS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_SEARCH_MAX_KEYWORDS} keywords per request")
+
+    start = time.monotonic()
+    pages = max(1, min(req.pages, DEEP_SEARCH_MAX_PAGES))
+    sort_type, note_type = search_types(req.sort, req.note_type)
+    print(f"[Crawler] Batch search: {len(keywords)} keywords, pages={pages}, concurrency={req.max_concurrency}")
+
+    keyword_pages: Dict[str, Dict[int, List[Dict]]] = {k: {} for k in keywords}
+    keyword_info = {k: {"keyword": k, "note_ids": [], "pages": 0, "has_more": False} for k in keywords}
+    results = xhs_client.iter_keyword_searches(
+        keywords,
+        pages=pages,
+        page_size=req.page_size,
+        sort=sort_type,
+        note_type=note_type,
+        max_concurrency=req.max_concurrency,
+        per_keyword_concurrency=req.per_keyword_concurrency,
+    )
+    # 提前退出（Cookie 失效）时立即关闭生成器，取消其余进行中的搜索
+    async with aclosing(results):
+        async for keyword, page, items, has_more in results:
+            if isinstance(items, CookieExpiredError):
+                raise HTTPException(status_code=401, detail={"error": "COOKIE_EXPIRED", "message": "Cookie已失效，请重新设置"})
+            if isinstance(items, Exception):
+                print(f"[Crawler] Batch search error for {keyword}: {items}")
+                keyword_info[keyword]["error"] = str(items)
+                continue
+            keyword_pages[keyword][page] = items
+            keyword_info[keyword]["pages"] += 1
+            keyword_info[keyword]["has_more"] = has_more
+
+    # 按关键词顺序、排名顺序合并，同一笔记只保留第一次出现的卡片
+    notes: Dict[str, Dict] = {}
+    for keyword in keywords:
+        note_ids = keyword_info[keyword]["note_ids"]
+        for page in sorted(keyword_pages[keyword]):
+            for card in note_cards(keyword_pages[keyword][page]):
+                note = notes.get(card["id"])
+                if note is None:
+                    card["matched_keywords"] = [keyword]
+                    notes[card["id"]] = card
+                elif keyword not in note["matched_keywords"]:
+                    note["matched_keywords"].append(keyword)
+                note_ids.append(card["id"])
+
+    print(f"[Crawler] Batch search returning {len(notes)} unique notes")
+    return FastJSONResponse({
+        "success": True,
+        "notes": list(notes.values()),
+        "keywords": list(keyword_info.values()),
+        "total": len(notes),
+        "elapsed_ms": round((time.monotonic() - start) * 1000, 2),
+    })
+
 @app.post("/note/detail")
 async def get_note_detail(req: NoteDetailRequest):
     global xhs_client
@@ -305,6 +805,7 @@ async def get_note_detail(req: NoteDetailRequest):
             note_id=req.note_id,
             xsec_source=req.xsec_source,
             xsec_token=req.xsec_token,
+            refresh=req.refresh,
         )
         
         if not result:
@@ -316,44 +817,12 @@ async def get_note_detail(req: NoteDetailRequest):
         print(f"[Crawler] Note detail - desc: '{desc_value}' (length: {len(desc_value)})")
         print(f"[Crawler] Note detail - result keys: {list(result.keys())}")
 
-        images = []
-        image_list = result.get("image_list", [])
-        for img in image_list:
-            url = img.get("url_default", "") or img.get("url", "")
-            if url:
-                images.append(url)
-        
-        video_url = ""
-        video = result.get("video", {})
-        if video:
-            media = video.get("media", {})
-            stream = media.get("stream", {})
-            h264 = stream.get("h264", [])
-            if h264:
-                video_url = h264[0].get("master_url", "")
-        
-        return {
+        return FastJSONResponse({
             "success": True,
-            "note": {
-                "id": result.get("note_id", req.note_id),
-                "title": result.get("title", result.get("display_title", "")),
-                "desc": result.get("desc", ""),
-                "type": result.get("type", ""),
-                "user": {
-                    "user_id": result.get("user", {}).get("user_id", ""),
-                    "nickname": result.get("user", {}).get("nickname", ""),
-                    "avatar": result.get("user", {}).get("avatar", ""),
-                },
-                "images": images,
-                "video_url": video_url,
-                "liked_count": result.get("interact_info", {}).get("liked_count", "0"),
-                "collected_count": result.get("interact_info", {}).get("collected_count", "0"),
-                "comment_count": result.get("interact_info", {}).get("comment_count", "0"),
-                "share_count": result.get("interact_info", {}).get("share_count", "0"),
-                "time": result.get("time", 0),
-                "tag_list": [t.get("name", "") for t in result.get("tag_list", [])],
-            }
-        }
+            "note": note_detail(result, req.note_id),
+        })
+    except CircuitOpenError as e:
+        raise _circuit_open(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -365,8 +834,11 @@ async def get_note_from_url(req: NoteUrlRequest):
             note_id=info["note_id"],
             xsec_token=info["xsec_token"],
             xsec_source=info["xsec_source"],
+            refresh=req.refresh,
         )
         return await get_note_detail(detail_req)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -383,91 +855,86 @@ async def get_comments(req: CommentsRequest):
             cursor=req.cursor,
             num=req.num,
             get_sub_comments=req.get_sub_comments,
+            sub_comment_concurrency=req.sub_comment_concurrency,
         )
 
-        comments = []
-        for c in result.get("comments", []):
-            # 处理二级评论
-            sub_comments = []
-            if req.get_sub_comments and c.get("sub_comments"):
-                for sub_c in c.get("sub_comments", []):
-                    sub_comments.append({
-                        "id": sub_c.get("id", ""),
-                        "content": sub_c.get("content", ""),
-                        "user": {
-                            "user_id": sub_c.get("user_info", {}).get("user_id", ""),
-                            "nickname": sub_c.get("user_info", {}).get("nickname", ""),
-                            "avatar": sub_c.get("user_info", {}).get("image", ""),
-                        },
-                        "like_count": sub_c.get("like_count", 0),
-                        "create_time": sub_c.get("create_time", 0),
-                        "reply_to_user": sub_c.get("reply_to_user", {}).get("nickname", "") if sub_c.get("reply_to_user") else "",
-                    })
-
-            comments.append({
-                "id": c.get("id", ""),
-                "content": c.get("content", ""),
-                "user": {
-                    "user_id": c.get("user_info", {}).get("user_id", ""),
-                    "nickname": c.get("user_info", {}).get("nickname", ""),
-                    "avatar": c.get("user_info", {}).get("image", ""),
-                },
-                "like_count": c.get("like_count", 0),
-                "create_time": c.get("create_time", 0),
-                "sub_comment_count": c.get("sub_comment_count", 0),
-                "sub_comments": sub_comments,
-            })
+        comments = normalize_comments(result.get("comments", []), with_sub_comments=req.get_sub_comments)
 
-        return {
+        return FastJSONResponse({
             "success": True,
             "has_more": result.get("has_more", False),
             "cursor": result.get("cursor", ""),
             "comments": comments
-        }
+        })
     except CookieExpiredError as e:
         # Cookie 失效，返回 401 状态码
         raise HTTPException(status_code=401, detail={"error": "COOKIE_EXPIRED", "message": "Cookie已失效，请重新设置"})
+    except CircuitOpenError as e:
+        raise _circuit_open(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/comments/all")
+async def harvest_comments(req: CommentsHarvestRequest):
+    """抓取笔记的全部评论和二级评论，受评论数/耗时/请求数预算限制，未完成时返回 checkpoint"""
+    global xhs_client
+    if not xhs_client:
+        raise HTTPException(status_code=500, detail="Client not initialized")
+
+    try:
+        result = await xhs_client.harvest_comments(
+            note_id=req.note_id,
+            xsec_token=req.xsec_token,
+            concurrency=req.concurrency,
+            max_comments=req.max_comments,
+            max_seconds=req.max_seconds,
+            max_requests=req.max_requests,
+            checkpoint=req.checkpoint,
+        )
+        print(f"[Crawler] Harvested comments of {req.note_id}: {result['stats']}")
+        return FastJSONResponse({
+            "success": True,
+            "note_id": req.note_id,
+            "complete": result["complete"],
+            "stop_reason": result["stop_reason"],
+            "retry_after": result.get("retry_after", 0.0),
+            "checkpoint": result["checkpoint"],
+            "stats": result["stats"],
+            "comments": [c.to_dict() for c in result["comments"]],
+        })
+    except CookieExpiredError:
+        raise HTTPException(status_code=401, detail={"error": "COOKIE_EXPIRED", "message": "Cookie已失效，请重新设置"})
+    except Exception as e:
+        print(f"[Crawler] Error in harvest_comments: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/notes/by-ids")
-async def get_notes_by_ids(req: NoteIdsRequest):
-    """批量获取指定ID的笔记详情"""
+async def get_notes_by_ids(req: NoteIdsRequest, request: Request):
+    """批量获取指定ID的笔记详情（stream 为 ndjson / sse 时逐条流式返回）"""
     global xhs_client
     if not xhs_client:
         raise HTTPException(status_code=500, detail="Client not initialized")
-    
+
+    note_infos = [{"note_id": note_id} for note_id in req.note_ids]
+    mode = _stream_mode(req.stream, request)
+    if mode:
+        return _stream_response(_stream_batch_notes(note_infos, req.max_concurrency, req.item_timeout, refresh=req.refresh), mode)
+
     notes = []
-    for note_id in req.note_ids:
+    results = await xhs_client.get_notes_by_ids(
+        note_infos,
+        max_concurrency=req.max_concurrency,
+        item_timeout=req.item_timeout,
+        refresh=req.refresh,
+    )
+    for info, result in zip(note_infos, results):
+        note_id = info["note_id"]
         try:
-            result = await xhs_client.get_note_by_id(note_id=note_id)
+            if isinstance(result, Exception):
+                raise result
             if result:
-                images = []
-                image_list = result.get("image_list", [])
-                for img in image_list:
-                    url = img.get("url_default", "") or img.get("url", "")
-                    if url:
-                        images.append(url)
-                
-                notes.append({
-                    "id": result.get("note_id", note_id),
-                    "xsec_token": "",  # 批量获取时没有token，需要从搜索获取
-                    "title": result.get("title", result.get("display_title", "")),
-                    "desc": result.get("desc", ""),
-                    "type": result.get("type", ""),
-                    "user": {
-                        "user_id": result.get("user", {}).get("user_id", ""),
-                        "nickname": result.get("user", {}).get("nickname", ""),
-                        "avatar": result.get("user", {}).get("avatar", ""),
-                    },
-                    "cover": images[0] if images else "",
-                    "images": images,
-                    "liked_count": result.get("interact_info", {}).get("liked_count", "0"),
-                    "collected_count": result.get("interact_info", {}).get("collected_count", "0"),
-                    "comment_count": result.get("interact_info", {}).get("comment_count", "0"),
-                    "time": result.get("time", 0),
-                    "tag_list": [t.get("name", "") for t in result.get("tag_list", [])],
-                })
+                # 批量获取时没有token，需要从搜索获取
+                notes.append(_format_batch_note(result, info))
         except Exception as e:
             import traceback
             error_msg = str(e)
@@ -491,15 +958,15 @@ async def get_notes_by_ids(req: NoteIdsRequest):
             })
             continue
     
-    return {
+    return FastJSONResponse({
         "success": True,
         "notes": notes,
         "total": len(req.note_ids),
         "fetched": len(notes)
-    }
+    })
 
 @app.post("/notes/from-urls")
-async def get_notes_from_urls(req: NoteUrlsRequest):
+async def get_notes_from_urls(req: NoteUrlsRequest, request: Request):
     """从 URL 批量获取笔记详情
 
     支持的 URL 格式：
@@ -507,12 +974,13 @@ async def get_notes_from_urls(req: NoteUrlsRequest):
     - https://www.xiaohongshu.com/discovery/item/674c5e32000000001e019dd1
     - 纯笔记 ID：674c5e32000000001e019dd1
 
-    多个 URL 用换行或逗号分隔
+    多个 URL 用换行或逗号分隔，stream 为 ndjson / sse 时逐条流式返回
     """
     global xhs_client
     if not xhs_client:
         raise HTTPException(status_code=500, detail="Client not initialized")
 
+    mode = _stream_mode(req.stream, request)
     try:
         # 解析 URL 获取笔记信息
         parsed = parse_urls_batch(req.urls)
@@ -523,59 +991,30 @@ async def get_notes_from_urls(req: NoteUrlsRequest):
 
         print(f"[Crawler] Fetching {len(note_infos)} notes from URLs")
 
+        if mode:
+            return _stream_response(
+                _stream_batch_notes(note_infos, req.max_concurrency, req.item_timeout, with_video=True, refresh=req.refresh),
+                mode,
+            )
+
         notes = []
         errors = []
 
-        for info in note_infos:
+        results = await xhs_client.get_notes_by_ids(
+            note_infos,
+            max_concurrency=req.max_concurrency,
+            item_timeout=req.item_timeout,
+            refresh=req.refresh,
+        )
+        for info, result in zip(note_infos, results):
             note_id = info.get("note_id", "")
-            xsec_token = info.get("xsec_token", "")
-            xsec_source = info.get("xsec_source", "")
 
             try:
-                result = await xhs_client.get_note_by_id(
-                    note_id=note_id,
-                    xsec_token=xsec_token,
-                    xsec_source=xsec_source,
-                )
+                if isinstance(result, Exception):
+                    raise result
 
                 if result:
-                    images = []
-                    image_list = result.get("image_list", [])
-                    for img in image_list:
-                        url = img.get("url_default", "") or img.get("url", "")
-                        if url:
-                            images.append(url)
-
-                    video_url = ""
-                    video = result.get("video", {})
-                    if video:
-                        media = video.get("media", {})
-                        stream = media.get("stream", {})
-                        h264 = stream.get("h264", [])
-                        if h264:
-                            video_url = h264[0].get("master_url", "")
-
-                    notes.append({
-                        "id": result.get("note_id", note_id),
-                        "xsec_token": xsec_token,
-                        "title": result.get("title", result.get("display_title", "")),
-                        "desc": result.get("desc", ""),
-                        "type": result.get("type", ""),
-                        "user": {
-                            "user_id": result.get("user", {}).get("user_id", ""),
-                            "nickname": result.get("user", {}).get("nickname", ""),
-                            "avatar": result.get("user", {}).get("avatar", ""),
-                        },
-                        "cover": images[0] if images else "",
-                        "images": images,
-                        "video_url": video_url,
-                        "liked_count": result.get("interact_info", {}).get("liked_count", "0"),
-                        "collected_count": result.get("interact_info", {}).get("collected_count", "0"),
-                        "comment_count": result.get("interact_info", {}).get("comment_count", "0"),
-                        "share_count": result.get("interact_info", {}).get("share_count", "0"),
-                        "time": result.get("time", 0),
-                        "tag_list": [t.get("name", "") for t in result.get("tag_list", [])],
-                    })
+                    notes.append(_format_batch_note(result, info, with_video=True))
                 else:
                     errors.append({"note_id": note_id, "error": "Note not found"})
 
@@ -583,14 +1022,14 @@ async def get_notes_from_urls(req: NoteUrlsRequest):
                 print(f"[Crawler] Error fetching note {note_id}: {e}")
                 errors.append({"note_id": note_id, "error": str(e)})
 
-        return {
+        return FastJSONResponse({
             "success": True,
             "notes": notes,
             "errors": errors,
             "total": len(note_infos),
             "fetched": len(notes),
             "failed": len(errors)
-        }
+        })
 
     except Exception as e:
         print(f"[Crawler] Error in get_notes_from_urls: {e}")
@@ -598,17 +1037,20 @@ async def get_notes_from_urls(req: NoteUrlsRequest):
 
 
 @app.post("/user/from-url")
-async def get_user_from_url(req: UserUrlRequest):
+async def get_user_from_url(req: UserUrlRequest, request: Request):
     """从 URL 获取用户信息和笔记
 
     支持的 URL 格式：
     - https://www.xiaohongshu.com/user/profile/5a87c9134eacab2a4db1a0fb
     - 纯用户 ID：5a87c9134eacab2a4db1a0fb
+
+    stream 为 ndjson / sse 时用户信息和笔记各自完成后立即返回
     """
     global xhs_client
     if not xhs_client:
         raise HTTPException(status_code=500, detail="Client not initialized")
 
+    mode = _stream_mode(req.stream, request)
     try:
         # 解析 URL 获取用户 ID
         user_info = parse_user_info_from_user_url(req.url)
@@ -619,70 +1061,38 @@ async def get_user_from_url(req: UserUrlRequest):
 
         print(f"[Crawler] Fetching user info and notes for: {user_id}")
 
+        if mode:
+            return _stream_response(_stream_user_from_url(user_id, req.num, req.refresh), mode)
+
         # 获取用户信息
         user_data = None
         try:
-            user_result = await xhs_client.get_user_info(user_id=user_id)
+            user_result = await xhs_client.get_user_info(user_id=user_id, refresh=req.refresh)
             if user_result:
-                user_data = {
-                    "user_id": user_result.get("user_id", user_id),
-                    "nickname": user_result.get("nickname", ""),
-                    "desc": user_result.get("desc", ""),
-                    "avatar": user_result.get("avatar", "") or user_result.get("image", ""),
-                    "followers": user_result.get("followers", 0) or user_result.get("fans", 0),
-                    "followed": user_result.get("followed", 0) or user_result.get("follows", 0),
-                    "notes_count": user_result.get("notes_count", 0) or user_result.get("notes", 0),
-                    "liked_count": user_result.get("liked_count", 0) or user_result.get("likes", 0),
-                }
+                user_data = user_profile(user_result, user_id)
         except Exception as e:
             print(f"[Crawler] Error fetching user info: {e}")
 
         # 获取用户笔记
         notes = []
+        notes_result = None
         try:
             notes_result = await xhs_client.get_user_notes(
                 user_id=user_id,
                 cursor="",
                 num=req.num,
             )
-
-            if notes_result:
-                items = notes_result.get("notes", []) or notes_result.get("data", {}).get("notes", [])
-
-                for item in items:
-                    note = item.get("note_card", {}) or item
-                    if note:
-                        user_info_note = note.get("user", {}) or {}
-                        if not user_info_note and item.get("user"):
-                            user_info_note = item.get("user", {})
-
-                        cover_info = note.get("cover", {}) or {}
-                        cover_url = cover_info.get("url_default", "") if isinstance(cover_info, dict) else cover_info
-
-                        notes.append({
-                            "id": item.get("id", "") or note.get("note_id", ""),
-                            "xsec_token": item.get("xsec_token", ""),
-                            "title": note.get("display_title", "") or note.get("title", ""),
-                            "desc": note.get("desc", ""),
-                            "type": note.get("type", ""),
-                            "user": {
-                                "user_id": user_info_note.get("user_id", user_id),
-                                "nickname": user_info_note.get("nickname", ""),
-                                "avatar": user_info_note.get("avatar", "") or user_info_note.get("image", ""),
-                            },
-                            "cover": cover_url,
-                            "liked_count": (note.get("interact_info", {}) or {}).get("liked_count", "0"),
-                        })
+            notes = note_cards(_user_note_items(notes_result), user_id)
         except Exception as e:
             print(f"[Crawler] Error fetching user notes: {e}")
 
-        return {
+        return FastJSONResponse({
             "success": True,
             "user": user_data,
             "notes": notes,
             "has_more": notes_result.get("has_more", False) if notes_result else False,
             "cursor": notes_result.get("cursor", "") if notes_result else "",
-        }
+        })
 
     except Exception as e:
         print(f"[Crawler] Error in get_user_from_url: {e}")
@@ -712,42 +1122,18 @@ async def get_user_notes(req: UserNotesRequest):
             error_msg = result.get("msg") or result.get("message") or "Unknown error"
             raise HTTPException(status_code=500, detail=error_msg)
         
-        notes = []
-        # 处理不同的响应格式
-        items = result.get("notes", []) or result.get("data", {}).get("notes", [])
+        notes = note_cards(_user_note_items(result))
         
-        for item in items:
-            # 处理不同的数据结构
-            note = item.get("note_card", {}) or item
-            if note:
-                # 获取用户信息
-                user_info = note.get("user", {}) or {}
-                if not user_info and item.get("user"):
-                    user_info = item.get("user", {})
-                
-                notes.append({
-                    "id": item.get("id", "") or note.get("note_id", ""),
-                    "xsec_token": item.get("xsec_token", ""),
-                    "title": note.get("display_title", "") or note.get("title", ""),
-                    "desc": note.get("desc", ""),
-                    "type": note.get("type", ""),
-                    "user": {
-                        "user_id": user_info.get("user_id", ""),
-                        "nickname": user_info.get("nickname", ""),
-                        "avatar": user_info.get("avatar", "") or user_info.get("image", ""),
-                    },
-                    "cover": (note.get("cover", {}) or {}).get("url_default", "") or note.get("cover", ""),
-                    "liked_count": (note.get("interact_info", {}) or {}).get("liked_count", "0"),
-                })
-        
-        return {
+        return FastJSONResponse({
             "success": True,
             "has_more": result.get("has_more", False),
             "cursor": result.get("cursor", ""),
             "notes": notes
-        }
+        })
     except HTTPException:
         raise
+    except CircuitOpenError as e:
+        raise _circuit_open(e)
     except Exception as e:
         print(f"[Crawler] Error in get_user_notes: {e}")
         import traceback
@@ -762,7 +1148,7 @@ async def get_user_info(req: UserInfoRequest):
         raise HTTPException(status_code=500, detail="Client not initialized")
     
     try:
-        result = await xhs_client.get_user_info(user_id=req.user_id)
+        result = await xhs_client.get_user_info(user_id=req.user_id, refresh=req.refresh)
         
         # 检查API返回的错误
         if not result:
@@ -773,65 +1159,142 @@ async def get_user_info(req: UserInfoRequest):
             error_msg = result.get("msg") or result.get("message") or "Unknown error"
             raise HTTPException(status_code=500, detail=error_msg)
         
-        # 处理不同的响应格式
-        user_data = result.get("user", {}) or result.get("data", {}) or result
-        
-        return {
+        return FastJSONResponse({
             "success": True,
-            "user": {
-                "user_id": user_data.get("user_id", ""),
-                "nickname": user_data.get("nickname", ""),
-                "desc": user_data.get("desc", "") or user_data.get("desc", ""),
-                "avatar": user_data.get("avatar", "") or user_data.get("image", ""),
-                "followers": user_data.get("followers", 0) or user_data.get("fans", 0),
-                "followed": user_data.get("followed", 0) or user_data.get("follows", 0),
-                "notes_count": user_data.get("notes_count", 0) or user_data.get("notes", 0),
-                "liked_count": user_data.get("liked_count", 0) or user_data.get("likes", 0),
-            }
-        }
+            "user": user_profile(result),
+        })
     except HTTPException:
         raise
+    except CircuitOpenError as e:
+        raise _circuit_open(e)
     except Exception as e:
         print(f"[Crawler] Error in get_user_info: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/jobs")
+async def create_job(req: JobRequest):
+    """提交后台抓取任务，立即返回任务信息，用 GET /jobs/{id} 查询进度"""
+    if not job_manager:
+        raise HTTPException(status_code=500, detail="Job manager not initialized")
+    try:
+        return {"success": True, "job": job_manager.submit(req.kind, req.params)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """列出最近的任务"""
+    if not job_manager:
+        raise HTTPException(status_code=500, detail="Job manager not initialized")
+    return {"success": True, "jobs": job_manager.list(status, limit)}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """查询任务状态、进度和 checkpoint"""
+    if not job_manager:
+        raise HTTPException(status_code=500, detail="Job manager not initialized")
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, "job": job}
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """取消任务（运行中的任务在当前步骤保存后停止）"""
+    if not job_manager:
+        raise HTTPException(status_code=500, detail="Job manager not initialized")
+    job = await job_manager.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, "job": job}
+
+@app.post("/jobs/{job_id}/resume")
+async def resume_job(job_id: str):
+    """从 checkpoint 继续失败或已取消的任务"""
+    if not job_manager:
+        raise HTTPException(status_code=500, detail="Job manager not initialized")
+    job = await job_manager.resume(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, "job": job}
+
+@app.get("/jobs/{job_id}/results")
+async def stream_job_results(job_id: str, request: Request, after: int = 0, follow: bool = True, stream: Optional[str] = None):
+    """流式返回任务结果（默认 NDJSON，Accept: text/event-stream 或 stream=sse 时为 SSE）
+
+    Args:
+        after: 只返回 seq 大于该值的结果，断线后传入最后收到的 seq 继续
+        follow: 任务未结束时是否等待新结果
+    """
+    if not job_manager:
+        raise HTTPException(status_code=500, detail="Job manager not initialized")
+    if not job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    mode = _stream_mode(stream, request) or "ndjson"
+
+    async def records():
+        async for seq, item in job_manager.follow(job_id, after, wait=follow):
+            yield {"type": "result", "seq": seq, **item}
+        job = job_manager.get(job_id)
+        yield {
+            "type": "summary",
+            "success": job["status"] != "failed",
+            "status": job["status"],
+            "result_count": job["result_count"],
+            "progress": job["progress"],
+            "error": job["error"],
+        }
+
+    return _stream_response(records(), mode)
+
+@app.get("/terms/top")
+async def top_terms(note_id: Optional[str] = None, k: int = 50):
+    """评论高频词（来自抓取评论时建立的词频索引，不传 note_id 时为全局）"""
+    if not term_index:
+        raise HTTPException(status_code=500, detail="Term index not initialized")
+    await term_index.flush()
+    if note_id and term_index.note_stats(note_id) is None:
+        raise HTTPException(status_code=404, detail="No comments indexed for this note")
+    return {
+        "success": True,
+        "note_id": note_id,
+        "stats": term_index.note_stats(note_id) if note_id else term_index.get_stats(),
+        "terms": [{"term": term, "count": count} for term, count in term_index.top_terms(note_id, k)],
+    }
+
 @app.post("/wordcloud")
 async def generate_wordcloud(req: WordCloudRequest):
-    """生成评论词云图"""
+    """生成评论词云图（在独立进程中渲染，结果按内容缓存）
+
+    传入 comments 时对其分词；comments 为空时直接使用词频索引（note_id 指定笔记）。
+    """
+    if not wordcloud_service:
+        raise HTTPException(status_code=500, detail="WordCloud service not initialized")
     try:
-        from wordcloud import WordCloud
-        import jieba
-        import io
-        import base64
-        
-        # 合并所有评论文本
-        text = " ".join(req.comments)
-        
-        # 使用jieba分词
-        words = jieba.cut(text)
-        word_text = " ".join(words)
-        
-        # 生成词云
-        wordcloud = WordCloud(
-            width=800,
-            height=400,
-            background_color='white',
-            font_path=None,  # 如果需要中文，需要指定字体路径
-            max_words=100,
-            relative_scaling=0.5,
-        ).generate(word_text)
-        
-        # 转换为base64图片
-        img_buffer = io.BytesIO()
-        wordcloud.to_image().save(img_buffer, format='PNG')
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        
+        if req.comments:
+            result = await wordcloud_service.render(req.comments)
+            source = f"{len(req.comments)} comments"
+        else:
+            if not term_index:
+                raise HTTPException(status_code=500, detail="Term index not initialized")
+            await term_index.flush()
+            frequencies = term_index.frequencies(req.note_id, k=WORDCLOUD_OPTIONS["max_words"])
+            if not frequencies:
+                raise HTTPException(status_code=404, detail="No comments indexed for this note")
+            result = await wordcloud_service.render_frequencies(frequencies)
+            source = f"term index {req.note_id or 'global'}"
+        print(f"[Crawler] WordCloud for {source}: cached={result['cached']}, coalesced={result['coalesced']}, timing={result['timing']}")
         return {
             "success": True,
-            "image": f"data:image/png;base64,{img_base64}"
+            "image": result["image"],
+            "cached": result["cached"],
+            "coalesced": result["coalesced"],
+            "timing": result["timing"],
         }
+    except HTTPException:
+        raise
     except ImportError:
         raise HTTPException(
             status_code=500, 
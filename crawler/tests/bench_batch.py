@@ -0,0 +1,62 @@
+"""
+批量获取笔记详情在不同并发数下的耗时：本地替身服务代替小红书接口，每个请求固定服务端延迟
+
+运行（在 crawler/ 目录下）：
+    python tests/bench_batch.py [--notes 64] [--delay 0.05] [--workers 1 4 16]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from support import FakeSigner, StandInServer, make_client  # noqa: E402
+
+FEED_URI = "/api/sns/web/v1/feed"
+
+
+def _feed(args):
+    return {"items": [{"note_card": {"note_id": args["source_note_id"]}}]}
+
+
+async def run(server: StandInServer, notes: int, workers: int) -> float:
+    client = make_client(server, signer=FakeSigner())
+    note_infos = [{"note_id": f"note-{i}", "xsec_token": "t"} for i in range(notes)]
+    # 客户端每个请求都会打印日志，运行期间丢弃
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            start = time.perf_counter()
+            results = await client.get_notes_by_ids(note_infos, max_concurrency=workers)
+            elapsed = time.perf_counter() - start
+        finally:
+            await client.close()
+    assert [r["note_id"] for r in results] == [info["note_id"] for info in note_infos]
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=64)
+    parser.add_argument("--delay", type=float, default=0.05, help="每个请求的服务端耗时（秒）")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    print(f"{args.notes} notes, {args.delay * 1000:g}ms per request")
+    with StandInServer({FEED_URI: _feed}, delay=args.delay) as server:
+        baseline = None
+        for workers in args.workers:
+            elapsed = asyncio.run(run(server, args.notes, workers))
+            baseline = baseline or elapsed
+            print(
+                f"workers={workers:<3d} {elapsed:7.2f}s   {args.notes / elapsed:7.1f} notes/s   "
+                f"speedup {baseline / elapsed:5.2f}x"
+            )
+        assert server.errors == [], server.errors
+
+
+if __name__ == "__main__":
+    main()
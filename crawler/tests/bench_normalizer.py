@@ -0,0 +1,78 @@
+"""
+每 1k 条笔记的规整 + 序列化耗时：原 main.py 格式化代码 + FastAPI 默认序列化 vs normalizer + dumps
+
+运行（在 crawler/ 目录下）：
+    python tests/bench_normalizer.py [--notes 1000] [--repeat 50]
+
+安装了 orjson 时，另外输出 dumps 退回标准库 json 时的序列化耗时。
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from legacy_format import format_batch_note, format_comments, render, sample_comment, sample_note_card  # noqa: E402
+from xhs import normalizer  # noqa: E402
+from xhs.normalizer import NOTE_BATCH_FIELDS, comments, dumps, note_detail  # noqa: E402
+
+
+def best_ms(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+def report(name: str, legacy, new, repeat: int):
+    legacy_ms, new_ms = best_ms(legacy, repeat), best_ms(new, repeat)
+    print(f"{name:32s} {legacy_ms:8.2f}ms {new_ms:8.2f}ms   {legacy_ms / new_ms:5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    cards = [sample_note_card(i) for i in range(args.notes)]
+    infos = [{"note_id": f"note-{i}", "xsec_token": f"token-{i}"} for i in range(args.notes)]
+    raw_comments = [sample_comment(i) for i in range(args.notes)]
+
+    def legacy_notes():
+        return [format_batch_note(card, info) for card, info in zip(cards, infos)]
+
+    def new_notes():
+        return [note_detail(card, info["note_id"], info["xsec_token"], NOTE_BATCH_FIELDS) for card, info in zip(cards, infos)]
+
+    assert legacy_notes() == new_notes()
+    assert format_comments(raw_comments) == comments(raw_comments)
+
+    def notes_serialized():
+        return dumps({"notes": new_notes()})
+
+    def comments_serialized():
+        return dumps({"comments": comments(raw_comments)})
+
+    rows = [
+        ("notes normalize", legacy_notes, new_notes),
+        ("notes + serialize", lambda: render({"notes": legacy_notes()}), notes_serialized),
+        ("comments normalize", lambda: format_comments(raw_comments), lambda: comments(raw_comments)),
+        ("comments + serialize", lambda: render({"comments": format_comments(raw_comments)}), comments_serialized),
+    ]
+    encoder = "orjson" if normalizer.orjson is not None else "json"
+    print(f"{args.notes} notes (6 images, 5 tags) / comments (3 sub comments), best of {args.repeat}")
+    print(f"{'':32s} {'legacy':>10s} {'new':>10s}")
+    for name, legacy, new in rows:
+        report(f"{name} ({encoder})" if "serialize" in name else name, legacy, new, args.repeat)
+
+    if normalizer.orjson is not None:
+        # 未安装 orjson 时 dumps 退回标准库 json
+        orjson, normalizer.orjson = normalizer.orjson, None
+        try:
+            for name, legacy, new in rows[1::2]:
+                report(f"{name} (json)", legacy, new, args.repeat)
+        finally:
+            normalizer.orjson = orjson
+
+
+if __name__ == "__main__":
+    main()
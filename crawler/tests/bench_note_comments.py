@@ -0,0 +1,72 @@
+"""
+一页评论（含二级评论）的耗时：二级评论线程逐个获取 vs 并发获取，本地替身服务代替小红书接口
+
+运行（在 crawler/ 目录下）：
+    python tests/bench_note_comments.py [--threads 10] [--delay 0.05] [--concurrency 1 5 10] [--rounds 5]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from support import StandInServer, make_client  # noqa: E402
+
+PAGE_URI = "/api/sns/web/v2/comment/page"
+SUB_URI = "/api/sns/web/v2/comment/sub/page"
+
+
+def _routes(threads: int):
+    def page(args):
+        comments = [{"id": f"c{i}", "content": f"评论{i}", "sub_comment_count": 3} for i in range(threads)]
+        return {"comments": comments, "cursor": "", "has_more": False}
+
+    def sub_page(args):
+        root = args["root_comment_id"]
+        return {"comments": [{"id": f"{root}-{j}", "content": f"回复{j}"} for j in range(int(args["num"]))]}
+
+    return {PAGE_URI: page, SUB_URI: sub_page}
+
+
+async def run(server: StandInServer, concurrency: int, rounds: int) -> List[float]:
+    client = make_client(server)
+    timings = []
+    # 客户端每个请求都会打印日志，运行期间丢弃
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            for i in range(rounds):
+                start = time.perf_counter()
+                # 每轮使用不同的笔记，避免与上一轮合并
+                await client.get_note_comments(f"note-{i}", sub_comment_concurrency=concurrency)
+                timings.append(time.perf_counter() - start)
+        finally:
+            await client.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=10, help="一页中有二级评论的评论数")
+    parser.add_argument("--delay", type=float, default=0.05, help="每个请求的服务端耗时（秒）")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"1 page + {args.threads} sub-comment threads, {args.delay * 1000:g}ms per request, median of {args.rounds}")
+    with StandInServer(_routes(args.threads), delay=args.delay) as server:
+        baseline = None
+        for concurrency in args.concurrency:
+            median = statistics.median(asyncio.run(run(server, concurrency, args.rounds)))
+            baseline = baseline or median
+            print(f"concurrency={concurrency:<3d} {median * 1000:8.1f}ms   speedup {baseline / median:5.2f}x")
+        assert server.errors == [], server.errors
+
+
+if __name__ == "__main__":
+    main()
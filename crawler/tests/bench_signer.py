@@ -0,0 +1,137 @@
+"""
+签名后端吞吐和内存对比：Node 沙箱 vs Playwright 页面，都加载 tests/fixtures/sign_stub.js
+
+运行（在 crawler/ 目录下）：
+    python tests/bench_signer.py [--seconds 5] [--concurrency 8] [--batch 4]
+
+RSS 为后端进程树（node worker / Chromium 全部进程）的常驻内存之和，只在 Linux 上统计。
+Chromium 未安装时跳过 Playwright 后端。
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from xhs.signer import NodeSigner, PlaywrightSigner, SignerBackend  # noqa: E402
+
+STUB_SCRIPT = Path(__file__).parent / "fixtures" / "sign_stub.js"
+STUB_URL = "https://stub.local/explore"
+
+
+def _children() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def tree_rss_mb(root: int, include_root: bool = True) -> Optional[float]:
+    """root 及其全部子进程的 RSS（MB）"""
+    if not os.path.isdir("/proc"):
+        return None
+    children = _children()
+    stack, total = list(children.get(root, [])), _rss_kb(root) if include_root else 0
+    while stack:
+        pid = stack.pop()
+        total += _rss_kb(pid)
+        stack.extend(children.get(pid, []))
+    return total / 1024
+
+
+async def run(signer: SignerBackend, seconds: float, concurrency: int, batch: int) -> int:
+    signatures = 0
+    deadline = time.monotonic() + seconds
+
+    async def worker(n: int):
+        nonlocal signatures
+        i = 0
+        while time.monotonic() < deadline:
+            pairs = [(f"/api/sns/web/v1/feed?{n}-{i}-{j}", f"{n:08x}{i:016x}{j:08x}") for j in range(batch)]
+            _, x3_values = await signer.call_mnsv2_many(pairs)
+            assert x3_values == [f"mns0101_{md5}" for _, md5 in pairs]
+            signatures += batch
+            i += 1
+
+    await asyncio.gather(*[worker(n) for n in range(concurrency)])
+    return signatures
+
+
+def report(name: str, signatures: int, seconds: float, rss: Optional[float]):
+    rss_text = f"{rss:.1f}MB" if rss is not None else "n/a"
+    print(f"{name:10s} {signatures / seconds:10.0f} signatures/s   RSS {rss_text}")
+
+
+async def bench_node(args):
+    signer = NodeSigner(str(STUB_SCRIPT), local_storage={"b1": "stub-b1"})
+    await signer.start()
+    try:
+        signatures = await run(signer, args.seconds, args.concurrency, args.batch)
+        report("node", signatures, args.seconds, tree_rss_mb(signer._process.pid))
+    finally:
+        await signer.close()
+
+
+async def bench_playwright(args):
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError:
+        print("playwright skipped: playwright is not installed")
+        return
+
+    html = f"<html><body><script>{STUB_SCRIPT.read_text()}</script></body></html>"
+    async with async_playwright() as p:
+        try:
+            browser = await p.chromium.launch(headless=True)
+        except Exception as e:
+            print(f"playwright skipped: {str(e).splitlines()[0]}")
+            return
+        try:
+            page = await browser.new_page()
+            await page.route(STUB_URL, lambda route: route.fulfill(body=html, content_type="text/html"))
+            await page.goto(STUB_URL)
+            await page.evaluate("localStorage.setItem('b1', 'stub-b1')")
+            signer = PlaywrightSigner(page=page)
+            signatures = await run(signer, args.seconds, args.concurrency, args.batch)
+            # 本进程的子进程就是 playwright driver 和它启动的 Chromium
+            rss = tree_rss_mb(os.getpid(), include_root=False)
+            report("playwright", signatures, args.seconds, rss)
+        finally:
+            await browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=4, help="每次 call_mnsv2_many 的签名数")
+    args = parser.parse_args()
+    print(f"{args.seconds:g}s, concurrency={args.concurrency}, batch={args.batch}")
+    asyncio.run(bench_node(args))
+    asyncio.run(bench_playwright(args))
+
+
+if __name__ == "__main__":
+    main()
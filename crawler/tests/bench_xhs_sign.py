@@ -0,0 +1,45 @@
+"""
+xhs_sign 快速实现与逐字节参考实现的耗时对比
+
+运行（在 crawler/ 目录下）：
+    python tests/bench_xhs_sign.py
+"""
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from xhs.xhs_sign import b64_encode, b64_encode_bytes, encode_utf8, encode_utf8_bytes, mrc, mrc_fast  # noqa: E402
+
+# 与 playwright_sign 中 x-s 的 payload 大小相当
+PAYLOAD = json.dumps(
+    {"x0": "4.2.1", "x1": "xhs-pc-web", "x2": "Windows", "x3": "mns0101_" + "A" * 160, "x4": "object"},
+    separators=(",", ":"),
+)
+X_S = "XYS_" + b64_encode_bytes(encode_utf8_bytes(PAYLOAD))
+MRC_INPUT = "1700000000000" + X_S + "I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMFYnqthIhJeSnMDKutRI3KsYorWHPtGrbV0P9WfIi/eWc6eYqtyQApPI37ekmR6QL+5Ii6sdneeSfqYHqwl2qt5B0DBIx+PGDi/sVtkIxdsxuwr4qtiIhuaIE3e3LV0I3VTIC7e0utl2ADmsLveDSKsSPw5IEvsiVtJOqw8BuwfPpdeTFWOIx4TIiu6ZPwrPut5IvlaLbgs3qtxIxes1VwHIkumIkIyejgsY/WTge7eSqte/D7sDcpipedeYrDtIC6eDVw2IENsSqtlnlSuNjVtIvoekqt3cZ7sVo4gIESyIhE4QfquIxhnqz8gIkIfoqwkICqWJ73sdlOeVPw3IvAe0fged0OeZ00s1utc2DLKnWS4"
+BYTES = encode_utf8_bytes(PAYLOAD)
+NUMBER = 20000
+
+
+def bench(name, old, new):
+    old_t = timeit.timeit(old, number=NUMBER)
+    new_t = timeit.timeit(new, number=NUMBER)
+    print(f"{name:14s} old {old_t / NUMBER * 1e6:8.2f}us  new {new_t / NUMBER * 1e6:8.2f}us  x{old_t / new_t:.1f}")
+
+
+def main():
+    bench("encode_utf8", lambda: encode_utf8(PAYLOAD), lambda: encode_utf8_bytes(PAYLOAD))
+    bench("b64_encode", lambda: b64_encode(list(BYTES)), lambda: b64_encode_bytes(BYTES))
+    bench("mrc", lambda: mrc(MRC_INPUT), lambda: mrc_fast(MRC_INPUT))
+    bench(
+        "x-s pipeline",
+        lambda: b64_encode(encode_utf8(PAYLOAD)),
+        lambda: b64_encode_bytes(encode_utf8_bytes(PAYLOAD)),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 测试从仓库根目录运行，xhs 包和 main.py 都在 crawler/ 下
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,8 @@
+// 测试用签名脚本：与真实脚本一样定义 window.mnsv2，返回可预期的伪签名。
+// 加载和签名时都会打印日志，用来确认 console 输出不会混进 worker 的 stdout 协议。
+console.log('sign stub loaded');
+
+window.mnsv2 = function (signStr, md5) {
+    console.log('signing', md5);
+    return 'mns0101_' + md5;
+};
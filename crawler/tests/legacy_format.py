@@ -0,0 +1,220 @@
+"""
+xhs/normalizer.py 之前 main.py 中各接口的格式化代码（原样保留），作为输出格式和耗时的对照，
+以及测试和 benchmark 共用的接口原始数据样本
+"""
+import json
+from typing import Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+
+def _video_url(result: Dict) -> str:
+    h264 = (((result.get("video") or {}).get("media") or {}).get("stream") or {}).get("h264", [])
+    return h264[0].get("master_url", "") if h264 else ""
+
+
+def format_batch_note(result: Dict, info: Dict, with_video: bool = False) -> Dict:
+    """/notes/by-ids（with_video=False）和 /notes/from-urls（with_video=True）"""
+    images = []
+    for img in result.get("image_list", []):
+        url = img.get("url_default", "") or img.get("url", "")
+        if url:
+            images.append(url)
+
+    interact_info = result.get("interact_info", {})
+    note = {
+        "id": result.get("note_id", info.get("note_id", "")),
+        "xsec_token": info.get("xsec_token", ""),
+        "title": result.get("title", result.get("display_title", "")),
+        "desc": result.get("desc", ""),
+        "type": result.get("type", ""),
+        "user": {
+            "user_id": result.get("user", {}).get("user_id", ""),
+            "nickname": result.get("user", {}).get("nickname", ""),
+            "avatar": result.get("user", {}).get("avatar", ""),
+        },
+        "cover": images[0] if images else "",
+        "images": images,
+    }
+    if with_video:
+        note["video_url"] = _video_url(result)
+    note["liked_count"] = interact_info.get("liked_count", "0")
+    note["collected_count"] = interact_info.get("collected_count", "0")
+    note["comment_count"] = interact_info.get("comment_count", "0")
+    if with_video:
+        note["share_count"] = interact_info.get("share_count", "0")
+    note["time"] = result.get("time", 0)
+    note["tag_list"] = [t.get("name", "") for t in result.get("tag_list", [])]
+    return note
+
+
+def format_note_detail(result: Dict, note_id: str) -> Dict:
+    """/note/detail"""
+    images = []
+    for img in result.get("image_list", []):
+        url = img.get("url_default", "") or img.get("url", "")
+        if url:
+            images.append(url)
+
+    return {
+        "id": result.get("note_id", note_id),
+        "title": result.get("title", result.get("display_title", "")),
+        "desc": result.get("desc", ""),
+        "type": result.get("type", ""),
+        "user": {
+            "user_id": result.get("user", {}).get("user_id", ""),
+            "nickname": result.get("user", {}).get("nickname", ""),
+            "avatar": result.get("user", {}).get("avatar", ""),
+        },
+        "images": images,
+        "video_url": _video_url(result),
+        "liked_count": result.get("interact_info", {}).get("liked_count", "0"),
+        "collected_count": result.get("interact_info", {}).get("collected_count", "0"),
+        "comment_count": result.get("interact_info", {}).get("comment_count", "0"),
+        "share_count": result.get("interact_info", {}).get("share_count", "0"),
+        "time": result.get("time", 0),
+        "tag_list": [t.get("name", "") for t in result.get("tag_list", [])],
+    }
+
+
+def format_note_cards(items: List[Dict], user_id: str = "") -> List[Dict]:
+    """/search、/user/notes"""
+    notes = []
+    for item in items:
+        note = item.get("note_card", {}) or item
+        if note:
+            user_info = note.get("user", {}) or {}
+            if not user_info and item.get("user"):
+                user_info = item.get("user", {})
+
+            cover_info = note.get("cover", {}) or {}
+            cover_url = cover_info.get("url_default", "") or cover_info.get("url", "") or note.get("cover", "")
+
+            notes.append({
+                "id": item.get("id", "") or note.get("note_id", ""),
+                "xsec_token": item.get("xsec_token", ""),
+                "title": note.get("display_title", "") or note.get("title", ""),
+                "desc": note.get("desc", ""),
+                "type": note.get("type", ""),
+                "user": {
+                    "user_id": user_info.get("user_id", user_id),
+                    "nickname": user_info.get("nickname", ""),
+                    "avatar": user_info.get("avatar", "") or user_info.get("image", ""),
+                },
+                "cover": cover_url,
+                "liked_count": (note.get("interact_info", {}) or {}).get("liked_count", "0"),
+            })
+    return notes
+
+
+def format_user_profile(user_result: Dict, user_id: str = "") -> Dict:
+    """/user/info、/user/from-url"""
+    return {
+        "user_id": user_result.get("user_id", user_id),
+        "nickname": user_result.get("nickname", ""),
+        "desc": user_result.get("desc", ""),
+        "avatar": user_result.get("avatar", "") or user_result.get("image", ""),
+        "followers": user_result.get("followers", 0) or user_result.get("fans", 0),
+        "followed": user_result.get("followed", 0) or user_result.get("follows", 0),
+        "notes_count": user_result.get("notes_count", 0) or user_result.get("notes", 0),
+        "liked_count": user_result.get("liked_count", 0) or user_result.get("likes", 0),
+    }
+
+
+def format_comments(raw_comments: List[Dict], get_sub_comments: bool = True) -> List[Dict]:
+    """/comments"""
+    comments = []
+    for c in raw_comments:
+        sub_comments = []
+        if get_sub_comments and c.get("sub_comments"):
+            for sub_c in c.get("sub_comments", []):
+                sub_comments.append({
+                    "id": sub_c.get("id", ""),
+                    "content": sub_c.get("content", ""),
+                    "user": {
+                        "user_id": sub_c.get("user_info", {}).get("user_id", ""),
+                        "nickname": sub_c.get("user_info", {}).get("nickname", ""),
+                        "avatar": sub_c.get("user_info", {}).get("image", ""),
+                    },
+                    "like_count": sub_c.get("like_count", 0),
+                    "create_time": sub_c.get("create_time", 0),
+                    "reply_to_user": sub_c.get("reply_to_user", {}).get("nickname", "") if sub_c.get("reply_to_user") else "",
+                })
+
+        comments.append({
+            "id": c.get("id", ""),
+            "content": c.get("content", ""),
+            "user": {
+                "user_id": c.get("user_info", {}).get("user_id", ""),
+                "nickname": c.get("user_info", {}).get("nickname", ""),
+                "avatar": c.get("user_info", {}).get("image", ""),
+            },
+            "like_count": c.get("like_count", 0),
+            "create_time": c.get("create_time", 0),
+            "sub_comment_count": c.get("sub_comment_count", 0),
+            "sub_comments": sub_comments,
+            "sub_comments_error": c.get("sub_comments_error", ""),
+        })
+    return comments
+
+
+def render(content) -> bytes:
+    """FastAPI 默认的响应序列化：jsonable_encoder + JSONResponse.render"""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def sample_note_card(i: int, images: int = 6, tags: int = 5) -> Dict:
+    """get_note_by_id 返回的 note_card"""
+    return {
+        "note_id": f"note-{i}",
+        "title": f"标题 {i}",
+        "desc": f"正文 {i} " * 20,
+        "type": "video" if i % 2 else "normal",
+        "user": {"user_id": f"user-{i}", "nickname": f"作者{i}", "avatar": f"https://img.local/a/{i}.jpg"},
+        "image_list": [
+            {"url_default": f"https://img.local/{i}/{j}.webp", "url": f"https://img.local/{i}/{j}.jpg"}
+            for j in range(images)
+        ],
+        "video": {"media": {"stream": {"h264": [{"master_url": f"https://video.local/{i}.mp4"}]}}} if i % 2 else {},
+        "interact_info": {"liked_count": str(i), "collected_count": "3", "comment_count": "4", "share_count": "5"},
+        "time": 1700000000000 + i,
+        "tag_list": [{"id": str(j), "name": f"标签{j}"} for j in range(tags)],
+    }
+
+
+def sample_list_item(i: int) -> Dict:
+    """搜索结果和用户主页中的一项"""
+    return {
+        "id": f"note-{i}",
+        "xsec_token": f"token-{i}",
+        "note_card": {
+            "display_title": f"标题 {i}",
+            "type": "normal",
+            "user": {"user_id": f"user-{i}", "nickname": f"作者{i}", "avatar": f"https://img.local/a/{i}.jpg"},
+            "cover": {"url_default": f"https://img.local/{i}/cover.webp"},
+            "interact_info": {"liked_count": str(i)},
+        },
+    }
+
+
+def sample_comment(i: int, sub_comments: int = 3) -> Dict:
+    """/comment/page 返回的一条一级评论"""
+    def comment(comment_id: str) -> Dict:
+        return {
+            "id": comment_id,
+            "content": f"评论 {comment_id}",
+            "user_info": {"user_id": f"u-{comment_id}", "nickname": f"用户{comment_id}", "image": "https://img.local/u.jpg"},
+            "like_count": "2",
+            "create_time": 1700000000000,
+        }
+
+    raw = comment(f"c{i}")
+    raw["sub_comment_count"] = sub_comments
+    raw["sub_comments"] = []
+    for j in range(sub_comments):
+        sub = comment(f"c{i}-{j}")
+        sub["reply_to_user"] = {"nickname": f"用户c{i}"}
+        raw["sub_comments"].append(sub)
+    return raw
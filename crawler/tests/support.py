@@ -0,0 +1,208 @@
+"""
+测试和 benchmark 共用的本地替身
+
+- StandInServer：本地 HTTP 服务，代替 edith.xiaohongshu.com，按路径返回假数据，
+  并校验每个请求的签名头是否由它自己的 payload 计算而来
+- FakeSigner：不依赖浏览器的签名后端，x3 由 md5 确定性生成（与 fixtures/sign_stub.js 一致）
+- make_client：连接到 StandInServer、不限速的 XiaoHongShuClient
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+from xhs.client import XiaoHongShuClient
+from xhs.http_pool import HttpClientPool
+from xhs.playwright_sign import _build_sign_string
+from xhs.rate_limit import DEFAULT_LIMITS, RateLimiter
+from xhs.signer import SignerBackend
+from xhs.xhs_sign import BASE64_CHARS, mrc_fast
+
+STUB_B1 = "stub-b1"
+TEST_COOKIES = {"a1": "a1-test", "web_session": "session-test"}
+
+_STD_BASE64_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+_FROM_XHS_BASE64 = str.maketrans("".join(BASE64_CHARS), _STD_BASE64_CHARS)
+
+Route = Callable[[Dict[str, Any]], Any]
+
+
+class Reply:
+    """路由返回 Reply 时原样作为响应（状态码 + JSON），用于模拟 461、业务错误等"""
+
+    def __init__(self, status: int, data: Dict):
+        self.status = status
+        self.data = data
+
+
+def fake_x3(md5: str) -> str:
+    return f"mns0101_{md5}"
+
+
+class FakeSigner(SignerBackend):
+    name = "fake"
+
+    def __init__(self, delay: float = 0.0):
+        """
+        Args:
+            delay: 每次批量签名的耗时（秒），模拟页面签名的往返
+        """
+        self.delay = delay
+        self.calls = 0
+
+    async def call_mnsv2_many(self, pairs: List[Tuple[str, str]]) -> Tuple[str, List[str]]:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return STUB_B1, [fake_x3(md5) for _, md5 in pairs]
+
+
+def decode_xhs_base64(value: str) -> Dict:
+    """X-S / x-S-Common 的自定义 base64 -> JSON"""
+    return json.loads(base64.b64decode(value.removeprefix("XYS_").translate(_FROM_XHS_BASE64)))
+
+
+def verify_signature(method: str, path: str, params: List[Tuple[str, str]], body: str, headers) -> Optional[str]:
+    """检查签名头是否由这个请求自己的 payload 计算而来，返回错误说明，正确时返回 None"""
+    x_s, x_t, common = headers.get("X-S"), headers.get("X-T"), headers.get("x-S-Common")
+    if not (x_s and x_t and common and headers.get("X-B3-Traceid")):
+        return "missing signature headers"
+    sign_str = _build_sign_string(path, dict(params), "GET") if method == "GET" else path + body
+    expected_x3 = fake_x3(hashlib.md5(sign_str.encode("utf-8")).hexdigest())
+    if decode_xhs_base64(x_s).get("x3") != expected_x3:
+        return "X-S does not match the request payload"
+    common = decode_xhs_base64(common)
+    if common.get("x6") != x_t or common.get("x7") != x_s:
+        return "x-S-Common belongs to another request"
+    if common.get("x9") != mrc_fast(x_t + x_s + (common.get("x8") or "")):
+        return "x-S-Common checksum mismatch"
+    cookies = dict(part.split("=", 1) for part in (headers.get("Cookie") or "").split("; ") if "=" in part)
+    if common.get("x5") != cookies.get("a1"):
+        return "x-S-Common a1 does not match the Cookie header"
+    return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次写出，不关闭 Nagle 时长连接上每个请求多等一次 delayed ACK（约 40ms）
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def _dispatch(self, method: str):
+        stand_in = self.server.stand_in
+        url = urlparse(self.path)
+        if method == "GET":
+            pairs = parse_qsl(url.query, keep_blank_values=True)
+            body, args = "", dict(pairs)
+        else:
+            pairs = []
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+            args = json.loads(body or "{}")
+
+        error = verify_signature(method, url.path, pairs, body, self.headers) if stand_in.verify else None
+        trace_id = self.headers.get("X-B3-Traceid")
+        route = stand_in.routes.get(url.path)
+        with stand_in.lock:
+            stand_in.hits[url.path] += 1
+            stand_in.inflight += 1
+            stand_in.max_inflight = max(stand_in.max_inflight, stand_in.inflight)
+            if error:
+                stand_in.errors.append(f"{method} {self.path}: {error}")
+            if trace_id in stand_in.trace_ids:
+                stand_in.errors.append(f"{method} {self.path}: reused trace id {trace_id}")
+            stand_in.trace_ids.add(trace_id)
+        try:
+            if stand_in.delay:
+                time.sleep(stand_in.delay)
+            if route is None:
+                self._reply(404, {"success": False, "msg": f"no route for {url.path}"})
+            elif error:
+                self._reply(200, {"success": False, "code": -1, "msg": error})
+            else:
+                data = route(args)
+                if isinstance(data, Reply):
+                    self._reply(data.status, data.data)
+                else:
+                    self._reply(200, {"success": True, "data": data})
+        finally:
+            with stand_in.lock:
+                stand_in.inflight -= 1
+
+    def _reply(self, status: int, data: Dict):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # 默认 backlog 只有 5，几百个并发连接会被重置
+    request_queue_size = 1024
+    stand_in: "StandInServer"
+
+
+class StandInServer:
+    def __init__(self, routes: Dict[str, Route], delay: float = 0.0, verify: bool = True):
+        """
+        Args:
+            routes: 接口路径 -> 处理函数（参数为 GET 查询参数或 POST 请求体，返回响应的 data 或 Reply）
+            delay: 每个请求的服务端耗时（秒）
+            verify: 是否校验签名头，校验失败的请求返回业务错误并记录在 errors 中
+        """
+        self.routes = routes
+        self.delay = delay
+        self.verify = verify
+        self.lock = threading.Lock()
+        self.hits: Counter = Counter()
+        self.errors: List[str] = []
+        self.trace_ids = set()
+        self.inflight = 0
+        self.max_inflight = 0
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.stand_in = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def unlimited_rate_limiter() -> RateLimiter:
+    return RateLimiter({name: (1e6, 1e6) for name in DEFAULT_LIMITS})
+
+
+def make_client(server: StandInServer, **kwargs) -> XiaoHongShuClient:
+    """连接到 server 的客户端：假签名、不限速、不读写 Cookie 缓存"""
+    kwargs.setdefault("signer", FakeSigner())
+    kwargs.setdefault("cookie_dict", dict(TEST_COOKIES))
+    kwargs.setdefault("rate_limiter", unlimited_rate_limiter())
+    kwargs.setdefault("http_pool", HttpClientPool(http2=False))
+    client = XiaoHongShuClient(use_cache=False, **kwargs)
+    client._host = server.url
+    return client
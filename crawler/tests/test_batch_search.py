@@ -0,0 +1,37 @@
+"""
+/search/batch 提前退出时立即关闭关键词搜索生成器（用假客户端代替 XiaoHongShuClient）
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import main
+from xhs.exception import CookieExpiredError
+
+
+class FakeSearchClient:
+    def __init__(self):
+        self.closed = False
+
+    async def iter_keyword_searches(self, keywords, **kwargs):
+        try:
+            yield keywords[0], 1, CookieExpiredError("expired"), False
+            # 其余关键词的搜索仍在进行
+            await asyncio.sleep(60)
+        finally:
+            self.closed = True
+
+
+def test_cookie_expired_closes_search_generator(monkeypatch):
+    fake = FakeSearchClient()
+    monkeypatch.setattr(main, "xhs_client", fake)
+
+    async def scenario():
+        with pytest.raises(HTTPException) as exc_info:
+            await main.batch_search_notes(main.BatchSearchRequest(keywords=["a", "b"]))
+        # 不等垃圾回收，返回 401 时生成器已经关闭
+        assert fake.closed
+        return exc_info.value
+
+    assert asyncio.run(scenario()).status_code == 401
@@ -0,0 +1,94 @@
+"""
+CommentHarvester 预算与断点续抓测试（用假客户端代替接口）
+"""
+import asyncio
+from typing import Dict, List
+
+from xhs.comment_harvester import CommentHarvester
+
+TOP_PAGES = 3
+PER_PAGE = 4
+THREAD_PAGES = 3
+PER_THREAD_PAGE = 2
+
+
+def _comment(comment_id: str) -> Dict:
+    return {"id": comment_id, "content": comment_id, "user_info": {"user_id": "u", "nickname": "n"}}
+
+
+class FakeCommentClient:
+    """一级评论 TOP_PAGES 页，每条一级评论带 1 条内联二级评论，线程里还有 THREAD_PAGES 页"""
+
+    def __init__(self):
+        self.requests = 0
+
+    @staticmethod
+    def all_ids() -> set:
+        ids = set()
+        for page in range(TOP_PAGES):
+            for i in range(PER_PAGE):
+                parent = f"c{page}-{i}"
+                ids.add(parent)
+                ids.add(f"{parent}-inline")
+                ids.update(f"{parent}-s{p}-{j}" for p in range(THREAD_PAGES) for j in range(PER_THREAD_PAGE))
+        return ids
+
+    async def get_note_comments(self, note_id: str, xsec_token: str = "", cursor: str = "", get_sub_comments: bool = True) -> Dict:
+        self.requests += 1
+        await asyncio.sleep(0)
+        page = int(cursor or 0)
+        comments = []
+        for i in range(PER_PAGE):
+            raw = _comment(f"c{page}-{i}")
+            raw["sub_comments"] = [_comment(f"c{page}-{i}-inline")]
+            raw["sub_comment_count"] = 1 + THREAD_PAGES * PER_THREAD_PAGE
+            raw["sub_comment_has_more"] = True
+            raw["sub_comment_cursor"] = "0"
+            comments.append(raw)
+        has_more = page + 1 < TOP_PAGES
+        return {"comments": comments, "cursor": str(page + 1) if has_more else "", "has_more": has_more}
+
+    async def get_sub_comments(self, note_id: str, comment_id: str, xsec_token: str = "", cursor: str = "") -> Dict:
+        self.requests += 1
+        await asyncio.sleep(0)
+        page = int(cursor or 0)
+        comments: List[Dict] = [_comment(f"{comment_id}-s{page}-{j}") for j in range(PER_THREAD_PAGE)]
+        has_more = page + 1 < THREAD_PAGES
+        return {"comments": comments, "cursor": str(page + 1) if has_more else "", "has_more": has_more}
+
+
+def test_resume_after_mid_page_truncation_loses_no_comments():
+    async def scenario():
+        client = FakeCommentClient()
+        seen: List[str] = []
+        checkpoint = None
+        for _ in range(100):
+            # 上限不是整页大小的倍数，每一轮都会在某一页中间达到上限
+            result = await CommentHarvester(
+                client, "note", concurrency=3, max_comments=7, checkpoint=checkpoint
+            ).run()
+            seen.extend(c.id for c in result["comments"])
+            if result["complete"]:
+                break
+            assert result["stop_reason"] == "max_comments"
+            checkpoint = result["checkpoint"]
+        else:
+            raise AssertionError("harvest did not finish")
+        return seen
+
+    seen = asyncio.run(scenario())
+    assert set(seen) == FakeCommentClient.all_ids()
+    assert len(seen) == len(set(seen))
+
+
+def test_pages_are_kept_whole_when_budget_runs_out():
+    async def scenario():
+        client = FakeCommentClient()
+        return await CommentHarvester(client, "note", concurrency=1, max_comments=3).run()
+
+    result = asyncio.run(scenario())
+    # 第一页的一级评论和内联二级评论整页保留，随后不再请求
+    assert result["stats"]["comments"] == 2 * PER_PAGE
+    assert result["stop_reason"] == "max_comments"
+    assert result["checkpoint"]["top_cursor"] == "1"
+    assert len(result["checkpoint"]["threads"]) == PER_PAGE
@@ -0,0 +1,32 @@
+"""
+HttpClientPool 关闭空闲线路：后台关闭任务保留引用，close() 等待它们结束
+"""
+import asyncio
+
+from support import StandInServer
+from xhs.http_pool import HttpClientPool
+
+
+def test_idle_route_is_closed_in_tracked_task():
+    async def scenario(server: StandInServer):
+        pool = HttpClientPool(http2=False, idle_timeout=0)
+        # 替身服务同时充当代理，代理线路和直连线路是两个客户端
+        await pool.request("GET", "http://origin.local/", proxy_url=server.url)
+        proxied = pool._routes[server.url]
+        # 取直连线路时淘汰空闲的代理线路，关闭任务在后台运行
+        pool._get_route(None)
+        assert server.url not in pool._routes
+        assert len(pool._close_tasks) == 1
+        await pool.request("GET", f"{server.url}/")
+        stats = pool.get_stats()
+
+        await pool.close()
+        assert not pool._close_tasks
+        assert proxied.client.is_closed
+        return stats
+
+    with StandInServer({"/": lambda args: {}}, verify=False) as server:
+        stats = asyncio.run(scenario(server))
+    assert server.hits["/"] == 2
+    assert stats["evicted_routes"] == 1
+    assert stats["requests"] == 2
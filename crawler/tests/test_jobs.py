@@ -0,0 +1,145 @@
+"""
+后台任务：重启后从 checkpoint 继续、熔断后回到 pending 并自动重新排队、取消运行中的任务
+（用假客户端代替 XiaoHongShuClient，任务库放在临时目录）
+"""
+import asyncio
+import contextlib
+import io
+from typing import Dict, List, Optional
+
+from xhs.exception import CircuitOpenError, CookieExpiredError
+from xhs.jobs import CANCELLED, DONE, FINISHED_STATUSES, PENDING, RUNNING, JobManager, JobStore
+
+PAGES = 3
+
+
+class FakeSearchClient:
+    """每个关键词 PAGES 页，每页一条；fail[(keyword, page)] 为该页第一次请求时抛出的异常"""
+
+    def __init__(self, fail: Optional[Dict] = None):
+        self.fail = dict(fail or {})
+        self.calls: List[tuple] = []
+        # 设置 block 后，对应页的请求等待 release
+        self.block: Optional[tuple] = None
+        self.blocked = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def get_note_by_keyword(self, keyword: str, page: int = 1, **kwargs) -> Dict:
+        self.calls.append((keyword, page))
+        if self.block == (keyword, page):
+            self.blocked.set()
+            await self.release.wait()
+        error = self.fail.pop((keyword, page), None)
+        if error is not None:
+            raise error
+        return {"items": [{"id": f"{keyword}-{page}", "model_type": "note"}], "has_more": page < PAGES}
+
+
+async def _wait_status(manager: JobManager, job_id: str, statuses, timeout: float = 5.0) -> Dict:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = manager.get(job_id)
+        if job["status"] in statuses:
+            return job
+        assert asyncio.get_running_loop().time() < deadline, job
+        await asyncio.sleep(0.01)
+
+
+def _result_ids(manager: JobManager, job_id: str) -> List[str]:
+    return [item["item"]["id"] for _, item in manager.store.results(job_id)]
+
+
+def _run(scenario):
+    # 任务日志写到 stdout，测试中丢弃
+    with contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(scenario())
+
+
+def test_job_resumes_from_checkpoint_after_restart(tmp_path):
+    db_file = str(tmp_path / "jobs.db")
+
+    async def scenario():
+        client = FakeSearchClient()
+        client.block = ("咖啡", 2)
+        manager = JobManager(client, JobStore(db_file), workers=1)
+        await manager.start()
+        job = manager.submit("search", {"keywords": ["咖啡"], "max_pages": PAGES})
+        await client.blocked.wait()
+        # 服务在第 2 页请求中途停止，任务保持 running
+        await manager.close()
+
+        client = FakeSearchClient()
+        manager = JobManager(client, JobStore(db_file), workers=1)
+        await manager.start()
+        try:
+            done = await _wait_status(manager, job["id"], FINISHED_STATUSES)
+            return done, _result_ids(manager, job["id"]), client.calls
+        finally:
+            await manager.close()
+
+    job, ids, calls = _run(scenario)
+    assert job["status"] == DONE
+    # 第 1 页的结果在重启前已保存，重启后从第 2 页继续
+    assert calls == [("咖啡", 2), ("咖啡", 3)]
+    assert ids == ["咖啡-1", "咖啡-2", "咖啡-3"]
+
+
+def test_circuit_open_requeues_after_cooldown(tmp_path):
+    async def scenario():
+        client = FakeSearchClient(fail={("咖啡", 2): CircuitOpenError("account:a1", 0.0, "captcha")})
+        manager = JobManager(client, JobStore(str(tmp_path / "jobs.db")), workers=1)
+        await manager.start()
+        try:
+            job = manager.submit("search", {"keywords": ["咖啡"], "max_pages": PAGES})
+            while len(client.calls) < 2:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+            paused = manager.get(job["id"])
+            # 冷却至少 1 秒后自动重新排队
+            done = await _wait_status(manager, job["id"], FINISHED_STATUSES, timeout=3.0)
+            return paused, done, _result_ids(manager, job["id"]), client.calls
+        finally:
+            await manager.close()
+
+    paused, done, ids, calls = _run(scenario)
+    assert paused["status"] == PENDING
+    assert paused["error"].startswith("CIRCUIT_OPEN: account:a1")
+    assert done["status"] == DONE
+    assert done["error"] == ""
+    # 熔断的第 2 页从 checkpoint 重新请求，第 1 页不重复
+    assert calls == [("咖啡", 1), ("咖啡", 2), ("咖啡", 2), ("咖啡", 3)]
+    assert ids == ["咖啡-1", "咖啡-2", "咖啡-3"]
+
+
+def test_cancel_running_job(tmp_path):
+    db_file = str(tmp_path / "jobs.db")
+
+    async def scenario(error: Optional[Exception]):
+        client = FakeSearchClient(fail={("咖啡", 2): error} if error else None)
+        client.block = ("咖啡", 2)
+        manager = JobManager(client, JobStore(db_file), workers=1)
+        await manager.start()
+        job = manager.submit("search", {"keywords": ["咖啡"], "max_pages": PAGES})
+        await client.blocked.wait()
+        assert manager.get(job["id"])["status"] == RUNNING
+        await manager.cancel(job["id"])
+        client.release.set()
+        cancelled = await _wait_status(manager, job["id"], FINISHED_STATUSES)
+        assert manager._cancelled == set()
+        await manager.close()
+
+        # 重启后不会重新运行已取消的任务
+        client = FakeSearchClient()
+        manager = JobManager(client, JobStore(db_file), workers=1)
+        await manager.start()
+        await asyncio.sleep(0.05)
+        job = manager.get(job["id"])
+        await manager.close()
+        return cancelled, job, client.calls
+
+    for error in (None, CircuitOpenError("account:a1", 0.0, "captcha"), CookieExpiredError("expired"), RuntimeError("boom")):
+        cancelled, job, calls = _run(lambda: scenario(error))
+        assert cancelled["status"] == CANCELLED, error
+        assert cancelled["error"] == ""
+        assert job["status"] == CANCELLED
+        assert calls == []
@@ -0,0 +1,84 @@
+"""
+normalizer 输出与原 main.py 各接口格式化代码（tests/legacy_format.py）逐字段一致
+"""
+import json
+
+from legacy_format import (
+    format_batch_note,
+    format_comments,
+    format_note_cards,
+    format_note_detail,
+    format_user_profile,
+    render,
+    sample_comment,
+    sample_list_item,
+    sample_note_card,
+)
+from xhs.normalizer import (
+    NOTE_BATCH_FIELDS,
+    NOTE_URL_BATCH_FIELDS,
+    comments,
+    dumps,
+    note_cards,
+    note_detail,
+    user_profile,
+)
+
+
+def _shape(value):
+    """只保留键和键的顺序"""
+    if isinstance(value, dict):
+        return [(k, _shape(v)) for k, v in value.items()]
+    if isinstance(value, list):
+        return [_shape(v) for v in value]
+    return type(value).__name__
+
+
+def test_note_detail_matches_legacy():
+    for i in range(4):
+        card = sample_note_card(i)
+        assert note_detail(card, f"note-{i}") == format_note_detail(card, f"note-{i}")
+
+
+def test_batch_notes_match_legacy():
+    for i in range(4):
+        card, info = sample_note_card(i), {"note_id": f"note-{i}", "xsec_token": f"token-{i}"}
+        by_ids = note_detail(card, info["note_id"], info["xsec_token"], NOTE_BATCH_FIELDS)
+        from_urls = note_detail(card, info["note_id"], info["xsec_token"], NOTE_URL_BATCH_FIELDS)
+        assert by_ids == format_batch_note(card, info)
+        assert from_urls == format_batch_note(card, info, with_video=True)
+
+
+def test_note_cards_match_legacy():
+    items = [sample_list_item(i) for i in range(4)]
+    assert note_cards(items) == format_note_cards(items)
+    assert note_cards(items, "owner") == format_note_cards(items, "owner")
+
+
+def test_user_profile_matches_legacy():
+    data = {"user_id": "u1", "nickname": "n", "image": "https://img.local/u.jpg", "fans": 3, "follows": 2}
+    assert user_profile({"user": data}) == format_user_profile(data)
+    assert user_profile({}, "u2") == format_user_profile({}, "u2")
+
+
+def test_comments_match_legacy():
+    raw = [sample_comment(i) for i in range(3)]
+    raw[1]["sub_comments_error"] = "sub comments failed"
+    for with_sub_comments in (True, False):
+        assert comments(raw, with_sub_comments) == format_comments(raw, with_sub_comments)
+    # sub_comments_error 与原格式一样总是输出，没有错误时为空字符串
+    assert [c["sub_comments_error"] for c in comments(raw)] == ["", "sub comments failed", ""]
+
+
+def test_shapes_ignore_missing_fields():
+    # 原始数据缺字段时键和顺序也不变
+    assert _shape(note_detail({}, "n")) == _shape(format_note_detail({}, "n"))
+    assert _shape(note_detail({}, "n", "t", NOTE_URL_BATCH_FIELDS)) == _shape(
+        format_batch_note({}, {"note_id": "n", "xsec_token": "t"}, with_video=True)
+    )
+    assert _shape(comments([{}])) == _shape(format_comments([{}]))
+
+
+def test_dumps_matches_fastapi_rendering():
+    payload = {"notes": [note_detail(sample_note_card(i), f"note-{i}") for i in range(3)]}
+    assert json.loads(dumps(payload)) == json.loads(render(payload))
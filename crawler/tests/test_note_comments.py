@@ -0,0 +1,119 @@
+"""
+get_note_comments 的二级评论并发获取：保持顺序、单线程失败隔离、Cookie 失效时取消其余线程、
+与 get_sub_comments 合并相同请求
+"""
+import asyncio
+from typing import Dict, Optional
+
+import pytest
+
+from support import Reply, StandInServer, make_client
+from xhs.exception import CookieExpiredError
+
+PAGE_URI = "/api/sns/web/v2/comment/page"
+SUB_URI = "/api/sns/web/v2/comment/sub/page"
+THREADS = 10
+
+
+def _page(args) -> Dict:
+    comments = [
+        {"id": f"c{i}", "content": f"评论{i}", "sub_comment_count": 2 if i % 3 else 0, "sub_comments": []}
+        for i in range(THREADS)
+    ]
+    return {"comments": comments, "cursor": "", "has_more": False}
+
+
+def _sub_page(fail: Optional[Dict[str, Reply]] = None):
+    def route(args) -> Dict:
+        root = args["root_comment_id"]
+        if fail and root in fail:
+            return fail[root]
+        return {"comments": [{"id": f"{root}-{j}", "content": f"回复{j}"} for j in range(int(args["num"]))]}
+
+    return route
+
+
+def test_sub_comments_fetched_concurrently_in_order():
+    async def scenario(server: StandInServer):
+        client = make_client(server)
+        try:
+            return await client.get_note_comments("note", sub_comment_concurrency=4)
+        finally:
+            await client.close()
+
+    with StandInServer({PAGE_URI: _page, SUB_URI: _sub_page()}, delay=0.05) as server:
+        result = asyncio.run(scenario(server))
+
+    assert server.errors == []
+    assert [c["id"] for c in result["comments"]] == [f"c{i}" for i in range(THREADS)]
+    for i, comment in enumerate(result["comments"]):
+        expected = [f"c{i}-0", f"c{i}-1"] if i % 3 else []
+        assert [s["id"] for s in comment["sub_comments"]] == expected
+    threads = sum(1 for i in range(THREADS) if i % 3)
+    assert server.hits[SUB_URI] == threads
+    assert server.max_inflight > 1
+
+
+def test_failed_thread_is_isolated():
+    fail = {"c1": Reply(200, {"success": False, "code": -1, "msg": "thread unavailable"})}
+
+    async def scenario(server: StandInServer):
+        client = make_client(server)
+        try:
+            return await client.get_note_comments("note")
+        finally:
+            await client.close()
+
+    with StandInServer({PAGE_URI: _page, SUB_URI: _sub_page(fail)}) as server:
+        result = asyncio.run(scenario(server))
+
+    comments = {c["id"]: c for c in result["comments"]}
+    assert comments["c1"]["sub_comments"] == []
+    assert "thread unavailable" in comments["c1"]["sub_comments_error"]
+    assert [s["id"] for s in comments["c2"]["sub_comments"]] == ["c2-0", "c2-1"]
+    assert "sub_comments_error" not in comments["c2"]
+
+
+def test_cookie_expired_cancels_queued_threads():
+    fail = {"c1": Reply(461, {"success": False})}
+
+    async def scenario(server: StandInServer):
+        client = make_client(server)
+        try:
+            with pytest.raises(CookieExpiredError):
+                await client.get_note_comments("note", sub_comment_concurrency=1)
+        finally:
+            await client.close()
+
+    with StandInServer({PAGE_URI: _page, SUB_URI: _sub_page(fail)}) as server:
+        asyncio.run(scenario(server))
+
+    # c1 是第一个有二级评论的线程，失败后排队中的线程不再用失效的 Cookie 发出请求
+    assert server.hits[SUB_URI] == 1
+
+
+def test_sub_comments_share_single_flight_with_get_sub_comments():
+    async def scenario(server: StandInServer):
+        client = make_client(server)
+        try:
+            # 两次一级评论请求参数不同，各自发出；其中的二级评论请求参数相同，只发出一次
+            first, second = await asyncio.gather(
+                client.get_note_comments("note"),
+                client.get_note_comments("note", num=20),
+            )
+            sub = await client.get_sub_comments("note", "c1", num=2)
+            return first, second, sub, client.single_flight.get_stats()
+        finally:
+            await client.close()
+
+    with StandInServer({PAGE_URI: _page, SUB_URI: _sub_page()}, delay=0.05) as server:
+        first, second, sub, stats = asyncio.run(scenario(server))
+
+    threads = sum(1 for i in range(THREADS) if i % 3)
+    assert server.hits[PAGE_URI] == 2
+    assert first["comments"] == second["comments"]
+    assert stats["coalesced"] == threads
+    # 单独调用 get_sub_comments 时已经没有进行中的请求，重新发出
+    assert server.hits[SUB_URI] == threads + 1
+    assert [s["id"] for s in sub["comments"]] == ["c1-0", "c1-1"]
+    assert first["comments"][1]["sub_comments"] == sub["comments"]
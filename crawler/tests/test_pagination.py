@@ -0,0 +1,155 @@
+"""
+分页迭代：逐条产出、预取下一页、limit / stop_when 提前结束时取消预取，
+页码分页并发请求但按顺序产出
+"""
+import asyncio
+from typing import Dict, List
+
+import pytest
+
+from support import StandInServer, make_client
+from xhs.pagination import cursor_extractor, fetch_numbered_pages, page_number_extractor, paginate
+
+SEARCH_URI = "/api/sns/web/v1/search/notes"
+USER_NOTES_URI = "/api/sns/web/v1/user_posted"
+PAGE_SIZE = 3
+PAGES = 4
+
+
+class CursorFeed:
+    """PAGES 页、每页 PAGE_SIZE 条的游标分页接口，记录请求和取消"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requested: List[str] = []
+        self.cancelled: List[str] = []
+
+    async def fetch_page(self, cursor: str) -> Dict:
+        self.requested.append(cursor)
+        page = int(cursor or 0)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(cursor)
+            raise
+        items = [page * PAGE_SIZE + i for i in range(PAGE_SIZE)]
+        has_more = page + 1 < PAGES
+        return {"notes": items, "cursor": str(page + 1) if has_more else "", "has_more": has_more}
+
+
+async def _collect(iterator, work: float = 0.0) -> List:
+    items = []
+    async for item in iterator:
+        # 模拟调用方处理每条的耗时，期间预取的请求在后台进行
+        await asyncio.sleep(work)
+        items.append(item)
+    return items
+
+
+def test_paginate_walks_every_page_in_order():
+    feed = CursorFeed()
+    items = asyncio.run(_collect(paginate(feed.fetch_page, cursor_extractor("notes"), "")))
+
+    assert items == list(range(PAGES * PAGE_SIZE))
+    assert feed.requested == ["", "1", "2", "3"]
+
+
+def test_next_page_is_requested_before_the_current_page_is_consumed():
+    feed = CursorFeed()
+
+    async def scenario():
+        iterator = paginate(feed.fetch_page, cursor_extractor("notes"), "")
+        first = await iterator.__anext__()
+        await asyncio.sleep(0)
+        # 调用方处理第一条时第二页请求已经发出
+        requested = list(feed.requested)
+        await iterator.aclose()
+        return first, requested
+
+    first, requested = asyncio.run(scenario())
+    assert first == 0
+    assert requested == ["", "1"]
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_limit_stops_and_cancels_prefetch(prefetch):
+    feed = CursorFeed(delay=0.01)
+    limit = PAGE_SIZE + 1
+    items = asyncio.run(_collect(paginate(
+        feed.fetch_page, cursor_extractor("notes"), "", limit=limit, prefetch=prefetch,
+    ), work=0.001))
+
+    assert items == list(range(limit))
+    # 第二页已满足 limit，不再预取第三页
+    assert feed.requested == ["", "1"]
+    assert feed.cancelled == []
+
+
+def test_stop_when_cancels_pending_prefetch():
+    feed = CursorFeed(delay=0.01)
+    items = asyncio.run(_collect(paginate(
+        feed.fetch_page, cursor_extractor("notes"), "", stop_when=lambda item: item == 2,
+    ), work=0.001))
+
+    assert items == [0, 1]
+    assert feed.cancelled == ["1"]
+
+
+def test_numbered_pages_are_fetched_concurrently_and_yielded_in_order():
+    inflight = {"now": 0, "max": 0}
+    last_page = 3
+
+    async def fetch_page(page: int) -> Dict:
+        inflight["now"] += 1
+        inflight["max"] = max(inflight["max"], inflight["now"])
+        # 后面的页先返回
+        await asyncio.sleep(0.05 / page)
+        inflight["now"] -= 1
+        return {"items": [f"p{page}"], "has_more": page < last_page}
+
+    async def scenario():
+        return await _collect(fetch_numbered_pages(
+            fetch_page, page_number_extractor("items"), max_pages=10, max_concurrency=3,
+        ))
+
+    pages = asyncio.run(scenario())
+    assert pages == [(1, ["p1"], True), (2, ["p2"], True), (3, ["p3"], False)]
+    assert inflight["max"] == 3
+
+
+def test_client_iterators_page_through_the_api():
+    search_ids = set()
+
+    def search(args):
+        search_ids.add(args["search_id"])
+        page = args["page"]
+        return {"items": [{"id": f"s{page}-{i}"} for i in range(PAGE_SIZE)], "has_more": page < PAGES}
+
+    def user_notes(args):
+        page = int(args["cursor"] or 0)
+        has_more = page + 1 < PAGES
+        return {
+            "notes": [{"note_id": f"u{page}-{i}"} for i in range(PAGE_SIZE)],
+            "cursor": str(page + 1) if has_more else "",
+            "has_more": has_more,
+        }
+
+    async def scenario(server: StandInServer):
+        client = make_client(server)
+        try:
+            notes = await _collect(client.iter_notes_by_keyword("咖啡", page_size=PAGE_SIZE, limit=2 * PAGE_SIZE))
+            user = await _collect(client.iter_user_notes("user", num=PAGE_SIZE))
+            return notes, user
+        finally:
+            await client.close()
+
+    with StandInServer({SEARCH_URI: search, USER_NOTES_URI: user_notes}) as server:
+        notes, user = asyncio.run(scenario(server))
+
+    assert server.errors == []
+    assert [n["id"] for n in notes] == [f"s{p}-{i}" for p in (1, 2) for i in range(PAGE_SIZE)]
+    assert server.hits[SEARCH_URI] == 2
+    # 所有页共用同一个 search_id
+    assert len(search_ids) == 1
+    assert [n["note_id"] for n in user] == [f"u{p}-{i}" for p in range(PAGES) for i in range(PAGE_SIZE)]
+    assert server.hits[USER_NOTES_URI] == PAGES
@@ -0,0 +1,117 @@
+"""
+批量签名：多个请求共用一次 page.evaluate（用假页面代替 Playwright 页面），
+批量接口按 SIGN_BATCH_SIZE 分批签名
+"""
+import asyncio
+from typing import List, Optional
+
+from support import STUB_B1, StandInServer, decode_xhs_base64, fake_x3, make_client
+from xhs.client import SIGN_BATCH_SIZE
+from xhs.playwright_sign import build_sign_pairs, call_mnsv2_many, sign_many, sign_with_playwright
+from xhs.signer_state import PageSignerState
+
+FEED_URI = "/api/sns/web/v1/feed"
+
+
+class FakePage:
+    """按 _SIGN_MANY_JS 的约定返回结果，并记录每次 evaluate 的参数"""
+    main_frame = object()
+
+    def __init__(self, ready: bool = True):
+        self.ready = ready
+        self.evaluates: List[Optional[list]] = []
+
+    def on(self, event, handler):
+        pass
+
+    async def evaluate(self, script, arg=None):
+        self.evaluates.append(arg)
+        if arg is None:
+            return STUB_B1
+        if not self.ready:
+            return None
+        pairs, need_b1 = arg
+        return {"b1": STUB_B1 if need_b1 else None, "x3": [fake_x3(md5) for _, md5 in pairs]}
+
+    async def goto(self, *args, **kwargs):
+        raise RuntimeError("offline")
+
+
+REQUESTS = [
+    ("/api/sns/web/v1/feed", {"source_note_id": f"note-{i}"}, "POST") for i in range(5)
+] + [("/api/sns/web/v2/comment/page", {"note_id": "note-0", "cursor": ""}, "GET")]
+
+
+def test_sign_many_uses_one_evaluate():
+    page = FakePage()
+    signs = asyncio.run(sign_many(page, REQUESTS, a1="a1-test"))
+
+    assert len(page.evaluates) == 1
+    assert len(signs) == len(REQUESTS)
+    for signs_, (_, md5) in zip(signs, build_sign_pairs(REQUESTS)):
+        assert decode_xhs_base64(signs_["x-s"])["x3"] == fake_x3(md5)
+        common = decode_xhs_base64(signs_["x-s-common"])
+        assert (common["x5"], common["x7"], common["x8"]) == ("a1-test", signs_["x-s"], STUB_B1)
+    assert len({s["x-b3-traceid"] for s in signs}) == len(REQUESTS)
+
+
+def test_single_request_goes_through_the_batch_path():
+    page = FakePage()
+    signs = asyncio.run(sign_with_playwright(page, *REQUESTS[0][:2], a1="a1-test"))
+
+    # 原来是 mnsv2 探测、签名、读取 b1 三次往返
+    assert len(page.evaluates) == 1
+    assert decode_xhs_base64(signs["x-s"])["x3"] == fake_x3(build_sign_pairs(REQUESTS[:1])[0][1])
+
+
+def test_cached_b1_is_not_read_again():
+    page = FakePage()
+    state = PageSignerState(page)
+
+    async def scenario():
+        first = await call_mnsv2_many(page, build_sign_pairs(REQUESTS[:2]), state=state)
+        second = await call_mnsv2_many(page, build_sign_pairs(REQUESTS[2:]), state=state)
+        return first, second
+
+    (b1_first, _), (b1_second, x3_second) = asyncio.run(scenario())
+    assert [need_b1 for _, need_b1 in page.evaluates] == [True, False]
+    assert b1_first == b1_second == STUB_B1
+    assert len(x3_second) == len(REQUESTS) - 2
+
+
+def test_missing_mnsv2_invalidates_state_without_reloading():
+    page = FakePage(ready=False)
+    state = PageSignerState(page)
+    state.ready, state.b1 = True, STUB_B1
+
+    b1, x3_values = asyncio.run(call_mnsv2_many(page, build_sign_pairs(REQUESTS), state=state))
+
+    # 请求路径上不重新加载页面，由后台恢复
+    assert len(page.evaluates) == 1
+    assert x3_values == [""] * len(REQUESTS)
+    assert not state.ready
+    assert state.last_invalidated_reason == "window.mnsv2 not found"
+
+
+def test_notes_by_ids_sign_in_batches():
+    notes = 2 * SIGN_BATCH_SIZE + 5
+
+    def feed(args):
+        note_id = args["source_note_id"]
+        return {"items": [{"id": note_id, "note_card": {"note_id": note_id, "title": note_id}}]}
+
+    async def scenario(server: StandInServer):
+        client = make_client(server)
+        try:
+            infos = [{"note_id": f"note-{i}", "xsec_token": "token"} for i in range(notes)]
+            return await client.get_notes_by_ids(infos), client.signer.calls
+        finally:
+            await client.close()
+
+    with StandInServer({FEED_URI: feed}) as server:
+        results, sign_calls = asyncio.run(scenario(server))
+
+    assert server.errors == []
+    assert [r["note_id"] for r in results] == [f"note-{i}" for i in range(notes)]
+    assert server.hits[FEED_URI] == notes
+    assert sign_calls == 3
@@ -0,0 +1,128 @@
+"""
+ProxyPool 测试：加权选择、EWMA、冷却与探测恢复
+
+探测用本地替身服务充当 HTTP 代理（对任意请求返回 200），死代理是没有监听的本地端口。
+"""
+import asyncio
+import random
+import socket
+import time
+from collections import Counter
+
+import pytest
+
+from support import StandInServer
+from xhs.proxy_pool import ProxyPool
+
+PROBE_URL = "http://probe.local/"
+
+
+def _dead_proxy() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def _pick_counts(pool: ProxyPool, picks: int) -> Counter:
+    return Counter(pool.get_proxy()["http://"] for _ in range(picks))
+
+
+def test_selection_follows_success_rate_over_latency():
+    random.seed(1)
+    proxies = ["http://p1:1", "http://p2:2", "http://p3:3"]
+    pool = ProxyPool(proxies, probe_interval=0)
+    # 权重 = 成功率 / 延迟：1/0.6、1/0.2、1/0.1，即 1 : 3 : 6
+    for proxy, latency in zip(proxies, (0.6, 0.2, 0.1)):
+        pool.mark_success(proxy, latency)
+
+    counts = _pick_counts(pool, 20000)
+    for proxy, expected in zip(proxies, (0.1, 0.3, 0.6)):
+        assert counts[proxy] / 20000 == pytest.approx(expected, abs=0.02)
+
+
+def test_ewma_moves_toward_recent_results():
+    pool = ProxyPool(["http://p1:1"], alpha=0.5, base_cooldown=0.01, probe_interval=0)
+    stats = pool._stats["http://p1:1"]
+
+    pool.mark_success("http://p1:1", 1.0)
+    assert stats.latency == 1.0
+    pool.mark_success("http://p1:1", 0.2)
+    pool.mark_success("http://p1:1", 0.2)
+    assert stats.latency == pytest.approx(0.4)
+
+    pool.mark_failed("http://p1:1")
+    pool.mark_failed("http://p1:1")
+    assert stats.success_rate == pytest.approx(0.25)
+    # 恢复成功后成功率逐步回升，连续失败次数清零
+    pool.mark_success("http://p1:1", 0.2)
+    assert stats.success_rate == pytest.approx(0.625)
+    assert stats.consecutive_failures == 0
+    assert stats.cooldown_until == 0.0
+
+
+def test_failed_proxy_cools_down_and_comes_back():
+    pool = ProxyPool(["http://p1:1", "http://p2:2"], base_cooldown=0.05, probe_interval=0)
+    pool.mark_failed("http://p1:1")
+    assert set(_pick_counts(pool, 200)) == {"http://p2:2"}
+    assert pool.get_stats()["failed"] == 1
+
+    time.sleep(0.06)
+    assert "http://p1:1" in _pick_counts(pool, 500)
+    assert pool.get_stats()["failed"] == 0
+
+
+def test_all_cooling_picks_the_first_to_recover():
+    pool = ProxyPool(["http://p1:1", "http://p2:2"], base_cooldown=10, probe_interval=0)
+    pool.mark_failed("http://p1:1")
+    pool.mark_failed("http://p1:1")
+    pool.mark_failed("http://p2:2")
+    assert pool.get_proxy()["http://"] == "http://p2:2"
+
+
+def test_cooldown_backoff_is_capped():
+    pool = ProxyPool(["http://p1:1"], base_cooldown=10.0, max_cooldown=600.0, probe_interval=0)
+    # 死代理被反复探测，连续失败次数远超翻倍次数时冷却时间不再增长，也不会溢出
+    for _ in range(5000):
+        pool.mark_failed("http://p1:1")
+    cooldown = pool._stats["http://p1:1"].cooldown_until - time.monotonic()
+    assert 599 < cooldown <= 600
+
+
+def test_probe_ends_cooldown_of_live_proxy():
+    async def scenario(live: str, dead: str):
+        pool = ProxyPool([live, dead], base_cooldown=60, probe_url=PROBE_URL, probe_timeout=2)
+        pool.mark_failed(live)
+        pool.mark_failed(dead)
+        results = await pool.probe_all()
+        return pool, results
+
+    with StandInServer({"/": lambda args: {}}, verify=False) as server:
+        dead = _dead_proxy()
+        pool, results = asyncio.run(scenario(server.url, dead))
+
+    assert results == {server.url: True, dead: False}
+    assert server.hits["/"] == 1
+    live_stats, dead_stats = pool._stats[server.url], pool._stats[dead]
+    assert live_stats.cooldown_until == 0.0
+    assert live_stats.latency is not None
+    assert dead_stats.consecutive_failures == 2
+    assert dead_stats.cooldown_until > time.monotonic() + 60
+    assert set(_pick_counts(pool, 100)) == {server.url}
+    assert pool.get_stats()["probes"] == 2
+
+
+def test_background_probe_loop_runs_until_closed():
+    async def scenario(live: str):
+        pool = ProxyPool([live], probe_url=PROBE_URL, probe_interval=0.02, probe_timeout=2)
+        await pool.start()
+        await asyncio.sleep(0.2)
+        await pool.close()
+        probes = pool.probes
+        await asyncio.sleep(0.05)
+        return probes, pool.probes
+
+    with StandInServer({"/": lambda args: {}}, verify=False) as server:
+        probes, probes_after_close = asyncio.run(scenario(server.url))
+    assert probes >= 2
+    assert probes_after_close == probes
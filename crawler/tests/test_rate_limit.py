@@ -0,0 +1,126 @@
+"""
+RateLimiter 测试：令牌桶突发与回填、AIMD 减速与恢复（含 300012 / 471 响应）、统计按完整键区分
+"""
+import asyncio
+
+import pytest
+
+from support import Reply, StandInServer, make_client
+from xhs.exception import CaptchaRequiredError, IPBlockedError
+from xhs.rate_limit import RateLimiter, TokenBucket
+
+SEARCH_URI = "/api/sns/web/v1/search/notes"
+
+
+def test_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(rate=10, capacity=3)
+    now = bucket.updated = 0.0
+    assert [bucket.reserve(now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # 令牌可以预支，排在后面的等待更久
+    assert bucket.reserve(now) == pytest.approx(0.1)
+    assert bucket.reserve(now) == pytest.approx(0.2)
+
+
+def test_bucket_refills_up_to_capacity():
+    bucket = TokenBucket(rate=10, capacity=3)
+    now = bucket.updated = 0.0
+    for _ in range(3):
+        bucket.reserve(now)
+    # 0.2 秒回填 2 个令牌
+    assert bucket.reserve(now + 0.2) == 0.0
+    assert bucket.reserve(now + 0.2) == 0.0
+    assert bucket.reserve(now + 0.2) == pytest.approx(0.1)
+    # 空闲再久也只攒到 capacity
+    later = now + 100
+    assert [bucket.reserve(later) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve(later) > 0
+
+
+def test_acquire_waits_for_the_slowest_bucket():
+    limiter = RateLimiter({"search": (20, 1)})
+    keys = limiter.keys(SEARCH_URI, "a1", None)
+
+    async def scenario():
+        first = await limiter.acquire(keys)
+        second = await limiter.acquire(keys)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == 0.0
+    assert second == pytest.approx(0.05, abs=0.01)
+    assert limiter.throttled == 1
+
+
+def test_block_halves_rate_once_per_interval_and_success_recovers():
+    limiter = RateLimiter({"search": (2, 4)}, min_rate=0.3, increase=0.25, decrease=0.5, decrease_interval=60)
+    keys = limiter.keys(SEARCH_URI, "a1", None)
+    search = limiter._bucket("endpoint", "search")
+
+    limiter.on_block(keys)
+    assert search.rate == 1.0
+    # 并发请求陆续返回的失败在 decrease_interval 内不再减速
+    limiter.on_block(keys)
+    assert search.rate == 1.0
+    assert limiter.decreases == 3
+
+    for bucket in limiter._buckets.values():
+        bucket.last_decrease -= 60
+    limiter.on_block(keys)
+    for bucket in limiter._buckets.values():
+        bucket.last_decrease -= 60
+    limiter.on_block(keys)
+    # 不低于下限
+    assert search.rate == 0.3
+
+    for _ in range(3):
+        limiter.on_success(keys)
+    assert search.rate == pytest.approx(1.05)
+    for _ in range(10):
+        limiter.on_success(keys)
+    # 不超过配置的速率
+    assert search.rate == 2
+
+
+@pytest.mark.parametrize("reply, error", [
+    (Reply(200, {"success": False, "code": 300012, "msg": "ip blocked"}), IPBlockedError),
+    (Reply(471, {"success": False}), CaptchaRequiredError),
+])
+def test_blocked_responses_slow_down_request_buckets(reply, error):
+    async def scenario(server: StandInServer):
+        limiter = RateLimiter()
+        client = make_client(server, rate_limiter=limiter)
+        try:
+            with pytest.raises(error):
+                await client.post(SEARCH_URI, {"keyword": "咖啡"})
+        finally:
+            await client.close()
+        return limiter
+
+    with StandInServer({SEARCH_URI: lambda args: reply}) as server:
+        limiter = asyncio.run(scenario(server))
+
+    stats = limiter.get_stats()
+    names = {b["name"]: b for b in stats["buckets"].values()}
+    assert set(names) == {"search", "account:a1-test", "proxy:direct"}
+    for bucket in names.values():
+        assert bucket["rate"] == bucket["max_rate"] / 2
+    assert stats["decreases"] == 3
+
+
+def test_stats_keep_buckets_with_the_same_label_apart():
+    limiter = RateLimiter()
+    first = limiter.keys(SEARCH_URI, "a1sameXX-first", "http://alice:pw@proxy.local:8080")
+    second = limiter.keys(SEARCH_URI, "a1sameXX-second", "http://bob:pw@proxy.local:8080")
+    limiter.on_block(first)
+    asyncio.run(limiter.acquire(second))
+
+    stats = limiter.get_stats()
+    buckets = stats["buckets"]
+    accounts = [b for b in buckets.values() if b["name"] == "account:a1sameXX"]
+    proxies = [b for b in buckets.values() if b["name"] == "proxy:proxy.local:8080"]
+    assert sorted(b["rate"] for b in accounts) == [5.0, 10.0]
+    assert sorted(b["rate"] for b in proxies) == [5.0, 10.0]
+    assert "search" in {b["name"] for b in buckets.values()}
+    # ID 不包含 a1 和代理密码
+    assert "a1sameXX" not in "".join(buckets)
+    assert "alice" not in str(stats) and "bob" not in str(stats)
@@ -0,0 +1,49 @@
+"""
+并发请求的请求头隔离：几百个同时签名的请求发到本地替身服务，
+每个请求的签名都必须由它自己的 payload 计算，Cookie 与签名使用同一份快照
+"""
+import asyncio
+
+from support import FakeSigner, StandInServer, make_client
+
+GET_URI = "/api/stress/get"
+POST_URI = "/api/stress/post"
+CALLS = 400
+
+
+def _echo(args):
+    return {"echo": args}
+
+
+def test_concurrent_signed_requests_do_not_share_headers():
+    async def scenario(server: StandInServer):
+        client = make_client(server, signer=FakeSigner(delay=0.001))
+
+        async def call(i: int):
+            if i == CALLS // 2:
+                # 中途替换 Cookie：已创建的请求继续使用旧快照，Cookie 头和签名中的 a1 必须一致
+                client.set_cookies({"a1": "a1-rotated", "web_session": "session-rotated"})
+            if i % 2:
+                params = {"id": str(i), "keyword": f"关键词 {i}", "page": str(i % 7)}
+                result = await client.get(GET_URI, params)
+                assert result["echo"] == params
+            else:
+                payload = {"id": i, "keyword": f"词{i}", "filters": [{"type": "sort", "tags": [str(i)]}]}
+                result = await client.post(POST_URI, payload)
+                assert result["echo"] == payload
+
+        try:
+            await asyncio.gather(*[call(i) for i in range(CALLS)])
+        finally:
+            await client.close()
+        return client
+
+    with StandInServer({GET_URI: _echo, POST_URI: _echo}, delay=0.01) as server:
+        client = asyncio.run(scenario(server))
+
+    assert server.errors == []
+    assert server.hits[GET_URI] + server.hits[POST_URI] == CALLS
+    assert len(server.trace_ids) == CALLS
+    assert server.max_inflight > 1
+    # 基础请求头保持只读，不会留下某个请求的签名或 Cookie
+    assert not {"X-S", "X-T", "x-S-Common", "X-B3-Traceid", "Cookie"} & set(client.headers)
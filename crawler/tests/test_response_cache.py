@@ -0,0 +1,106 @@
+"""
+ResponseCache 测试：TTL 过期、LRU 淘汰、空结果不缓存、SQLite 重启后仍然有效，
+以及笔记缓存与 xsec_token 无关
+"""
+import asyncio
+import sqlite3
+import time
+
+from support import StandInServer, make_client
+from xhs.response_cache import ResponseCache
+
+FEED_URI = "/api/sns/web/v1/feed"
+
+
+def test_entries_expire_after_ttl():
+    cache = ResponseCache(ttls={"note": 0.05})
+    cache.set("note", "n1", {"title": "咖啡"})
+    cache.set("user", "u1", {"nickname": "作者"})
+    assert cache.get("note", "n1") == {"title": "咖啡"}
+
+    time.sleep(0.06)
+    assert cache.get("note", "n1") is None
+    # 各类接口的 TTL 独立（user 默认 1800 秒）
+    assert cache.get("user", "u1") == {"nickname": "作者"}
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["expired"], stats["entries"]) == (2, 1, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.set("note", "n1", {"id": 1})
+    cache.set("note", "n2", {"id": 2})
+    # 读取 n1 后 n2 成为最久未使用的
+    cache.get("note", "n1")
+    cache.set("note", "n3", {"id": 3})
+
+    assert cache.get("note", "n2") is None
+    assert cache.get("note", "n1") == {"id": 1}
+    assert cache.get("note", "n3") == {"id": 3}
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_empty_values_are_not_cached():
+    cache = ResponseCache()
+    cache.set("note", "missing", {})
+    cache.set("note", "none", None)
+    assert cache.get("note", "missing") is None
+    assert cache.get("note", "none") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_disk_cache_survives_restart(tmp_path):
+    db_file = str(tmp_path / "cache.db")
+    cache = ResponseCache(db_file=db_file, ttls={"note": 60, "user": 0.05})
+    cache.set("note", "n1", {"title": "咖啡", "tags": ["拿铁"]})
+    cache.set("user", "u1", {"nickname": "作者"})
+    cache.close()
+    time.sleep(0.06)
+
+    cache = ResponseCache(db_file=db_file)
+    try:
+        assert cache.get("note", "n1") == {"title": "咖啡", "tags": ["拿铁"]}
+        assert cache.get("user", "u1") is None
+        stats = cache.get_stats()
+        assert (stats["disk_hits"], stats["entries"]) == (1, 1)
+        # 再次读取命中内存
+        cache.get("note", "n1")
+        assert cache.get_stats()["disk_hits"] == 1
+    finally:
+        cache.close()
+
+    # 启动时清理磁盘上已过期的条目
+    with sqlite3.connect(db_file) as conn:
+        assert conn.execute("SELECT endpoint, key FROM response_cache").fetchall() == [("note", "n1")]
+
+
+def test_invalidate_removes_memory_and_disk_entries(tmp_path):
+    cache = ResponseCache(db_file=str(tmp_path / "cache.db"))
+    try:
+        cache.set("note", "n1", {"title": "咖啡"})
+        cache.invalidate("note", "n1")
+        assert cache.get("note", "n1") is None
+    finally:
+        cache.close()
+
+
+def test_cached_note_is_served_for_any_xsec_token():
+    def feed(args):
+        note_id = args["source_note_id"]
+        return {"items": [{"id": note_id, "note_card": {"note_id": note_id, "title": "咖啡"}}]}
+
+    async def scenario(server: StandInServer):
+        client = make_client(server)
+        try:
+            first = await client.get_note_by_id("n1", xsec_token="token-a")
+            second = await client.get_note_by_id("n1", xsec_token="token-b")
+            refreshed = await client.get_note_by_id("n1", xsec_token="token-b", refresh=True)
+            return first, second, refreshed
+        finally:
+            await client.close()
+
+    with StandInServer({FEED_URI: feed}) as server:
+        first, second, refreshed = asyncio.run(scenario(server))
+
+    assert first == second == refreshed == {"note_id": "n1", "title": "咖啡"}
+    assert server.hits[FEED_URI] == 2
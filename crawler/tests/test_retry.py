@@ -0,0 +1,138 @@
+"""
+RetryPolicy 测试：响应 / 异常到失败类型的分类、各类型是否重试和换代理、退避上下限、重试次数上限
+"""
+import asyncio
+import random
+import socket
+
+import httpx
+import pytest
+
+from support import Reply, StandInServer, make_client
+from xhs.exception import (
+    CaptchaRequiredError,
+    CookieExpiredError,
+    DataFetchError,
+    IPBlockedError,
+    ServerError,
+)
+from xhs.retry import CAPTCHA, COOKIE_EXPIRED, FATAL, IP_BLOCKED, SERVER, TRANSPORT, RetryPolicy, classify
+
+URI = "/api/sns/web/v1/feed"
+
+
+def _dead_address() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+@pytest.mark.parametrize("reply, kind", [
+    (Reply(503, {"success": False}), SERVER),
+    (Reply(500, {"success": False}), SERVER),
+    (Reply(200, {"success": False, "code": 300012, "msg": "ip blocked"}), IP_BLOCKED),
+    (Reply(461, {"success": False}), COOKIE_EXPIRED),
+    (Reply(471, {"success": False}), CAPTCHA),
+    (Reply(404, {"success": False}), FATAL),
+    (Reply(200, {"success": False, "code": -1, "msg": "note not found"}), FATAL),
+])
+def test_responses_are_classified(reply, kind):
+    async def scenario(server: StandInServer):
+        client = make_client(server)
+        try:
+            with pytest.raises(Exception) as exc_info:
+                await client.request("POST", f"{server.url}{URI}", data="{}", headers={})
+            return exc_info.value
+        finally:
+            await client.close()
+
+    with StandInServer({URI: lambda args: reply}, verify=False) as server:
+        error = asyncio.run(scenario(server))
+    assert classify(error) == kind
+
+
+@pytest.mark.parametrize("error, kind", [
+    (httpx.ConnectError("refused"), TRANSPORT),
+    (httpx.ReadTimeout("timeout"), TRANSPORT),
+    (ServerError(502, "bad gateway"), SERVER),
+    (IPBlockedError("IP blocked"), IP_BLOCKED),
+    (CookieExpiredError("expired"), COOKIE_EXPIRED),
+    (CaptchaRequiredError("captcha", "uuid"), CAPTCHA),
+    (DataFetchError("bad json"), FATAL),
+    (ValueError("bug"), FATAL),
+])
+def test_exceptions_are_classified(error, kind):
+    assert classify(error) == kind
+
+
+@pytest.mark.parametrize("kind, has_proxy, retry, rotate", [
+    (TRANSPORT, False, True, True),
+    (SERVER, False, True, False),
+    (IP_BLOCKED, False, False, True),
+    (IP_BLOCKED, True, True, True),
+    (COOKIE_EXPIRED, True, False, False),
+    (CAPTCHA, True, False, False),
+    (FATAL, True, False, False),
+])
+def test_retry_and_rotate_decisions(kind, has_proxy, retry, rotate):
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(kind, 1, has_proxy) is retry
+    assert policy.should_rotate(kind) is rotate
+    # 达到 max_attempts 后不再重试
+    assert policy.should_retry(kind, 3, has_proxy) is False
+
+
+def test_backoff_bounds():
+    random.seed(2)
+    policy = RetryPolicy(base_delay=0.5, max_delay=3.0)
+    for attempt, upper in [(1, 0.5), (2, 1.0), (3, 2.0), (4, 3.0), (10, 3.0)]:
+        delays = [policy.backoff(attempt) for _ in range(500)]
+        assert all(0 <= d <= upper for d in delays)
+        # 带抖动：分布在整个区间内
+        assert max(delays) > upper * 0.9
+        assert min(delays) < upper * 0.1
+
+
+@pytest.mark.parametrize("reply, error, kind, hits", [
+    (Reply(503, {"success": False}), ServerError, SERVER, 3),
+    # 没有代理池时同一 IP 重试只会加重封禁
+    (Reply(200, {"success": False, "code": 300012}), IPBlockedError, IP_BLOCKED, 1),
+    (Reply(461, {"success": False}), CookieExpiredError, COOKIE_EXPIRED, 1),
+])
+def test_client_retries_up_to_max_attempts(reply, error, kind, hits):
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+
+    async def scenario(server: StandInServer):
+        client = make_client(server, retry_policy=policy)
+        try:
+            with pytest.raises(error):
+                await client.post(URI, {"source_note_id": "note"})
+        finally:
+            await client.close()
+
+    with StandInServer({URI: lambda args: reply}) as server:
+        asyncio.run(scenario(server))
+
+    assert server.hits[URI] == hits
+    # 每次重试重新签名（不会出现重复的 trace id 或过期的签名）
+    assert server.errors == []
+    assert policy.get_stats()["retries"] == ({kind: hits - 1} if hits > 1 else {})
+    assert policy.get_stats()["give_ups"] == {kind: 1}
+
+
+def test_transport_errors_are_retried():
+    policy = RetryPolicy(max_attempts=2, base_delay=0.001)
+
+    async def scenario(server: StandInServer):
+        client = make_client(server, retry_policy=policy)
+        client._host = _dead_address()
+        try:
+            with pytest.raises(httpx.TransportError):
+                await client.post(URI, {"source_note_id": "note"})
+        finally:
+            await client.close()
+
+    with StandInServer({}) as server:
+        asyncio.run(scenario(server))
+    assert policy.get_stats() == {"max_attempts": 2, "retries": {TRANSPORT: 1}, "give_ups": {TRANSPORT: 1}}
@@ -0,0 +1,121 @@
+"""
+搜索会话：所有页共用一个 search_id、已获取的页直接返回、深度搜索按笔记ID去重、失败的页不缓存
+"""
+import asyncio
+from typing import Dict, List, Optional, Set
+
+import pytest
+
+from support import Reply, StandInServer, make_client
+from xhs.exception import DataFetchError
+
+SEARCH_URI = "/api/sns/web/v1/search/notes"
+PAGES = 3
+
+
+class SearchRoute:
+    """每页 ["p{page}-0", "p{page}-1"]，另外带上 extra[page] 中的条目；fail 中的页第一次请求失败"""
+
+    def __init__(self, extra: Optional[Dict[int, List[Dict]]] = None, fail: Optional[Set[int]] = None):
+        self.extra = extra or {}
+        self.fail = set(fail or ())
+        self.search_ids: List[str] = []
+        self.pages: List[int] = []
+
+    def __call__(self, args) -> Dict:
+        page = args["page"]
+        self.search_ids.append(args["search_id"])
+        self.pages.append(page)
+        if page in self.fail:
+            self.fail.discard(page)
+            return Reply(200, {"success": False, "code": -1, "msg": "search busy"})
+        items = [{"id": f"p{page}-{i}"} for i in range(2)] + self.extra.get(page, [])
+        return {"items": items, "has_more": page < PAGES}
+
+
+def _note_id(item: Dict) -> str:
+    return item.get("id") or item["note_card"]["note_id"]
+
+
+async def _deep_search(client, keyword: str = "咖啡", **kwargs) -> List:
+    return [
+        (page, [_note_id(item) for item in items])
+        async for page, items, _ in client.iter_search_pages(keyword, pages=PAGES, **kwargs)
+    ]
+
+
+def test_pages_share_one_session_and_are_cached():
+    route = SearchRoute()
+
+    async def scenario(server: StandInServer):
+        client = make_client(server)
+        try:
+            first = await _deep_search(client)
+            second = await _deep_search(client)
+            session = client.search_session("咖啡")
+            # 调用方带上 token 继续同一次搜索；refresh 重新开始
+            same = client.search_session("咖啡", token=session.token)
+            fresh = client.search_session("咖啡", refresh=True)
+            _, cached = await client.search_page(fresh, 1)
+            return first, second, session, same, fresh, cached, client.search_sessions.get_stats()
+        finally:
+            await client.close()
+
+    with StandInServer({SEARCH_URI: route}) as server:
+        first, second, session, same, fresh, cached, stats = asyncio.run(scenario(server))
+
+    assert server.errors == []
+    assert first == second == [(p, [f"p{p}-0", f"p{p}-1"]) for p in range(1, PAGES + 1)]
+    # 第二次深度搜索全部命中会话缓存
+    assert sorted(route.pages) == [1, 1, 2, 3]
+    assert set(route.search_ids[:PAGES]) == {session.search_id}
+    assert same is session
+    assert fresh is not session
+    assert route.search_ids[-1] == fresh.search_id != session.search_id
+    assert cached is False
+    assert (stats["page_hits"], stats["page_misses"]) == (PAGES, PAGES + 1)
+
+
+def test_deep_search_dedupes_by_note_id():
+    route = SearchRoute(extra={
+        2: [{"id": "p1-0"}, {"model_type": "hot_query"}],
+        3: [{"note_card": {"note_id": "p2-1"}}, {"note_card": {"note_id": "n-extra"}}],
+    })
+
+    async def scenario(server: StandInServer):
+        client = make_client(server)
+        try:
+            return await _deep_search(client)
+        finally:
+            await client.close()
+
+    with StandInServer({SEARCH_URI: route}) as server:
+        pages = asyncio.run(scenario(server))
+
+    # 已在前面页出现过的笔记和没有ID的条目不产出
+    assert pages == [
+        (1, ["p1-0", "p1-1"]),
+        (2, ["p2-0", "p2-1"]),
+        (3, ["p3-0", "p3-1", "n-extra"]),
+    ]
+
+
+def test_failed_page_is_not_cached():
+    route = SearchRoute(fail={2})
+
+    async def scenario(server: StandInServer):
+        client = make_client(server)
+        try:
+            with pytest.raises(DataFetchError, match="search busy"):
+                await _deep_search(client, max_concurrency=1)
+            return await _deep_search(client, max_concurrency=1)
+        finally:
+            await client.close()
+
+    with StandInServer({SEARCH_URI: route}) as server:
+        pages = asyncio.run(scenario(server))
+
+    assert [page for page, _ in pages] == [1, 2, 3]
+    # 第 1 页来自缓存，失败的第 2 页重新请求
+    assert route.pages == [1, 2, 2, 3]
+    assert len(set(route.search_ids)) == 1
@@ -0,0 +1,82 @@
+"""
+SignPagePool 租用超时测试（用假页面代替 Playwright 页面）
+"""
+import asyncio
+
+import pytest
+
+from xhs.exception import SignPoolTimeoutError
+from xhs.sign_pool import SignPagePool
+
+
+class FakePage:
+    main_frame = object()
+
+    def __init__(self, ready: bool = True):
+        self.ready = ready
+
+    def on(self, event, handler):
+        pass
+
+    async def evaluate(self, script):
+        return {"ready": self.ready, "b1": "b1"}
+
+    async def goto(self, *args, **kwargs):
+        raise RuntimeError("offline")
+
+
+async def _started_pool(ready: bool = True, **kwargs) -> SignPagePool:
+    pool = SignPagePool(browser_context=None, size=1, **kwargs)
+    await pool.start(pages=[FakePage(ready)])
+    return pool
+
+
+def test_lease_times_out_when_all_pages_busy():
+    async def scenario():
+        pool = await _started_pool(lease_timeout=0.05)
+        try:
+            async with pool.lease():
+                with pytest.raises(SignPoolTimeoutError):
+                    async with pool.lease():
+                        pass
+            # 超时的等待者没有占走名额，归还后可以继续租用
+            async with pool.lease() as state:
+                assert state.ready
+            stats = pool.get_stats()
+            assert stats["lease_timeouts"] == 1
+            assert stats["queue_depth"] == 0
+            assert stats["idle_slots"] == 1
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_lease_times_out_when_no_page_ready():
+    async def scenario():
+        pool = await _started_pool(ready=False, lease_timeout=0.05, watchdog_interval=0.01)
+        try:
+            with pytest.raises(SignPoolTimeoutError):
+                async with pool.lease():
+                    pass
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_waiters_are_served_within_timeout():
+    async def scenario():
+        pool = await _started_pool(lease_timeout=1.0)
+
+        async def sign():
+            async with pool.lease():
+                await asyncio.sleep(0.01)
+
+        try:
+            await asyncio.gather(*[sign() for _ in range(10)])
+            assert pool.get_stats()["total_leases"] == 10
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,120 @@
+"""
+NodeSigner 测试：用 tests/fixtures/sign_stub.js 代替从页面提取的签名脚本
+"""
+import asyncio
+import shutil
+from pathlib import Path
+
+import pytest
+
+from support import FakeSigner
+from xhs.signer import FallbackSigner, NodeSigner
+
+STUB_SCRIPT = str(Path(__file__).parent / "fixtures" / "sign_stub.js")
+
+requires_node = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+
+@requires_node
+def test_node_signer_signs_with_stub_script():
+    async def scenario():
+        signer = NodeSigner(STUB_SCRIPT, local_storage={"b1": "stub-b1"})
+        await signer.start()
+        try:
+            pairs = [(f"/api/{i}", f"{i:032x}") for i in range(50)]
+            results = await asyncio.gather(*[signer.call_mnsv2_many(pairs[i:i + 5]) for i in range(0, 50, 5)])
+        finally:
+            await signer.close()
+        # 脚本里的 console.log 写到 stderr，不影响按行解析的响应
+        for i, (b1, x3_values) in enumerate(results):
+            assert b1 == "stub-b1"
+            assert x3_values == [f"mns0101_{md5}" for _, md5 in pairs[i * 5:i * 5 + 5]]
+        assert signer.get_stats()["signatures"] == 50
+        assert signer.get_stats()["bad_lines"] == 0
+
+    asyncio.run(scenario())
+
+
+@requires_node
+def test_node_signer_rereads_b1_after_invalidate():
+    reads = []
+
+    async def b1_source() -> str:
+        reads.append(1)
+        return "new-b1"
+
+    async def scenario():
+        node = NodeSigner(STUB_SCRIPT, local_storage={"b1": "old-b1"}, b1_source=b1_source)
+        # 与 main.py 一样包在 FallbackSigner 中，set_cookies 调用的是外层的 invalidate_b1
+        signer = FallbackSigner(node, FakeSigner())
+        await signer.start()
+        try:
+            pairs = [("/api/1", "0" * 32)]
+            before, _ = await signer.call_mnsv2_many(pairs)
+            signer.invalidate_b1()
+            after = [(await signer.call_mnsv2_many(pairs))[0] for _ in range(3)]
+        finally:
+            await signer.close()
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    assert before == "old-b1"
+    assert after == ["new-b1"] * 3
+    # 只在失效后的第一次签名时读取
+    assert len(reads) == 1
+
+
+@requires_node
+def test_node_signer_rejects_script_without_mnsv2(tmp_path):
+    script = tmp_path / "empty.js"
+    script.write_text("console.log('no mnsv2 here');\n")
+
+    async def scenario():
+        signer = NodeSigner(str(script))
+        with pytest.raises(RuntimeError, match="not ready"):
+            await signer.start()
+
+    asyncio.run(scenario())
+
+
+class _FakeProcess:
+    def __init__(self, stdout: asyncio.StreamReader):
+        self.stdout = stdout
+        self.returncode = None
+        self.pid = 0
+
+
+def test_read_loop_skips_non_protocol_lines():
+    async def scenario():
+        signer = NodeSigner(STUB_SCRIPT)
+        stdout = asyncio.StreamReader()
+        signer._process = _FakeProcess(stdout)
+        future = asyncio.get_running_loop().create_future()
+        signer._pending[1] = future
+
+        stdout.feed_data(b"debug output from the script\n")
+        stdout.feed_data(b"[1, 2, 3]\n")
+        stdout.feed_data(b'{"id": 1, "b1": "b1", "x3": ["x3"]}\n')
+        stdout.feed_eof()
+        await signer._read_loop()
+
+        assert future.result() == {"id": 1, "b1": "b1", "x3": ["x3"]}
+        assert signer.get_stats()["bad_lines"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_read_loop_fails_pending_calls_when_worker_exits():
+    async def scenario():
+        signer = NodeSigner(STUB_SCRIPT)
+        stdout = asyncio.StreamReader()
+        signer._process = _FakeProcess(stdout)
+        future = asyncio.get_running_loop().create_future()
+        signer._pending[1] = future
+        stdout.feed_data(b"not json\n")
+        stdout.feed_eof()
+        await signer._read_loop()
+        with pytest.raises(RuntimeError, match="exited"):
+            future.result()
+
+    asyncio.run(scenario())
@@ -0,0 +1,95 @@
+"""
+SingleFlight 测试：并发的相同调用只执行一次、异常传给所有等待方、等待方被取消时共享调用继续
+"""
+import asyncio
+
+import pytest
+
+from xhs.single_flight import SingleFlight
+
+
+class Call:
+    """记录执行次数；release 之前一直挂起，之后返回 value 或抛出 error"""
+
+    def __init__(self, value=None, error: Exception = None):
+        self.value = value
+        self.error = error
+        self.runs = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.runs += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def test_concurrent_calls_are_coalesced():
+    async def scenario():
+        flight = SingleFlight()
+        call, other = Call({"id": "n1"}), Call({"id": "n2"})
+        waiters = [asyncio.ensure_future(flight.do(("note", "n1"), call)) for _ in range(5)]
+        different = asyncio.ensure_future(flight.do(("note", "n2"), other))
+        await asyncio.sleep(0)
+        assert flight.get_stats() == {"inflight": 2, "executed": 2, "coalesced": 4}
+        call.release.set()
+        other.release.set()
+        results = await asyncio.gather(*waiters)
+        assert await different == {"id": "n2"}
+
+        # 完成后移除，之后的调用重新执行
+        again = Call({"id": "n1", "fresh": True})
+        again.release.set()
+        fresh = await flight.do(("note", "n1"), again)
+        return results, call.runs, other.runs, again.runs, fresh, flight.get_stats()
+
+    results, runs, other_runs, again_runs, fresh, stats = asyncio.run(scenario())
+    assert results == [{"id": "n1"}] * 5
+    # 所有等待方拿到的是同一个对象
+    assert all(r is results[0] for r in results)
+    assert (runs, other_runs, again_runs) == (1, 1, 1)
+    assert fresh == {"id": "n1", "fresh": True}
+    assert stats == {"inflight": 0, "executed": 3, "coalesced": 4}
+
+
+def test_exception_reaches_every_waiter():
+    async def scenario():
+        flight = SingleFlight()
+        call = Call(error=RuntimeError("upstream failed"))
+        waiters = [asyncio.ensure_future(flight.do("key", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        call.release.set()
+        return await asyncio.gather(*waiters, return_exceptions=True), call.runs, flight.get_stats()
+
+    results, runs, stats = asyncio.run(scenario())
+    assert runs == 1
+    assert all(isinstance(r, RuntimeError) and str(r) == "upstream failed" for r in results)
+    assert stats["inflight"] == 0
+
+
+@pytest.mark.parametrize("cancelled_index", [0, 1])
+def test_cancelled_waiter_does_not_cancel_the_shared_call(cancelled_index):
+    async def scenario():
+        flight = SingleFlight()
+        call = Call("result")
+        waiters = [asyncio.ensure_future(flight.do("key", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        # 第 0 个是实际执行的调用方，其余是合并的等待方
+        waiters[cancelled_index].cancel()
+        await asyncio.sleep(0)
+        call.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        return results, call.cancelled, call.runs
+
+    results, shared_cancelled, runs = asyncio.run(scenario())
+    assert isinstance(results[cancelled_index], asyncio.CancelledError)
+    assert [r for i, r in enumerate(results) if i != cancelled_index] == ["result", "result"]
+    assert not shared_cancelled
+    assert runs == 1
+
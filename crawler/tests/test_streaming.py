@@ -0,0 +1,210 @@
+"""
+流式接口测试：NDJSON / SSE 分帧、最后一条总是 summary、中途出错时以失败的 summary 结束，
+以及客户端断开后上游生成器和未完成的请求立即关闭
+"""
+import asyncio
+import json
+from typing import Dict, List
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import main
+
+USER_ID = "5a87c9134eacab2a4db1a0fb"
+
+
+def _request(accept: str = "application/json") -> Request:
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+async def _read(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def _parse_ndjson(body: bytes) -> List[Dict]:
+    assert body.endswith(b"\n")
+    return [json.loads(line) for line in body.decode().split("\n")[:-1]]
+
+
+def _parse_sse(body: bytes) -> List[Dict]:
+    assert body.endswith(b"\n\n")
+    records = []
+    for frame in body.decode().split("\n\n")[:-1]:
+        event, data = frame.split("\n")
+        assert event.startswith("event: ") and data.startswith("data: ")
+        record = json.loads(data[len("data: "):])
+        # event 行与 data 中的 type 一致
+        assert event[len("event: "):] == record["type"]
+        records.append(record)
+    return records
+
+
+class FakeSession:
+    token = "session-token"
+
+
+class FakeClient:
+    """按脚本产出结果；block 时在产出第一条之后一直挂起，closed / cancelled 记录清理是否发生"""
+
+    def __init__(self, block: bool = False, fail: bool = False):
+        self.block = block
+        self.fail = fail
+        self.closed = False
+        self.cancelled = False
+
+    async def iter_notes_by_ids(self, note_infos, max_concurrency, item_timeout, refresh=False):
+        try:
+            # 完成顺序与请求顺序无关
+            yield 1, {"note_id": note_infos[1]["note_id"], "title": "拿铁"}
+            if self.block:
+                await asyncio.Event().wait()
+            yield 0, None
+        finally:
+            self.closed = True
+
+    def search_session(self, keyword, sort_type, note_type, token=None, refresh=False):
+        return FakeSession()
+
+    async def iter_search_pages(self, keyword, pages, page_size, sort, note_type, max_concurrency, session):
+        try:
+            yield 1, [{"id": "p1-0", "note_card": {"title": "咖啡"}}, {"id": "p1-1"}], True
+            if self.fail:
+                raise RuntimeError("search busy")
+            yield 2, [{"id": "p2-0"}], False
+        finally:
+            self.closed = True
+
+    async def get_user_info(self, user_id, refresh=False):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+    async def get_user_notes(self, user_id, cursor="", num=20):
+        return {"notes": [{"note_id": "u1", "display_title": "手冲"}], "has_more": True}
+
+
+def test_batch_notes_stream_as_ndjson(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(main, "xhs_client", fake)
+
+    async def scenario():
+        # 请求体没有 stream 字段时按 Accept 头判断
+        req = main.NoteIdsRequest(note_ids=["n0", "n1"])
+        response = await main.get_notes_by_ids(req, _request("application/x-ndjson"))
+        return response, await _read(response)
+
+    response, body = asyncio.run(scenario())
+    assert response.media_type == "application/x-ndjson"
+    assert response.headers["cache-control"] == "no-cache"
+    records = _parse_ndjson(body)
+    assert [(r["type"], r.get("index")) for r in records] == [("note", 1), ("error", 0), ("summary", None)]
+    assert records[0]["note"]["id"] == "n1"
+    assert records[1] == {"type": "error", "index": 0, "note_id": "n0", "error": "Note not found"}
+    assert (records[2]["total"], records[2]["fetched"], records[2]["failed"]) == (2, 1, 1)
+    assert fake.closed
+
+
+def test_deep_search_stream_as_sse(monkeypatch):
+    monkeypatch.setattr(main, "xhs_client", FakeClient())
+
+    async def scenario():
+        req = main.DeepSearchRequest(keyword="咖啡", pages=2, stream="sse")
+        response = await main.deep_search_notes(req, _request())
+        return response, await _read(response)
+
+    response, body = asyncio.run(scenario())
+    assert response.media_type == "text/event-stream"
+    records = _parse_sse(body)
+    assert [(r["type"], r.get("index"), r.get("page")) for r in records] == [
+        ("note", 0, 1), ("note", 1, 1), ("note", 2, 2), ("summary", None, None),
+    ]
+    summary = records[-1]
+    assert (summary["success"], summary["session"], summary["pages"], summary["fetched"]) == (True, "session-token", 2, 3)
+    assert summary["has_more"] is False
+
+
+def test_error_mid_stream_ends_with_failed_summary(monkeypatch):
+    fake = FakeClient(fail=True)
+    monkeypatch.setattr(main, "xhs_client", fake)
+
+    async def scenario():
+        req = main.DeepSearchRequest(keyword="咖啡", pages=2, stream="ndjson")
+        return await _read(await main.deep_search_notes(req, _request()))
+
+    records = _parse_ndjson(asyncio.run(scenario()))
+    # 已经发出的笔记保留，最后一条是失败的 summary
+    assert [r["type"] for r in records] == ["note", "note", "summary"]
+    assert records[-1] == {"type": "summary", "success": False, "error": "search busy"}
+    assert fake.closed
+
+
+def test_unknown_stream_mode_is_rejected(monkeypatch):
+    monkeypatch.setattr(main, "xhs_client", FakeClient())
+
+    async def scenario():
+        req = main.NoteIdsRequest(note_ids=["n0", "n1"], stream="xml")
+        with pytest.raises(HTTPException) as exc_info:
+            await main.get_notes_by_ids(req, _request())
+        return exc_info.value
+
+    assert asyncio.run(scenario()).status_code == 400
+
+
+def test_closing_stream_closes_client_generator(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(main, "xhs_client", fake)
+
+    async def scenario():
+        req = main.NoteIdsRequest(note_ids=["n0", "n1"], stream="ndjson")
+        response = await main.get_notes_by_ids(req, _request())
+        first = await response.body_iterator.__anext__()
+        await response.body_iterator.aclose()
+        # 不等垃圾回收：aclose 返回时客户端生成器已经关闭
+        return first, fake.closed
+
+    first, closed = asyncio.run(scenario())
+    assert json.loads(first)["index"] == 1
+    assert closed
+
+
+@pytest.mark.parametrize("endpoint", ["notes", "user"])
+def test_client_disconnect_stops_upstream_work(monkeypatch, endpoint):
+    fake = FakeClient(block=True)
+    monkeypatch.setattr(main, "xhs_client", fake)
+
+    async def scenario():
+        if endpoint == "notes":
+            req = main.NoteIdsRequest(note_ids=["n0", "n1"], stream="ndjson")
+            response = await main.get_notes_by_ids(req, _request())
+        else:
+            req = main.UserUrlRequest(url=USER_ID, stream="ndjson")
+            response = await main.get_user_from_url(req, _request())
+
+        sent = []
+        first_body = asyncio.Event()
+
+        async def send(message):
+            sent.append(message)
+            if message.get("body"):
+                first_body.set()
+
+        async def receive():
+            # 收到第一条记录后客户端断开
+            await first_body.wait()
+            return {"type": "http.disconnect"}
+
+        await asyncio.wait_for(response({"type": "http"}, receive, send), timeout=5)
+        return [m["body"] for m in sent if m.get("body")]
+
+    bodies = asyncio.run(scenario())
+    assert len(bodies) == 1
+    assert json.loads(bodies[0])["type"] == "note"
+    if endpoint == "notes":
+        assert fake.closed
+    else:
+        # 还在等待的用户信息请求被取消
+        assert fake.cancelled
@@ -0,0 +1,112 @@
+"""
+TermIndex 增量词频：评论去重只分词一次、二级评论计入、单篇与全局计数、LRU 淘汰，
+以及 get_note_comments 抓取时自动 feed
+
+统一使用字符二元切分（不依赖是否安装 jieba），结果可预期。
+"""
+import asyncio
+from typing import Dict, List
+
+import pytest
+
+from support import StandInServer, make_client
+from xhs import term_index
+from xhs.term_index import TermIndex
+
+PAGE_URI = "/api/sns/web/v2/comment/page"
+
+
+@pytest.fixture(autouse=True)
+def bigram_tokenizer(monkeypatch):
+    monkeypatch.setattr(term_index, "jieba", None)
+
+
+def _comment(comment_id: str, content: str, sub_comments: List[Dict] = ()) -> Dict:
+    return {"id": comment_id, "content": content, "sub_comments": list(sub_comments)}
+
+
+async def _run(index: TermIndex, *pages):
+    await index.start()
+    try:
+        for note_id, comments in pages:
+            index.feed(note_id, comments)
+        await index.flush()
+    finally:
+        await index.close()
+
+
+def test_refetched_comments_are_counted_once():
+    page = [
+        _comment("c1", "咖啡好喝", [_comment("c1-1", "咖啡[笑哭R]")]),
+        _comment("c2", "拿铁咖啡"),
+    ]
+    index = TermIndex()
+    asyncio.run(_run(index, ("n1", page), ("n1", page)))
+
+    # 表情被去掉；c1 的二级评论也计入
+    assert index.top_terms("n1", k=1) == [("咖啡", 3)]
+    assert index.note_stats("n1")["comments"] == 3
+    assert index.get_stats()["comments"] == 3
+
+
+def test_note_and_global_counts():
+    index = TermIndex()
+    asyncio.run(_run(
+        index,
+        ("n1", [_comment("c1", "咖啡咖啡")]),
+        ("n2", [_comment("c1", "咖啡 Latte")]),
+    ))
+
+    # 评论 ID 按笔记去重，不同笔记的同一 ID 都计入
+    assert index.frequencies("n1") == {"咖啡": 2, "啡咖": 1}
+    assert index.frequencies("n2") == {"咖啡": 1, "latte": 1}
+    assert index.top_terms(k=1) == [("咖啡", 3)]
+
+
+def test_evicted_notes_still_count_globally():
+    index = TermIndex(max_notes=2)
+    asyncio.run(_run(index, *[(f"n{i}", [_comment("c1", "咖啡")]) for i in range(3)]))
+
+    assert index.top_terms("n0") == []
+    assert index.note_stats("n0") is None
+    assert index.top_terms(k=1) == [("咖啡", 3)]
+    assert index.get_stats()["evicted_notes"] == 1
+
+
+def test_fetched_comments_are_indexed():
+    def page(args) -> Dict:
+        return {"comments": [_comment("c1", "咖啡好喝"), _comment("c2", "奶茶")], "cursor": "", "has_more": False}
+
+    async def scenario(server: StandInServer):
+        index = TermIndex()
+        await index.start()
+        client = make_client(server, term_index=index)
+        try:
+            await client.get_note_comments("note", get_sub_comments=False)
+            await index.flush()
+            return index.frequencies("note")
+        finally:
+            await client.close()
+            await index.close()
+
+    with StandInServer({PAGE_URI: page}) as server:
+        frequencies = asyncio.run(scenario(server))
+
+    assert server.errors == []
+    assert frequencies == {"咖啡": 1, "啡好": 1, "好喝": 1, "奶茶": 1}
+
+
+def test_refed_evicted_note_is_not_counted_twice():
+    index = TermIndex(max_notes=1)
+    asyncio.run(_run(
+        index,
+        ("n0", [_comment("c1", "咖啡")]),
+        ("n1", [_comment("c1", "奶茶")]),
+        # n0 已被淘汰，再次抓取时只有 c2 是新评论
+        ("n0", [_comment("c1", "咖啡"), _comment("c2", "咖啡")]),
+    ))
+
+    assert index.top_terms(k=1) == [("咖啡", 2)]
+    assert index.frequencies("n0") == {"咖啡": 1}
+    assert index.get_stats()["comments"] == 3
+    assert index.get_stats()["evicted_notes"] == 2
@@ -0,0 +1,47 @@
+"""
+WordCloudService 相同内容的并发请求只渲染一次（等待方标记为 coalesced 而不是 cached）；发起请求被取消时结果照常缓存
+
+渲染函数用本模块中的 _slow_render 代替（spawn 的工作进程按模块名导入它），不需要安装 wordcloud。
+"""
+import asyncio
+import time
+from typing import Dict
+
+from xhs.wordcloud_service import WordCloudService
+
+
+def _slow_render(seconds: float) -> Dict:
+    time.sleep(seconds)
+    return {"image": f"data:image/png;base64,slept-{seconds}", "timing": {"render_ms": seconds * 1000}}
+
+
+def test_cancelled_owner_still_caches_shared_render():
+    async def scenario():
+        service = WordCloudService(workers=1)
+        await service.start()
+        try:
+            # 先等进程池启动完成，避免计时受进程启动影响
+            await service._warmup_task
+            owner = asyncio.create_task(service._run("k", _slow_render, 0.3))
+            await asyncio.sleep(0.05)
+            waiter = asyncio.create_task(service._run("k", _slow_render, 0.3))
+            await asyncio.sleep(0.05)
+            owner.cancel()
+
+            shared = await waiter
+            again = await service._run("k", _slow_render, 0.3)
+            return owner, shared, again, service.get_stats()
+        finally:
+            await service.close()
+
+    owner, shared, again, stats = asyncio.run(scenario())
+    assert owner.cancelled()
+    assert shared["image"] == "data:image/png;base64,slept-0.3"
+    # 等待进行中的渲染不算命中缓存
+    assert (shared["cached"], shared["coalesced"]) == (False, True)
+    assert (again["cached"], again["coalesced"]) == (True, False)
+    assert again["image"] == shared["image"]
+    assert stats["renders"] == 1
+    assert stats["cache_hits"] == 1
+    assert stats["coalesced"] == 1
+    assert stats["cache_size"] == 1
@@ -0,0 +1,54 @@
+"""
+xhs_sign 快速实现与逐字节参考实现的等价性测试
+"""
+import random
+
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from xhs.xhs_sign import (
+    b64_encode,
+    b64_encode_bytes,
+    encode_utf8,
+    encode_utf8_bytes,
+    mrc,
+    mrc_fast,
+)
+
+# mrc 的输入是 x-t + x-s + b1（数字和 base64 字符），参考实现只支持 ord < 256 的字符
+latin1_text = st.text(alphabet=st.characters(min_codepoint=0, max_codepoint=255))
+
+
+@given(st.text())
+def test_encode_utf8_bytes_matches_reference(s):
+    assert encode_utf8_bytes(s) == bytes(encode_utf8(s))
+
+
+@given(st.binary())
+def test_b64_encode_bytes_matches_reference(data):
+    assert b64_encode_bytes(data) == b64_encode(list(data))
+
+
+@settings(max_examples=20)
+@given(st.integers(min_value=0), st.integers(min_value=-2, max_value=2))
+def test_b64_encode_bytes_matches_reference_across_chunks(seed, extra):
+    # 参考实现每 16383 字节分块编码，直接生成跨块的输入会触发 hypothesis 的大输入检查
+    data = random.Random(seed).randbytes(16383 * 2 + extra)
+    assert b64_encode_bytes(data) == b64_encode(list(data))
+
+
+@given(latin1_text)
+def test_mrc_fast_matches_reference(e):
+    assert mrc_fast(e) == mrc(e)
+
+
+@given(st.text(alphabet="0123456789", min_size=13, max_size=13), st.text(alphabet="XYS_ZmkA0+/=", min_size=50))
+def test_mrc_fast_matches_reference_on_signature_input(x_t, x_s):
+    # 真实输入远长于 57 个字符，只有前 57 个参与计算
+    assert mrc_fast(x_t + x_s) == mrc(x_t + x_s)
+
+
+def test_signature_pipeline_matches_reference():
+    payload = '{"x0":"4.2.1","x1":"xhs-pc-web","x2":"Windows","x3":"mns0101_中文","x4":"object"}'
+    assert b64_encode_bytes(encode_utf8_bytes(payload)) == b64_encode(encode_utf8(payload))
+    assert mrc_fast("") == mrc("")
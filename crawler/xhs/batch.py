@@ -0,0 +1,84 @@
+"""
+批量任务执行
+
+批量接口（/notes/by-ids、/notes/from-urls 等）共用的执行器：
+
+1. 并发上限：同时最多 max_concurrency 个任务
+2. 单项超时：每个任务最长 item_timeout 秒，超时只影响该项
+3. 错误隔离：单项异常记录在结果里，不影响其他项
+4. 按完成顺序产出：每项完成后立即产出，BatchResult.index 对应输入位置，用于流式响应
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Sequence
+
+
+class BatchTimeoutError(Exception):
+    """单项任务超时"""
+    pass
+
+
+class BatchResult:
+    __slots__ = ("index", "item", "value", "error", "elapsed")
+
+    def __init__(self, index: int, item: Any):
+        self.index = index
+        self.item = item
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def _run_item(
+    result: BatchResult,
+    worker: Callable[[Any], Awaitable[Any]],
+    semaphore: asyncio.Semaphore,
+    item_timeout: Optional[float],
+) -> BatchResult:
+    async with semaphore:
+        start = time.monotonic()
+        try:
+            if item_timeout:
+                result.value = await asyncio.wait_for(worker(result.item), timeout=item_timeout)
+            else:
+                result.value = await worker(result.item)
+        except asyncio.TimeoutError:
+            result.error = BatchTimeoutError(f"Timed out after {item_timeout}s")
+        except Exception as e:
+            result.error = e
+        result.elapsed = time.monotonic() - start
+    return result
+
+
+async def iter_batch(
+    items: Sequence[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    max_concurrency: int = 4,
+    item_timeout: Optional[float] = None,
+) -> AsyncIterator[BatchResult]:
+    """并发执行 worker(item)，每项完成后立即产出（按完成顺序，用 BatchResult.index 对应输入）
+
+    调用方提前退出时，尚未完成的任务会被取消。
+
+    Args:
+        items: 任务输入
+        worker: 处理单项的协程函数
+        max_concurrency: 最大并发数
+        item_timeout: 单项超时时间（秒），None 表示不限
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    tasks = [
+        asyncio.ensure_future(_run_item(BatchResult(i, item), worker, semaphore, item_timeout))
+        for i, item in enumerate(items)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,191 @@
+"""
+熔断器
+
+出现验证码（471）或 IP 被封（300012）后，正在进行和排队中的请求仍会继续发出并全部失败，
+既加重封禁又浪费签名。CircuitBreaker 按 Cookie 账号（a1）和代理线路（直连为 direct）分别熔断：
+
+1. closed：正常放行
+2. open：验证码打开账号的熔断器，IP 被封打开代理线路的熔断器；冷却期内该账号 / 线路的请求
+   不签名、不发出，直接抛出 CircuitOpenError（带剩余冷却时间）
+3. half-open：冷却结束后只放行一个探测请求，成功则关闭，再次被封则重新打开；探测请求因其他
+   原因失败时放行下一个
+4. 冷却时间按连续打开的次数递增（cooldowns），关闭后重新从第一档开始
+
+已经打开时，并发请求陆续返回的验证码 / 被封不会重复计数，也不会延长冷却时间。
+"""
+import time
+from typing import Dict, List, Optional, Sequence
+
+from .exception import CircuitOpenError
+from .keys import Key, key_id, key_label
+from .retry import CAPTCHA, IP_BLOCKED
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 默认冷却时间（秒）：第 1、2、3... 次连续打开
+DEFAULT_COOLDOWNS = (30, 60, 120, 300, 600)
+
+# 失败类型 -> 打开哪一类熔断器
+_TRIP_KINDS = {
+    CAPTCHA: "account",
+    IP_BLOCKED: "proxy",
+}
+
+# 探测请求进行中时，其他请求的建议重试间隔（秒）
+_PROBE_RETRY_AFTER = 1.0
+
+class Breaker:
+    __slots__ = ("state", "trips", "open_until", "reason", "probe_started", "fast_fails")
+
+    def __init__(self):
+        self.state = CLOSED
+        # 连续打开次数，决定下一次的冷却时间
+        self.trips = 0
+        self.open_until = 0.0
+        self.reason = ""
+        self.probe_started: Optional[float] = None
+        self.fast_fails = 0
+
+
+class CircuitBreaker:
+    def __init__(self, cooldowns: Sequence[float] = DEFAULT_COOLDOWNS, probe_timeout: float = 60.0):
+        """
+        Args:
+            cooldowns: 第 1、2、3... 次连续打开的冷却时间（秒），超出后使用最后一档
+            probe_timeout: 半开状态的探测请求超过这个时间（秒）没有结果时，放行下一个探测请求
+        """
+        self.cooldowns = tuple(cooldowns) or DEFAULT_COOLDOWNS
+        self.probe_timeout = probe_timeout
+        self._breakers: Dict[Key, Breaker] = {}
+        self.opens = 0
+        self.fast_fails = 0
+
+    @staticmethod
+    def keys(account: str, proxy_url: Optional[str]) -> List[Key]:
+        """一个请求涉及的熔断器（与 RateLimiter 的 account / proxy 桶一一对应）"""
+        return [("account", account or "anonymous"), ("proxy", proxy_url or "direct")]
+
+    def is_open(self, key: Key) -> bool:
+        """key 是否处于冷却期（选代理时跳过）"""
+        breaker = self._breakers.get(key)
+        return breaker is not None and breaker.state == OPEN and time.monotonic() < breaker.open_until
+
+    def check(self, keys: List[Key], probe: bool = False):
+        """keys 中任一熔断器不放行时抛出 CircuitOpenError
+
+        Args:
+            probe: 是否占用半开状态的探测名额（请求即将发出时为 True）
+        """
+        now = time.monotonic()
+        probes = []
+        for key in keys:
+            breaker = self._breakers.get(key)
+            if breaker is None or breaker.state == CLOSED:
+                continue
+            if breaker.state == OPEN and now >= breaker.open_until:
+                breaker.state = HALF_OPEN
+                breaker.probe_started = None
+                print(f"[Breaker] {key_label(*key)} half-open, probing")
+            if breaker.state == OPEN:
+                retry_after = breaker.open_until - now
+            elif breaker.probe_started is not None and now - breaker.probe_started < self.probe_timeout:
+                retry_after = _PROBE_RETRY_AFTER
+            else:
+                probes.append(breaker)
+                continue
+            breaker.fast_fails += 1
+            self.fast_fails += 1
+            raise CircuitOpenError(key_label(*key), retry_after, breaker.reason)
+
+        if probe:
+            for breaker in probes:
+                breaker.probe_started = now
+
+    def on_success(self, keys: List[Key]):
+        for key in keys:
+            breaker = self._breakers.get(key)
+            if breaker is not None and breaker.state == HALF_OPEN:
+                self._close(key, breaker)
+
+    def on_failure(self, keys: List[Key], kind: str):
+        """请求失败：验证码 / IP 被封时打开对应的熔断器，其他失败只结束探测"""
+        trip_kind = _TRIP_KINDS.get(kind)
+        for key in keys:
+            if key[0] == trip_kind:
+                self._trip(key, kind)
+            else:
+                self.release([key])
+
+    def release(self, keys: List[Key]):
+        """请求没有结果（其他错误、被取消）：半开状态放行下一个探测请求"""
+        for key in keys:
+            breaker = self._breakers.get(key)
+            if breaker is not None and breaker.state == HALF_OPEN:
+                breaker.probe_started = None
+
+    def _trip(self, key: Key, reason: str):
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = Breaker()
+        if breaker.state == OPEN:
+            return
+        cooldown = self.cooldowns[min(breaker.trips, len(self.cooldowns) - 1)]
+        breaker.trips += 1
+        breaker.state = OPEN
+        breaker.open_until = time.monotonic() + cooldown
+        breaker.reason = reason
+        breaker.probe_started = None
+        self.opens += 1
+        print(f"[Breaker] {key_label(*key)} opened for {cooldown:g}s after {reason} (trip {breaker.trips})")
+
+    def _close(self, key: Key, breaker: Breaker):
+        breaker.state = CLOSED
+        breaker.trips = 0
+        breaker.reason = ""
+        breaker.probe_started = None
+        print(f"[Breaker] {key_label(*key)} closed")
+
+    def reset(self, breaker_id: Optional[str] = None) -> int:
+        """手动关闭熔断器（如已在浏览器中完成验证码）
+
+        Args:
+            breaker_id: get_stats 中 breakers 的键（如 "account:3f1c9a0b2d4e"），为空时关闭全部
+
+        Returns:
+            关闭的熔断器数量
+        """
+        count = 0
+        for key, breaker in self._breakers.items():
+            if breaker.state != CLOSED and (breaker_id is None or key_id(key) == breaker_id):
+                self._close(key, breaker)
+                count += 1
+        return count
+
+    def reset_key(self, key: Key):
+        breaker = self._breakers.get(key)
+        if breaker is not None and breaker.state != CLOSED:
+            self._close(key, breaker)
+
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        breakers = {}
+        for key, breaker in self._breakers.items():
+            state = breaker.state
+            if state == OPEN and now >= breaker.open_until:
+                state = HALF_OPEN
+            breakers[key_id(key)] = {
+                "name": key_label(*key),
+                "state": state,
+                "reason": breaker.reason,
+                "trips": breaker.trips,
+                "retry_after": round(breaker.open_until - now, 2) if state == OPEN else 0.0,
+                "fast_fails": breaker.fast_fails,
+            }
+        return {
+            "open": sum(1 for b in breakers.values() if b["state"] != CLOSED),
+            "opens": self.opens,
+            "fast_fails": self.fast_fails,
+            "breakers": breakers,
+        }
@@ -1,21 +1,37 @@
 import asyncio
-import json
-from typing import Any, Dict, List, Optional, Union
+import time
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Tuple, Union
 
-import httpx
 from playwright.async_api import BrowserContext, Page
-from tenacity import retry, stop_after_attempt, wait_fixed
 
+from .batch import iter_batch
+from .circuit_breaker import CircuitBreaker
+from .comment_harvester import CommentHarvester
+from .exception import CaptchaRequiredError, CookieExpiredError, DataFetchError, IPBlockedError, ServerError
 from .field import SearchNoteType, SearchSortType
 from .help import get_search_id
-from .playwright_sign import sign_with_playwright
+from .http_pool import HttpClientPool
+from .pagination import cursor_extractor, fetch_numbered_pages, page_number_extractor, paginate
 from .proxy_pool import ProxyPool
+from .request_context import RequestContext
+from .response_cache import ResponseCache
+from .rate_limit import RateLimiter
+from .retry import CAPTCHA, IP_BLOCKED, RetryPolicy, classify
+from .search_session import SearchSession, SearchSessionStore
 from .cache import SessionCache
+from .sign_pool import SignPagePool
+from .signer import PlaywrightSigner, SignerBackend
+from .single_flight import SingleFlight
+from .term_index import TermIndex
 
 
-class CookieExpiredError(Exception):
-    """Cookie 失效异常"""
-    pass
+# 批量接口一次 page.evaluate 签名的请求数量
+SIGN_BATCH_SIZE = 20
+
+# 预先签好的请求限速等待超过这个时间（秒）时重新签名
+SIGN_MAX_AGE = 10
+
 
 class XiaoHongShuClient:
     def __init__(
@@ -26,15 +42,47 @@ class XiaoHongShuClient:
         cookie_dict: Dict[str, str] = None,
         proxy_pool: ProxyPool = None,
         use_cache: bool = True,
+        sign_pool: SignPagePool = None,
+        signer: SignerBackend = None,
+        http_pool: HttpClientPool = None,
+        sub_comment_concurrency: int = 5,
+        term_index: Optional[TermIndex] = None,
+        search_sessions: Optional[SearchSessionStore] = None,
+        response_cache: Optional[ResponseCache] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
     ):
         self.timeout = timeout
-        self.headers = headers or {}
+        # Cookie 每次请求根据 cookie_dict 生成，不放在基础请求头里
+        self._base_headers = MappingProxyType(
+            {k: v for k, v in (headers or {}).items() if k.lower() != "cookie"}
+        )
         self._host = "https://edith.xiaohongshu.com"
         self._domain = "https://www.xiaohongshu.com"
         self.IP_ERROR_CODE = 300012
         self.playwright_page = playwright_page
+        self.sign_pool = sign_pool
+        # 签名后端，默认在 Playwright 页面（池）中签名
+        self.signer = signer or PlaywrightSigner(sign_pool=sign_pool, page=playwright_page)
         self.cookie_dict = cookie_dict or {}
         self.proxy_pool = proxy_pool
+        self.http = http_pool or HttpClientPool()
+        self.sub_comment_concurrency = sub_comment_concurrency
+        # 抓到的评论增量计入词频索引
+        self.term_index = term_index
+        # 搜索会话：翻页共用 search_id，已获取的页缓存在内存中
+        self.search_sessions = search_sessions or SearchSessionStore()
+        # 笔记详情和用户信息的响应缓存
+        self.response_cache = response_cache or ResponseCache()
+        # 合并同时发出的相同请求（笔记、用户、用户笔记、评论页）
+        self.single_flight = SingleFlight()
+        # 失败分类重试：每次重试重新签名，必要时换代理
+        self.retry_policy = retry_policy or RetryPolicy()
+        # 按接口、账号、代理的令牌桶限速，被封或验证码时自动减速
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # 验证码 / IP 被封后暂停对应的账号或代理，冷却期内直接失败
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
         self.cache = SessionCache() if use_cache else None
         
         # 尝试从缓存加载登录态
@@ -44,57 +92,63 @@ class XiaoHongShuClient:
                 self.cookie_dict = cached_cookies
                 print("[Client] Loaded cookies from cache")
 
-    async def _pre_headers(self, url: str, params: Optional[Dict] = None, payload: Optional[Dict] = None) -> Dict:
-        a1_value = self.cookie_dict.get("a1", "")
-        if params is not None:
-            data = params
-            method = "GET"
-        elif payload is not None:
-            data = payload
-            method = "POST"
-        else:
-            raise ValueError("params or payload is required")
-
-        signs = await sign_with_playwright(
-            page=self.playwright_page,
-            uri=url,
-            data=data,
-            a1=a1_value,
-            method=method,
+    @property
+    def headers(self) -> Mapping[str, str]:
+        """只读的基础请求头，每个请求在 RequestContext 中复制后再加签名和 Cookie"""
+        return self._base_headers
+
+    def set_cookies(self, cookie_dict: Dict[str, str]):
+        """整体替换 Cookie（已创建的请求上下文继续使用旧快照）"""
+        self.cookie_dict = dict(cookie_dict)
+        # 重新设置 Cookie 通常是已经处理了验证码，新账号的熔断器直接关闭
+        self.circuit_breaker.reset_key(("account", self.cookie_dict.get("a1") or "anonymous"))
+        self.signer.invalidate_b1()
+
+    def _new_context(self, method: str, uri: str, params: Optional[Dict] = None, payload: Optional[Dict] = None) -> RequestContext:
+        return RequestContext(method, uri, params=params, payload=payload, cookie_dict=self.cookie_dict)
+
+    async def _prepare(self, contexts: List[RequestContext]) -> List[RequestContext]:
+        """为请求上下文签名并生成各自独立的请求头，多个请求只需一次批量签名
+
+        同一批上下文在同一时刻创建，共用同一份 Cookie 快照（a1 相同）。
+        """
+        if not contexts:
+            return contexts
+        signs_list = await self.signer.sign_many(
+            [ctx.sign_request() for ctx in contexts],
+            a1=contexts[0].a1,
         )
-        headers = {
-            "X-S": signs["x-s"],
-            "X-T": signs["x-t"],
-            "x-S-Common": signs["x-s-common"],
-            "X-B3-Traceid": signs["x-b3-traceid"],
-        }
-        self.headers.update(headers)
-        return self.headers
+        for ctx, signs in zip(contexts, signs_list):
+            ctx.build_headers(self._base_headers, signs)
+        return contexts
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
-    async def request(self, method, url, **kwargs) -> Union[str, Any]:
-        return_response = kwargs.pop("return_response", False)
-        
-        # 如果配置了代理池，使用代理
-        client_kwargs = {}
-        if self.proxy_pool:
+    def _pick_proxy(self) -> Optional[str]:
+        if not self.proxy_pool:
+            return None
+        # 跳过熔断中的代理；全部熔断时仍返回一个，由 _send 快速失败
+        for _ in range(max(1, len(self.proxy_pool.proxies))):
             proxy_config = self.proxy_pool.get_proxy()
-            if proxy_config:
-                # httpx 使用不同的代理格式
-                proxy_url = proxy_config.get("http://") or proxy_config.get("https://")
-                if proxy_url:
-                    client_kwargs["proxies"] = proxy_url
-                    print(f"[Client] Using proxy: {proxy_url[:30]}...")
-        
-        async with httpx.AsyncClient(**client_kwargs) as client:
-            try:
-                response = await client.request(method, url, timeout=self.timeout, **kwargs)
-            except Exception as e:
-                # 如果使用代理失败，标记代理为失败
-                if self.proxy_pool and proxy_config:
-                    proxy_url = proxy_config.get("http://", "")
-                    self.proxy_pool.mark_failed(proxy_url)
-                raise e
+            if not proxy_config:
+                return None
+            proxy_url = proxy_config.get("http://") or proxy_config.get("https://")
+            if not proxy_url or not self.circuit_breaker.is_open(("proxy", proxy_url)):
+                break
+        if proxy_url:
+            print(f"[Client] Using proxy: {proxy_url[:30]}...")
+        return proxy_url
+
+    async def request(self, method, url, proxy_url: Optional[str] = None, **kwargs) -> Union[str, Any]:
+        """发送一次请求并检查响应（不重试，重试由 _send 负责）
+
+        Args:
+            proxy_url: 使用的代理，为空时从代理池中取（配置了代理池时）
+        """
+        return_response = kwargs.pop("return_response", False)
+        if proxy_url is None:
+            proxy_url = self._pick_proxy()
+
+        # 每条代理线路复用同一个长连接客户端
+        response = await self.http.request(method, url, proxy_url=proxy_url, timeout=self.timeout, **kwargs)
 
         print(f"[Client] {method} {url} -> {response.status_code}")
 
@@ -105,10 +159,7 @@ class XiaoHongShuClient:
 
         # 验证码检测 (HTTP 471)
         if response.status_code == 471:
-            verify_type = response.headers.get("Verifytype", "")
-            verify_uuid = response.headers.get("Verifyuuid", "")
-            msg = f"Captcha required: Verifytype: {verify_type}, Verifyuuid: {verify_uuid}"
-            raise Exception(msg)
+            raise CaptchaRequiredError(response.headers.get("Verifytype", ""), response.headers.get("Verifyuuid", ""))
 
         if return_response:
             return response.text
@@ -116,48 +167,99 @@ class XiaoHongShuClient:
         # 检查其他 HTTP 状态码
         if response.status_code != 200:
             print(f"[Client] HTTP {response.status_code}: {response.text[:200]}")
-            raise Exception(f"HTTP {response.status_code}: {response.text[:200]}")
+            message = f"HTTP {response.status_code}: {response.text[:200]}"
+            if response.status_code >= 500:
+                raise ServerError(response.status_code, message)
+            raise DataFetchError(message)
         
         try:
             data: Dict = response.json()
         except Exception as e:
             print(f"[Client] Failed to parse JSON: {response.text[:500]}")
-            raise Exception(f"Invalid JSON response: {e}")
+            raise DataFetchError(f"Invalid JSON response: {e}")
             
         print(f"[Client] Response success={data.get('success')}, code={data.get('code')}, msg={data.get('msg', '')[:50]}")
         
         if data.get("success"):
             return data.get("data", data.get("success", {}))
         elif data.get("code") == self.IP_ERROR_CODE:
-            raise Exception("IP blocked")
+            raise IPBlockedError("IP blocked")
         else:
             err_msg = data.get("msg", None) or data.get("message", None) or f"{response.text[:200]}"
-            raise Exception(err_msg)
+            raise DataFetchError(err_msg)
+
+    async def _send(self, ctx: RequestContext, **kwargs) -> Dict:
+        """发送请求，按 retry_policy 重试
+
+        每次尝试前先按 rate_limiter 限速；每次重试前重新签名（X-T 是签名时的时间戳），连接失败
+        和 IP 被封时换代理，Cookie 失效、验证码等重试无效的失败立即抛出。账号或代理的熔断器
+        打开时不签名、不发出，直接抛出 CircuitOpenError。
+        """
+        full_url = f"{self._host}{ctx.uri}"
+        proxy_url = self._pick_proxy()
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker_keys = self.circuit_breaker.keys(ctx.a1, proxy_url)
+            self.circuit_breaker.check(breaker_keys)
+            limit_keys = self.rate_limiter.keys(ctx.uri, ctx.a1, proxy_url)
+            waited = await self.rate_limiter.acquire(limit_keys)
+            if attempt > 1 or not ctx.signed or waited > SIGN_MAX_AGE:
+                await self._prepare([ctx])
+            # 限速等待和签名期间熔断器可能已经打开
+            self.circuit_breaker.check(breaker_keys, probe=True)
+            start = time.monotonic()
+            try:
+                if ctx.method == "GET":
+                    result = await self.request(
+                        method="GET", url=full_url, headers=ctx.headers, params=ctx.params, proxy_url=proxy_url, **kwargs
+                    )
+                else:
+                    print(f"[Client] Request headers: Cookie present={bool(ctx.headers.get('Cookie'))}, X-S present={bool(ctx.headers.get('X-S'))}")
+                    result = await self.request(
+                        method="POST", url=full_url, data=ctx.body(), headers=ctx.headers, proxy_url=proxy_url, **kwargs
+                    )
+                self.rate_limiter.on_success(limit_keys)
+                self.circuit_breaker.on_success(breaker_keys)
+                if proxy_url is not None:
+                    self.proxy_pool.mark_success(proxy_url, time.monotonic() - start)
+                return result
+            except asyncio.CancelledError:
+                self.circuit_breaker.release(breaker_keys)
+                raise
+            except Exception as e:
+                kind = classify(e)
+                if kind in (IP_BLOCKED, CAPTCHA):
+                    self.rate_limiter.on_block(limit_keys)
+                self.circuit_breaker.on_failure(breaker_keys, kind)
+                rotate = self.retry_policy.should_rotate(kind) and proxy_url is not None
+                if rotate:
+                    self.proxy_pool.mark_failed(proxy_url)
+                retry = self.retry_policy.should_retry(kind, attempt, proxy_url is not None)
+                self.retry_policy.record(kind, retry)
+                if not retry:
+                    raise
+                if rotate:
+                    proxy_url = self._pick_proxy()
+                delay = self.retry_policy.backoff(attempt)
+                print(f"[Client] {kind} error on {ctx.uri} (attempt {attempt}), retrying in {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
 
     async def get(self, uri: str, params: Optional[Dict] = None) -> Dict:
-        headers = await self._pre_headers(uri, params)
-        if self.cookie_dict:
-            cookie_str = "; ".join([f"{k}={v}" for k, v in self.cookie_dict.items()])
-            headers["Cookie"] = cookie_str
-        full_url = f"{self._host}{uri}"
-        return await self.request(method="GET", url=full_url, headers=headers, params=params)
+        return await self._send(self._new_context("GET", uri, params=params if params is not None else {}))
 
     async def post(self, uri: str, data: dict, **kwargs) -> Dict:
-        headers = await self._pre_headers(uri, payload=data)
-        headers["Content-Type"] = "application/json;charset=UTF-8"
-        if self.cookie_dict:
-            cookie_str = "; ".join([f"{k}={v}" for k, v in self.cookie_dict.items()])
-            headers["Cookie"] = cookie_str
-        json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
-        print(f"[Client] Request headers: Cookie present={bool(headers.get('Cookie'))}, X-S present={bool(headers.get('X-S'))}")
-        return await self.request(method="POST", url=f"{self._host}{uri}", data=json_str, headers=headers, **kwargs)
+        return await self._send(self._new_context("POST", uri, payload=data), **kwargs)
+
+    async def close(self):
+        """关闭长连接客户端和响应缓存，在服务退出时调用"""
+        await self.http.close()
+        self.response_cache.close()
 
     async def update_cookies(self, browser_context: BrowserContext):
         cookies = await browser_context.cookies()
-        cookie_str = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
         cookie_dict = {c['name']: c['value'] for c in cookies}
-        self.headers["Cookie"] = cookie_str
-        self.cookie_dict = cookie_dict
+        self.set_cookies(cookie_dict)
         
         # 保存到缓存
         if self.cache:
@@ -184,48 +286,187 @@ class XiaoHongShuClient:
         }
         return await self.post(uri, data)
 
-    async def get_note_by_id(
+    def search_session(
         self,
-        note_id: str,
-        xsec_source: str = "",
-        xsec_token: str = "",
-    ) -> Dict:
-        if xsec_source == "":
-            xsec_source = "pc_search"
-        data = {
+        keyword: str,
+        sort: SearchSortType = SearchSortType.GENERAL,
+        note_type: SearchNoteType = SearchNoteType.ALL,
+        token: Optional[str] = None,
+        refresh: bool = False,
+    ) -> SearchSession:
+        """取得搜索会话（token 为之前返回的会话 token，refresh 时重新开始搜索）"""
+        return self.search_sessions.get(keyword, sort.value, note_type.value, token, refresh)
+
+    async def search_page(self, session: SearchSession, page: int = 1, page_size: int = 20) -> Tuple[Dict, bool]:
+        """在会话中获取一页搜索结果，返回 (结果, 是否来自缓存)"""
+        keyword, sort, note_type = session.key
+
+        async def fetch(search_id: str, page: int, page_size: int) -> Dict:
+            return await self.get_note_by_keyword(
+                keyword=keyword,
+                search_id=search_id,
+                page=page,
+                page_size=page_size,
+                sort=SearchSortType(sort),
+                note_type=SearchNoteType(note_type),
+            )
+
+        return await session.get_page(page, page_size, fetch)
+
+    @staticmethod
+    def _note_feed_payload(note_id: str, xsec_source: str = "", xsec_token: str = "") -> Dict:
+        return {
             "source_note_id": note_id,
             "image_formats": ["jpg", "webp", "avif"],
             "extra": {"need_body_topic": 1},
-            "xsec_source": xsec_source,
+            "xsec_source": xsec_source or "pc_search",
             "xsec_token": xsec_token,
         }
-        uri = "/api/sns/web/v1/feed"
-        print(f"[Client] Getting note by ID: {note_id}")
-        try:
+
+    @staticmethod
+    def _extract_note_card(note_id: str, res: Dict) -> Dict:
+        print(f"[Client] Response keys: {list(res.keys()) if res else 'None'}")
+        if res and res.get("items"):
+            note_card = res["items"][0].get("note_card", {})
+            print(f"[Client] Note card keys: {list(note_card.keys()) if note_card else 'None'}")
+            return note_card
+        elif res:
+            print(f"[Client] Response has no items, keys: {list(res.keys())}")
+            # 尝试其他可能的响应格式
+            if "note_card" in res:
+                return res["note_card"]
+            if "data" in res and res["data"]:
+                if isinstance(res["data"], list) and len(res["data"]) > 0:
+                    return res["data"][0].get("note_card", {})
+                elif isinstance(res["data"], dict):
+                    return res["data"].get("note_card", {})
+        print(f"[Client] No note found for ID: {note_id}")
+        return {}
+
+    async def get_note_by_id(
+        self,
+        note_id: str,
+        xsec_source: str = "",
+        xsec_token: str = "",
+        refresh: bool = False,
+    ) -> Dict:
+        """获取笔记详情（refresh 为 True 时不使用缓存）
+
+        缓存只按 note_id 区分：xsec_token 只是访问凭证，只有成功取到的笔记才会写入缓存，
+        内容与用哪个 token 取到无关。合并请求的 key 则包含 xsec_token，token 无效的请求
+        失败时不会连带使用有效 token 的调用方。
+        """
+        if not refresh:
+            cached = self.response_cache.get("note", note_id)
+            if cached is not None:
+                return cached
+
+        async def fetch() -> Dict:
+            data = self._note_feed_payload(note_id, xsec_source, xsec_token)
+            uri = "/api/sns/web/v1/feed"
+            print(f"[Client] Getting note by ID: {note_id}")
             res = await self.post(uri, data)
-            print(f"[Client] Response keys: {list(res.keys()) if res else 'None'}")
-            if res and res.get("items"):
-                note_card = res["items"][0].get("note_card", {})
-                print(f"[Client] Note card keys: {list(note_card.keys()) if note_card else 'None'}")
-                return note_card
-            elif res:
-                print(f"[Client] Response has no items, keys: {list(res.keys())}")
-                # 尝试其他可能的响应格式
-                if "note_card" in res:
-                    return res["note_card"]
-                if "data" in res and res["data"]:
-                    if isinstance(res["data"], list) and len(res["data"]) > 0:
-                        return res["data"][0].get("note_card", {})
-                    elif isinstance(res["data"], dict):
-                        return res["data"].get("note_card", {})
-            print(f"[Client] No note found for ID: {note_id}")
-            return {}
+            note_card = self._extract_note_card(note_id, res)
+            self.response_cache.set("note", note_id, note_card)
+            return note_card
+
+        try:
+            return await self.single_flight.do(("note", note_id, xsec_token), fetch)
         except Exception as e:
             print(f"[Client] Exception in get_note_by_id: {e}")
             import traceback
             traceback.print_exc()
             raise
 
+    async def get_notes_by_ids(
+        self,
+        note_infos: List[Dict],
+        max_concurrency: int = 4,
+        item_timeout: Optional[float] = None,
+        refresh: bool = False,
+    ) -> List[Union[Dict, Exception]]:
+        """批量获取笔记详情
+
+        Args:
+            note_infos: [{"note_id": ..., "xsec_token": ..., "xsec_source": ...}, ...]
+            max_concurrency: 同时请求的笔记数
+            item_timeout: 单条笔记的超时时间（秒）
+            refresh: 不使用缓存
+
+        Returns:
+            与 note_infos 一一对应的笔记详情，失败的项为对应的异常对象
+        """
+        results: List[Union[Dict, Exception]] = [None] * len(note_infos)
+        async for index, result in self.iter_notes_by_ids(note_infos, max_concurrency, item_timeout, refresh):
+            results[index] = result
+        return results
+
+    async def iter_notes_by_ids(
+        self,
+        note_infos: List[Dict],
+        max_concurrency: int = 4,
+        item_timeout: Optional[float] = None,
+        refresh: bool = False,
+    ) -> AsyncIterator[Tuple[int, Union[Dict, Exception]]]:
+        """批量获取笔记详情，每条完成后立即产出 (在 note_infos 中的下标, 详情或异常)
+
+        缓存中已有的笔记最先产出，不需要签名；其余每 SIGN_BATCH_SIZE 条（至少 max_concurrency 条）
+        笔记共用一次批量签名，签好的请求交给 iter_batch 并发发送，产出顺序为完成顺序。
+
+        Args:
+            note_infos: [{"note_id": ..., "xsec_token": ..., "xsec_source": ...}, ...]
+            max_concurrency: 同时请求的笔记数
+            item_timeout: 单条笔记的超时时间（秒）
+            refresh: 不使用缓存
+        """
+        uri = "/api/sns/web/v1/feed"
+
+        async def fetch(item) -> Dict:
+            _, info, ctx = item
+            note_id = info.get("note_id", "")
+
+            async def send() -> Dict:
+                note_card = self._extract_note_card(note_id, await self._send(ctx))
+                self.response_cache.set("note", note_id, note_card)
+                return note_card
+
+            # 与 get_note_by_id 共用 key，同一笔记正在获取时直接等待其结果（缓存与 token 无关，见 get_note_by_id）
+            return await self.single_flight.do(("note", note_id, info.get("xsec_token", "")), send)
+
+        missing = []
+        for index, info in enumerate(note_infos):
+            cached = None if refresh else self.response_cache.get("note", info.get("note_id", ""))
+            if cached is not None:
+                yield index, cached
+            else:
+                missing.append((index, info))
+
+        chunk_size = max(SIGN_BATCH_SIZE, max_concurrency)
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            contexts = [
+                self._new_context("POST", uri, payload=self._note_feed_payload(
+                    info.get("note_id", ""),
+                    info.get("xsec_source", ""),
+                    info.get("xsec_token", ""),
+                ))
+                for _, info in chunk
+            ]
+            try:
+                await self._prepare(contexts)
+            except Exception as e:
+                # 批量签名失败时由 _send 逐个重新签名
+                print(f"[Client] Batch signing notes failed: {e}")
+
+            items = [(index, info, ctx) for (index, info), ctx in zip(chunk, contexts)]
+            async for r in iter_batch(items, fetch, max_concurrency, item_timeout):
+                index, info, _ = r.item
+                if r.ok:
+                    yield index, r.value
+                else:
+                    print(f"[Client] Exception fetching note {info.get('note_id', '')}: {r.error}")
+                    yield index, r.error
+
     async def get_note_comments(
         self,
         note_id: str,
@@ -233,6 +474,7 @@ class XiaoHongShuClient:
         cursor: str = "",
         num: int = 10,
         get_sub_comments: bool = True,
+        sub_comment_concurrency: Optional[int] = None,
     ) -> Dict:
         """获取笔记评论，支持二级评论
         
@@ -242,7 +484,22 @@ class XiaoHongShuClient:
             cursor: 分页游标
             num: 获取评论数量（默认10条）
             get_sub_comments: 是否获取二级评论（默认True）
+            sub_comment_concurrency: 同时获取二级评论的线程数，默认使用客户端配置
         """
+        return await self.single_flight.do(
+            ("comments", note_id, xsec_token, cursor, num, get_sub_comments),
+            lambda: self._get_note_comments(note_id, xsec_token, cursor, num, get_sub_comments, sub_comment_concurrency),
+        )
+
+    async def _get_note_comments(
+        self,
+        note_id: str,
+        xsec_token: str,
+        cursor: str,
+        num: int,
+        get_sub_comments: bool,
+        sub_comment_concurrency: Optional[int],
+    ) -> Dict:
         uri = "/api/sns/web/v2/comment/page"
         params = {
             "note_id": note_id,
@@ -256,24 +513,99 @@ class XiaoHongShuClient:
         
         # 如果需要获取二级评论
         if get_sub_comments and result.get("comments"):
+            threads = []
             for comment in result.get("comments", []):
-                comment_id = comment.get("id", "")
-                sub_comment_count = comment.get("sub_comment_count", 0)
-                
-                # 如果有二级评论，获取它们
-                if sub_comment_count > 0:
-                    sub_comments = await self.get_sub_comments(
-                        note_id=note_id,
-                        comment_id=comment_id,
-                        xsec_token=xsec_token,
-                        num=min(sub_comment_count, 10)  # 默认最多10条二级评论
-                    )
-                    comment["sub_comments"] = sub_comments.get("comments", [])
-                else:
-                    comment["sub_comments"] = []
-        
+                comment["sub_comments"] = []
+                if comment.get("sub_comment_count", 0) > 0:
+                    threads.append(comment)
+
+            # 所有二级评论请求一次批量签名
+            sub_uri = "/api/sns/web/v2/comment/sub/page"
+            contexts = [
+                self._new_context("GET", sub_uri, params=self._sub_comments_params(
+                    note_id=note_id,
+                    comment_id=comment.get("id", ""),
+                    xsec_token=xsec_token,
+                    num=min(comment.get("sub_comment_count", 0), 10),  # 默认最多10条二级评论
+                ))
+                for comment in threads
+            ]
+            try:
+                await self._prepare(contexts)
+            except Exception as e:
+                # 签名失败时各线程单独重新签名，不影响一级评论的返回
+                print(f"[Client] Batch signing sub-comments failed: {e}")
+
+            # 二级评论并发获取，单个线程失败只记录在该评论上；gather 保持原有顺序
+            semaphore = asyncio.Semaphore(max(1, sub_comment_concurrency or self.sub_comment_concurrency))
+
+            cookie_expired = asyncio.Event()
+
+            async def fetch_thread(comment: Dict, ctx: RequestContext):
+                async with semaphore:
+                    if cookie_expired.is_set():
+                        return
+                    try:
+                        sub_comments = await self._get_sub_comments(ctx)
+                        comment["sub_comments"] = sub_comments.get("comments", [])
+                    except CookieExpiredError:
+                        cookie_expired.set()
+                        raise
+                    except Exception as e:
+                        print(f"[Client] Error fetching sub comments of {comment.get('id', '')}: {e}")
+                        comment["sub_comments_error"] = str(e)
+
+            tasks = [asyncio.create_task(fetch_thread(comment, ctx)) for comment, ctx in zip(threads, contexts)]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # Cookie 失效（或调用方取消）时取消其余线程；已经拿到名额、还没被取消的线程看到
+                # cookie_expired 后直接返回，都不再用失效的 Cookie 发出请求
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+        if self.term_index:
+            self.term_index.feed(note_id, result.get("comments", []))
         return result
     
+    async def harvest_comments(
+        self,
+        note_id: str,
+        xsec_token: str = "",
+        concurrency: int = 5,
+        max_comments: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        max_requests: Optional[int] = None,
+        checkpoint: Optional[Dict] = None,
+    ) -> Dict:
+        """抓取笔记的全部评论（翻完一级评论和每个线程的二级评论游标）
+
+        Args:
+            note_id: 笔记ID
+            xsec_token: 安全令牌
+            concurrency: 同时翻页的二级评论线程数
+            max_comments: 最多抓取的评论数
+            max_seconds: 最长耗时（秒）
+            max_requests: 最多发出的接口请求数
+            checkpoint: 上一次未完成时返回的 checkpoint
+
+        Returns:
+            {"comments": [CompactComment, ...], "complete", "stop_reason", "checkpoint", "stats"}
+        """
+        harvester = CommentHarvester(
+            self,
+            note_id=note_id,
+            xsec_token=xsec_token,
+            concurrency=concurrency,
+            max_comments=max_comments,
+            max_seconds=max_seconds,
+            max_requests=max_requests,
+            checkpoint=checkpoint,
+        )
+        return await harvester.run()
+
     async def get_sub_comments(
         self,
         note_id: str,
@@ -283,8 +615,31 @@ class XiaoHongShuClient:
         num: int = 10,
     ) -> Dict:
         """获取二级评论（回复）"""
-        uri = "/api/sns/web/v2/comment/sub/page"
-        params = {
+        params = self._sub_comments_params(note_id, comment_id, xsec_token, cursor, num)
+        return await self._get_sub_comments(self._new_context("GET", "/api/sns/web/v2/comment/sub/page", params=params))
+
+    async def _get_sub_comments(self, ctx: RequestContext) -> Dict:
+        """发送二级评论请求（ctx 可以已经批量签名），相同参数的请求正在进行时直接等待其结果"""
+        params = ctx.params
+        key = ("sub_comments", params["note_id"], params["root_comment_id"], params["xsec_token"], params["cursor"], params["num"])
+
+        async def fetch() -> Dict:
+            result = await self._send(ctx)
+            if self.term_index:
+                self.term_index.feed(params["note_id"], result.get("comments", []))
+            return result
+
+        return await self.single_flight.do(key, fetch)
+
+    @staticmethod
+    def _sub_comments_params(
+        note_id: str,
+        comment_id: str,
+        xsec_token: str = "",
+        cursor: str = "",
+        num: int = 10,
+    ) -> Dict:
+        return {
             "note_id": note_id,
             "root_comment_id": comment_id,
             "cursor": cursor,
@@ -292,7 +647,6 @@ class XiaoHongShuClient:
             "image_formats": "jpg,webp,avif",
             "xsec_token": xsec_token,
         }
-        return await self.get(uri, params)
     
     async def get_user_notes(
         self,
@@ -314,16 +668,227 @@ class XiaoHongShuClient:
             "num": num,
             "image_formats": "jpg,webp,avif",
         }
-        return await self.get(uri, params)
+        return await self.single_flight.do(("user_notes", user_id, cursor, num), lambda: self.get(uri, params))
     
     async def get_user_info(
         self,
         user_id: str,
+        refresh: bool = False,
     ) -> Dict:
-        """获取用户信息"""
-        uri = "/api/sns/web/v1/user"
-        params = {
-            "user_id": user_id,
-            "image_formats": "jpg,webp,avif",
-        }
-        return await self.get(uri, params)
+        """获取用户信息（refresh 为 True 时不使用缓存）"""
+        if not refresh:
+            cached = self.response_cache.get("user", user_id)
+            if cached is not None:
+                return cached
+
+        async def fetch() -> Dict:
+            uri = "/api/sns/web/v1/user"
+            params = {
+                "user_id": user_id,
+                "image_formats": "jpg,webp,avif",
+            }
+            result = await self.get(uri, params)
+            self.response_cache.set("user", user_id, result)
+            return result
+
+        return await self.single_flight.do(("user", user_id), fetch)
+
+    def iter_notes_by_keyword(
+        self,
+        keyword: str,
+        page_size: int = 20,
+        sort: SearchSortType = SearchSortType.GENERAL,
+        note_type: SearchNoteType = SearchNoteType.ALL,
+        limit: Optional[int] = None,
+        stop_when: Optional[Callable[[Dict], bool]] = None,
+        prefetch: bool = True,
+    ) -> AsyncIterator[Dict]:
+        """逐条产出搜索结果，所有页共用同一个 search_id
+
+        Args:
+            keyword: 关键词
+            page_size: 每页数量
+            sort: 排序方式
+            note_type: 笔记类型
+            limit: 最多产出的条目数
+            stop_when: 对条目返回 True 时停止
+            prefetch: 是否预取下一页
+        """
+        search_id = get_search_id()
+
+        async def fetch_page(page: int) -> Dict:
+            return await self.get_note_by_keyword(
+                keyword=keyword,
+                search_id=search_id,
+                page=page,
+                page_size=page_size,
+                sort=sort,
+                note_type=note_type,
+            )
+
+        return paginate(fetch_page, page_number_extractor("items"), 1, limit, stop_when, prefetch)
+
+    async def iter_search_pages(
+        self,
+        keyword: str,
+        pages: int = 5,
+        page_size: int = 20,
+        sort: SearchSortType = SearchSortType.GENERAL,
+        note_type: SearchNoteType = SearchNoteType.ALL,
+        max_concurrency: int = 3,
+        session: Optional[SearchSession] = None,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> AsyncIterator[Tuple[int, List[Dict], bool]]:
+        """深度搜索：并发请求第 1..pages 页，按排名顺序逐页产出 (页码, 去重后的条目, 是否还有下一页)
+
+        所有页在同一个搜索会话中获取（共用 search_id，已缓存的页不再请求）；某页 has_more 为
+        false 时停止。条目按笔记ID去重，已在前面页出现过的笔记和没有ID的条目不会产出。
+
+        Args:
+            keyword: 关键词
+            pages: 最多请求的页数
+            page_size: 每页数量
+            sort: 排序方式
+            note_type: 笔记类型
+            max_concurrency: 同时请求的页数
+            session: 使用的搜索会话，默认按 (keyword, sort, note_type) 取得
+            semaphore: 多个搜索共用的并发限制（每页请求时占用）
+        """
+        session = session or self.search_session(keyword, sort, note_type)
+        seen = set()
+
+        async def fetch_page(page: int) -> Dict:
+            if semaphore is None:
+                result, _ = await self.search_page(session, page, page_size)
+            else:
+                async with semaphore:
+                    result, _ = await self.search_page(session, page, page_size)
+            return result
+
+        async for page, items, has_more in fetch_numbered_pages(
+            fetch_page, page_number_extractor("items"), 1, pages, max_concurrency
+        ):
+            unique = []
+            for item in items:
+                note_id = item.get("id") or (item.get("note_card") or {}).get("note_id")
+                if note_id and note_id not in seen:
+                    seen.add(note_id)
+                    unique.append(item)
+            yield page, unique, has_more
+
+    async def iter_keyword_searches(
+        self,
+        keywords: List[str],
+        pages: int = 1,
+        page_size: int = 20,
+        sort: SearchSortType = SearchSortType.GENERAL,
+        note_type: SearchNoteType = SearchNoteType.ALL,
+        max_concurrency: int = 6,
+        per_keyword_concurrency: int = 2,
+    ) -> AsyncIterator[Tuple[str, int, Union[List[Dict], Exception], bool]]:
+        """多关键词搜索：各关键词同时进行，按完成顺序产出 (关键词, 页码, 条目或异常, 是否还有下一页)
+
+        所有请求共用 max_concurrency 的并发上限，每个关键词同时最多 per_keyword_concurrency 页，
+        一个关键词页数再多也不会占满全部并发。单个关键词失败时产出 (关键词, 0, 异常, False)，
+        不影响其他关键词。调用方提前退出时未完成的搜索会被取消。
+
+        Args:
+            keywords: 关键词列表
+            pages: 每个关键词最多请求的页数
+            page_size: 每页数量
+            sort: 排序方式
+            note_type: 笔记类型
+            max_concurrency: 全部关键词同时请求的页数
+            per_keyword_concurrency: 每个关键词同时请求的页数
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run(keyword: str):
+            try:
+                async for page, items, has_more in self.iter_search_pages(
+                    keyword,
+                    pages=pages,
+                    page_size=page_size,
+                    sort=sort,
+                    note_type=note_type,
+                    max_concurrency=per_keyword_concurrency,
+                    semaphore=semaphore,
+                ):
+                    queue.put_nowait((keyword, page, items, has_more))
+            except Exception as e:
+                queue.put_nowait((keyword, 0, e, False))
+            finally:
+                queue.put_nowait(None)
+
+        tasks = [asyncio.ensure_future(run(keyword)) for keyword in dict.fromkeys(keywords)]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                record = await queue.get()
+                if record is None:
+                    remaining -= 1
+                else:
+                    yield record
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def iter_user_notes(
+        self,
+        user_id: str,
+        num: int = 20,
+        limit: Optional[int] = None,
+        stop_when: Optional[Callable[[Dict], bool]] = None,
+        prefetch: bool = True,
+    ) -> AsyncIterator[Dict]:
+        """逐条产出用户主页的笔记"""
+        async def fetch_page(cursor: str) -> Dict:
+            return await self.get_user_notes(user_id=user_id, cursor=cursor, num=num)
+
+        return paginate(fetch_page, cursor_extractor("notes"), "", limit, stop_when, prefetch)
+
+    def iter_note_comments(
+        self,
+        note_id: str,
+        xsec_token: str = "",
+        num: int = 10,
+        get_sub_comments: bool = False,
+        limit: Optional[int] = None,
+        stop_when: Optional[Callable[[Dict], bool]] = None,
+        prefetch: bool = True,
+    ) -> AsyncIterator[Dict]:
+        """逐条产出一级评论（get_sub_comments=True 时每条附带前 10 条二级评论）"""
+        async def fetch_page(cursor: str) -> Dict:
+            return await self.get_note_comments(
+                note_id=note_id,
+                xsec_token=xsec_token,
+                cursor=cursor,
+                num=num,
+                get_sub_comments=get_sub_comments,
+            )
+
+        return paginate(fetch_page, cursor_extractor("comments"), "", limit, stop_when, prefetch)
+
+    def iter_sub_comments(
+        self,
+        note_id: str,
+        comment_id: str,
+        xsec_token: str = "",
+        num: int = 10,
+        limit: Optional[int] = None,
+        stop_when: Optional[Callable[[Dict], bool]] = None,
+        prefetch: bool = True,
+    ) -> AsyncIterator[Dict]:
+        """逐条产出某条评论下的全部二级评论"""
+        async def fetch_page(cursor: str) -> Dict:
+            return await self.get_sub_comments(
+                note_id=note_id,
+                comment_id=comment_id,
+                xsec_token=xsec_token,
+                cursor=cursor,
+                num=num,
+            )
+
+        return paginate(fetch_page, cursor_extractor("comments"), "", limit, stop_when, prefetch)
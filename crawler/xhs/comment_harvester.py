@@ -0,0 +1,263 @@
+"""
+评论全量抓取
+
+/comments 一次只返回一页，二级评论也只取前 10 条。CommentHarvester 沿着一级评论游标
+翻完所有页，同时并发翻完每个评论线程的二级评论游标：
+
+1. 预算控制：总评论数、总耗时、总请求数，任一耗尽即停止；预算只在两页之间检查，已取回的页
+   整页保留（评论数可能略超过 max_comments），游标只越过已保存的页，续抓不会漏评论
+2. 断点续抓：停止时返回 checkpoint（一级游标 + 未完成线程的游标），传回即可继续；账号或代理
+   熔断时立即停止（stop_reason 为 circuit_open），retry_after 秒后可以从 checkpoint 继续
+3. 内存受控：原始接口返回的字典在解析后立即丢弃，只保留 CompactComment
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from .exception import CircuitOpenError, CookieExpiredError
+
+
+class CompactComment:
+    __slots__ = (
+        "id",
+        "parent_id",
+        "user_id",
+        "nickname",
+        "content",
+        "like_count",
+        "create_time",
+        "sub_comment_count",
+    )
+
+    def __init__(self, raw: Dict, parent_id: str = ""):
+        user_info = raw.get("user_info") or {}
+        self.id = raw.get("id", "")
+        self.parent_id = parent_id
+        self.user_id = user_info.get("user_id", "")
+        self.nickname = user_info.get("nickname", "")
+        self.content = raw.get("content", "")
+        self.like_count = raw.get("like_count", 0)
+        self.create_time = raw.get("create_time", 0)
+        self.sub_comment_count = raw.get("sub_comment_count", 0)
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class CommentHarvester:
+    def __init__(
+        self,
+        client,
+        note_id: str,
+        xsec_token: str = "",
+        concurrency: int = 5,
+        max_comments: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        max_requests: Optional[int] = None,
+        checkpoint: Optional[Dict] = None,
+    ):
+        """
+        Args:
+            client: XiaoHongShuClient
+            note_id: 笔记ID
+            xsec_token: 安全令牌
+            concurrency: 同时翻页的二级评论线程数
+            max_comments: 最多抓取的评论数（一级 + 二级），达到后不再请求新的页
+            max_seconds: 最长耗时（秒）
+            max_requests: 最多发出的接口请求数
+            checkpoint: 上一次返回的 checkpoint，从该位置继续
+        """
+        self.client = client
+        self.note_id = note_id
+        self.xsec_token = xsec_token
+        self.concurrency = max(1, concurrency)
+        self.max_comments = max_comments
+        self.max_seconds = max_seconds
+        self.max_requests = max_requests
+
+        checkpoint = checkpoint or {}
+        self._top_cursor: str = checkpoint.get("top_cursor", "")
+        self._top_has_more: bool = checkpoint.get("top_has_more", True)
+        self._pending = deque(tuple(item) for item in checkpoint.get("threads", []))
+
+        self.comments: List[CompactComment] = []
+        self._seen = set()
+        self._requests = 0
+        self._errors = 0
+        self._deadline: Optional[float] = None
+        self._stop_reason = ""
+        self._retry_after = 0.0
+        self._unfinished: List[Tuple[str, str]] = []
+        # 线程队列的协调：一级评论翻完、队列为空且没有正在处理的线程时，worker 退出
+        self._cond = asyncio.Condition()
+        self._top_done = False
+        self._active = 0
+
+    def _budget_left(self) -> bool:
+        if self._stop_reason:
+            return False
+        if self.max_comments is not None and len(self.comments) >= self.max_comments:
+            self._stop_reason = "max_comments"
+        elif self.max_requests is not None and self._requests >= self.max_requests:
+            self._stop_reason = "max_requests"
+        elif self._deadline is not None and time.monotonic() >= self._deadline:
+            self._stop_reason = "max_seconds"
+        return not self._stop_reason
+
+    def _circuit_open(self, e: CircuitOpenError):
+        # 其他线程看到 stop_reason 后不再发出请求，游标保留在 checkpoint 中
+        if self._stop_reason != "circuit_open":
+            print(f"[Harvester] Stopping {self.note_id}: {e}")
+        self._stop_reason = "circuit_open"
+        self._retry_after = max(self._retry_after, e.retry_after)
+
+    def _add(self, raw: Dict, parent_id: str = "") -> bool:
+        comment_id = raw.get("id", "")
+        if not comment_id or comment_id in self._seen:
+            return False
+        self._seen.add(comment_id)
+        self.comments.append(CompactComment(raw, parent_id))
+        return True
+
+    async def _put_thread(self, comment_id: str, cursor: str):
+        async with self._cond:
+            self._pending.append((comment_id, cursor))
+            self._cond.notify()
+
+    async def _next_thread(self) -> Optional[Tuple[str, str]]:
+        async with self._cond:
+            while not self._pending:
+                if self._top_done and self._active == 0:
+                    return None
+                await self._cond.wait()
+            self._active += 1
+            return self._pending.popleft()
+
+    async def _thread_done(self):
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    async def _walk_top_level(self):
+        try:
+            while self._top_has_more and self._budget_left():
+                self._requests += 1
+                try:
+                    page = await self.client.get_note_comments(
+                        note_id=self.note_id,
+                        xsec_token=self.xsec_token,
+                        cursor=self._top_cursor,
+                        get_sub_comments=False,
+                    )
+                except CookieExpiredError:
+                    raise
+                except CircuitOpenError as e:
+                    self._circuit_open(e)
+                    break
+                except Exception as e:
+                    print(f"[Harvester] Error fetching top-level comments of {self.note_id}: {e}")
+                    self._errors += 1
+                    break
+
+                for raw in page.get("comments", []):
+                    self._add(raw)
+                    comment_id = raw.get("id", "")
+                    inline = raw.get("sub_comments") or []
+                    for sub in inline:
+                        self._add(sub, parent_id=comment_id)
+                    if raw.get("sub_comment_has_more", raw.get("sub_comment_count", 0) > len(inline)):
+                        await self._put_thread(comment_id, raw.get("sub_comment_cursor", ""))
+
+                self._top_cursor = page.get("cursor", "")
+                self._top_has_more = bool(page.get("has_more")) and bool(self._top_cursor)
+        finally:
+            async with self._cond:
+                self._top_done = True
+                self._cond.notify_all()
+
+    async def _thread_worker(self):
+        while True:
+            item = await self._next_thread()
+            if item is None:
+                return
+            try:
+                await self._fetch_thread_page(*item)
+            finally:
+                await self._thread_done()
+
+    async def _fetch_thread_page(self, comment_id: str, cursor: str):
+        if not self._budget_left():
+            self._unfinished.append((comment_id, cursor))
+            return
+
+        self._requests += 1
+        try:
+            page = await self.client.get_sub_comments(
+                note_id=self.note_id,
+                comment_id=comment_id,
+                xsec_token=self.xsec_token,
+                cursor=cursor,
+            )
+        except CookieExpiredError:
+            raise
+        except CircuitOpenError as e:
+            self._circuit_open(e)
+            self._unfinished.append((comment_id, cursor))
+            return
+        except Exception as e:
+            print(f"[Harvester] Error fetching sub comments of {comment_id}: {e}")
+            self._errors += 1
+            self._unfinished.append((comment_id, cursor))
+            return
+
+        for raw in page.get("comments", []):
+            self._add(raw, parent_id=comment_id)
+        next_cursor = page.get("cursor", "")
+        if page.get("has_more") and next_cursor:
+            await self._put_thread(comment_id, next_cursor)
+
+    async def run(self) -> Dict:
+        """执行抓取，返回紧凑结果和 checkpoint"""
+        start = time.monotonic()
+        if self.max_seconds is not None:
+            self._deadline = start + self.max_seconds
+
+        tasks = [asyncio.create_task(self._walk_top_level())]
+        tasks += [asyncio.create_task(self._thread_worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        self._unfinished.extend(self._pending)
+        self._pending.clear()
+
+        complete = not self._top_has_more and not self._unfinished
+        result = {
+            "note_id": self.note_id,
+            "comments": self.comments,
+            "complete": complete,
+            "stop_reason": "" if complete else (self._stop_reason or "errors"),
+            "checkpoint": None if complete else self.checkpoint(),
+            "stats": {
+                "comments": len(self.comments),
+                "top_level": sum(1 for c in self.comments if not c.parent_id),
+                "requests": self._requests,
+                "errors": self._errors,
+                "elapsed_ms": round((time.monotonic() - start) * 1000, 2),
+            },
+        }
+        if not complete and self._stop_reason == "circuit_open":
+            result["retry_after"] = round(self._retry_after, 2)
+        return result
+
+    def checkpoint(self) -> Dict:
+        return {
+            "note_id": self.note_id,
+            "top_cursor": self._top_cursor,
+            "top_has_more": self._top_has_more,
+            "threads": [list(item) for item in self._unfinished],
+        }
@@ -0,0 +1,45 @@
+class CookieExpiredError(Exception):
+    """Cookie 失效异常"""
+    pass
+
+
+class CaptchaRequiredError(Exception):
+    """需要验证码（HTTP 471）"""
+
+    def __init__(self, verify_type: str = "", verify_uuid: str = ""):
+        self.verify_type = verify_type
+        self.verify_uuid = verify_uuid
+        super().__init__(f"Captcha required: Verifytype: {verify_type}, Verifyuuid: {verify_uuid}")
+
+
+class IPBlockedError(Exception):
+    """IP 被封（业务码 300012）"""
+    pass
+
+
+class ServerError(Exception):
+    """服务端错误（HTTP 5xx）"""
+
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+class DataFetchError(Exception):
+    """接口返回错误（其他 HTTP 状态码、无效 JSON、业务失败）"""
+    pass
+
+
+class SignPoolTimeoutError(Exception):
+    """等待签名页面超时（页面池中的页面全部在忙或不可用）"""
+    pass
+
+
+class CircuitOpenError(Exception):
+    """账号或代理的熔断器打开中，请求没有发出"""
+
+    def __init__(self, key: str, retry_after: float, reason: str = ""):
+        self.key = key
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(f"Circuit open for {key} ({reason or 'probing'}), retry after {retry_after:.1f}s")
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Tuple
 
 class SearchSortType(Enum):
     GENERAL = "general"
@@ -9,3 +10,19 @@ class SearchNoteType(Enum):
     ALL = 0
     VIDEO = 1
     IMAGE = 2
+
+# 接口参数中的排序和笔记类型名称（/search、/search/deep、/search/batch 和后台搜索任务共用）
+SEARCH_SORT_TYPES = {
+    "general": SearchSortType.GENERAL,
+    "popular": SearchSortType.MOST_POPULAR,
+    "latest": SearchSortType.LATEST,
+}
+SEARCH_NOTE_TYPES = {
+    "all": SearchNoteType.ALL,
+    "video": SearchNoteType.VIDEO,
+    "image": SearchNoteType.IMAGE,
+}
+
+def search_types(sort: str, note_type: str) -> Tuple[SearchSortType, SearchNoteType]:
+    """排序和笔记类型名称 -> 枚举，未知的名称使用默认值（综合、全部）"""
+    return SEARCH_SORT_TYPES.get(sort, SearchSortType.GENERAL), SEARCH_NOTE_TYPES.get(note_type, SearchNoteType.ALL)
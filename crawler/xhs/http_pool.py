@@ -0,0 +1,149 @@
+"""
+HTTP 连接池管理模块
+
+每次请求都新建 httpx.AsyncClient 会让每个请求都重新做 TCP + TLS 握手。这里为每条代理线路
+（没有代理时为直连）维护一个长期存活的 AsyncClient：
+
+1. Keep-Alive 连接复用，安装了 h2 时启用 HTTP/2 多路复用
+2. 连接池上限可配置（max_connections / max_keepalive_connections / keepalive_expiry）
+3. 长时间没有使用的代理线路自动关闭
+4. 统计请求数和新建连接数，用来确认握手次数是否接近零
+"""
+import asyncio
+import importlib.util
+import time
+from typing import Dict, Optional
+
+import httpx
+
+DIRECT_ROUTE = "direct"
+
+
+def _h2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class _Route:
+    __slots__ = ("client", "last_used", "inflight", "requests", "connections")
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.last_used = time.monotonic()
+        self.inflight = 0
+        self.requests = 0
+        self.connections = 0
+
+
+class HttpClientPool:
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        idle_timeout: float = 300.0,
+    ):
+        """
+        Args:
+            http2: 是否启用 HTTP/2（需要安装 h2，未安装时自动退回 HTTP/1.1）
+            max_connections: 每条线路的最大连接数
+            max_keepalive_connections: 每条线路保持的空闲连接数
+            keepalive_expiry: 空闲连接保持时间（秒）
+            idle_timeout: 线路多久没有请求后关闭整个客户端（秒）
+        """
+        self.http2 = http2 and _h2_available()
+        if http2 and not self.http2:
+            print("[HttpPool] h2 not installed, falling back to HTTP/1.1 (pip install 'httpx[http2]')")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.idle_timeout = idle_timeout
+        self._routes: Dict[str, _Route] = {}
+        self._evicted = 0
+        self._closed_requests = 0
+        self._closed_connections = 0
+        # 关闭空闲线路的后台任务，保留引用避免被回收
+        self._close_tasks = set()
+
+    def _get_route(self, proxy_url: Optional[str]) -> _Route:
+        key = proxy_url or DIRECT_ROUTE
+        route = self._routes.get(key)
+        if route is None:
+            client_kwargs = {"http2": self.http2, "limits": self.limits}
+            if proxy_url:
+                client_kwargs["proxy"] = proxy_url
+            route = _Route(httpx.AsyncClient(**client_kwargs))
+            self._routes[key] = route
+        self._evict_idle(keep=key)
+        return route
+
+    def _evict_idle(self, keep: str):
+        now = time.monotonic()
+        for key, route in list(self._routes.items()):
+            if key == keep or route.inflight or now - route.last_used < self.idle_timeout:
+                continue
+            del self._routes[key]
+            self._evicted += 1
+            self._closed_requests += route.requests
+            self._closed_connections += route.connections
+            task = asyncio.create_task(self._close_route(key, route))
+            self._close_tasks.add(task)
+            task.add_done_callback(self._close_tasks.discard)
+
+    @staticmethod
+    async def _close_route(key: str, route: _Route):
+        try:
+            await route.client.aclose()
+            print(f"[HttpPool] Closed idle route: {key[:30]}...")
+        except Exception as e:
+            print(f"[HttpPool] Error closing idle route {key[:30]}...: {e}")
+
+    async def request(self, method: str, url: str, proxy_url: Optional[str] = None, **kwargs) -> httpx.Response:
+        """通过对应线路的长连接客户端发送请求
+
+        Args:
+            method: 请求方法
+            url: 完整 URL
+            proxy_url: 代理地址，不传则直连
+            **kwargs: 透传给 httpx.AsyncClient.request
+        """
+        route = self._get_route(proxy_url)
+
+        async def trace(event_name: str, info: Dict):
+            # 只有新建连接时才会触发 connect_tcp，复用连接时不会
+            if event_name == "connection.connect_tcp.complete":
+                route.connections += 1
+
+        route.inflight += 1
+        route.requests += 1
+        try:
+            return await route.client.request(method, url, extensions={"trace": trace}, **kwargs)
+        finally:
+            route.inflight -= 1
+            route.last_used = time.monotonic()
+
+    def get_stats(self) -> Dict:
+        """获取连接复用统计"""
+        requests = self._closed_requests + sum(r.requests for r in self._routes.values())
+        connections = self._closed_connections + sum(r.connections for r in self._routes.values())
+        return {
+            "http2": self.http2,
+            "routes": len(self._routes),
+            "evicted_routes": self._evicted,
+            "requests": requests,
+            "connections_opened": connections,
+            "reused_requests": max(requests - connections, 0),
+            "handshakes_per_request": round(connections / requests, 4) if requests else 0.0,
+        }
+
+    async def close(self):
+        """关闭所有线路的客户端"""
+        routes = list(self._routes.values())
+        self._routes.clear()
+        for route in routes:
+            await route.client.aclose()
+        if self._close_tasks:
+            await asyncio.gather(*self._close_tasks, return_exceptions=True)
+        print(f"[HttpPool] Closed {len(routes)} routes")
@@ -0,0 +1,472 @@
+"""
+抓取任务队列
+
+长时间的抓取（多关键词搜索、多个用户的全部笔记、大批量笔记详情、全量评论）如果在一个
+HTTP 请求里完成，会因为超时或服务重启而中断，而且无法继续。这里把它们做成后台任务：
+
+1. 任务、进度、游标 checkpoint 和结果都保存在本地 SQLite（cache/xhs_jobs.db）
+2. 后台 worker 共用同一个 XiaoHongShuClient（签名池、连接池）
+3. 结果保存前用 normalizer 规整，格式与对应的同步接口一致
+4. 每一步的结果和新的 checkpoint 在同一个事务里写入，重启后从 checkpoint 继续，不会重复或丢失
+5. 结果按 seq 递增编号，调用方可以从任意 seq 之后继续读取（流式跟随）
+6. 账号或代理熔断时任务回到 pending，冷却结束后自动从 checkpoint 继续
+
+任务类型：
+- search:     {"keywords": [...], "max_pages": 5, "page_size": 20, "sort": "general", "note_type": "all"}
+- user_notes: {"user_ids": [...], "max_notes": 200}
+- notes:      {"notes": [{"note_id", "xsec_token", "xsec_source"}, ...], "max_concurrency": 4}
+- comments:   {"notes": [{"note_id", "xsec_token"}, ...], "max_comments": 5000, "concurrency": 5}
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .cache import CACHE_DIR
+from .client import SIGN_BATCH_SIZE
+from .exception import CircuitOpenError, CookieExpiredError
+from .field import search_types
+from .help import get_search_id
+from .normalizer import NOTE_URL_BATCH_FIELDS, NoteCard, note_detail
+
+JOB_DB_FILE = os.path.join(CACHE_DIR, "xhs_jobs.db")
+
+JOB_KINDS = ("search", "user_notes", "notes", "comments")
+
+# 任务状态
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+# 评论任务每一步最多发出的请求数，每步结束时保存一次 checkpoint
+COMMENT_STEP_REQUESTS = 50
+
+# 每一步产出：(新结果列表, 新 checkpoint, 进度)
+JobStep = Tuple[List[Dict], Dict, Dict]
+
+
+class JobStore:
+    """任务持久化（SQLite，单连接）
+
+    每次写入都很小（一页结果 + checkpoint），直接在事件循环中执行。
+    """
+
+    def __init__(self, db_file: str = JOB_DB_FILE):
+        os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                checkpoint TEXT NOT NULL DEFAULT '{}',
+                progress TEXT NOT NULL DEFAULT '{}',
+                result_count INTEGER NOT NULL DEFAULT 0,
+                error TEXT NOT NULL DEFAULT '',
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                item TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+            """
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict:
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "params": json.loads(row["params"]),
+            "status": row["status"],
+            "checkpoint": json.loads(row["checkpoint"]),
+            "progress": json.loads(row["progress"]),
+            "result_count": row["result_count"],
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def create(self, kind: str, params: Dict) -> Dict:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params, ensure_ascii=False), PENDING, now, now),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        if status:
+            rows = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+            )
+        else:
+            rows = self.conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+        return [self._row_to_job(row) for row in rows]
+
+    def pending_ids(self) -> List[str]:
+        rows = self.conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (PENDING,))
+        return [row["id"] for row in rows]
+
+    def set_status(self, job_id: str, status: str, error: str = ""):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id),
+            )
+
+    def requeue_interrupted(self) -> int:
+        """服务重启时，把上次中断在 running 状态的任务放回 pending"""
+        with self.conn:
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?", (PENDING, time.time(), RUNNING)
+            )
+        return cur.rowcount
+
+    def save_step(self, job_id: str, items: List[Dict], checkpoint: Dict, progress: Dict) -> int:
+        """在同一个事务里追加结果并更新 checkpoint，返回结果总数"""
+        with self.conn:
+            row = self.conn.execute("SELECT result_count FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            count = row["result_count"] if row else 0
+            self.conn.executemany(
+                "INSERT INTO job_results (job_id, seq, item) VALUES (?, ?, ?)",
+                [(job_id, count + i + 1, json.dumps(item, ensure_ascii=False)) for i, item in enumerate(items)],
+            )
+            count += len(items)
+            self.conn.execute(
+                "UPDATE jobs SET checkpoint = ?, progress = ?, result_count = ?, updated_at = ? WHERE id = ?",
+                (
+                    json.dumps(checkpoint, ensure_ascii=False),
+                    json.dumps(progress, ensure_ascii=False),
+                    count,
+                    time.time(),
+                    job_id,
+                ),
+            )
+        return count
+
+    def results(self, job_id: str, after: int = 0, limit: int = 500) -> List[Tuple[int, Dict]]:
+        rows = self.conn.execute(
+            "SELECT seq, item FROM job_results WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (job_id, after, limit),
+        )
+        return [(row["seq"], json.loads(row["item"])) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+class JobManager:
+    def __init__(self, client, store: Optional[JobStore] = None, workers: int = 2):
+        """
+        Args:
+            client: XiaoHongShuClient，所有 worker 共用
+            store: 任务持久化，默认使用 cache/xhs_jobs.db
+            workers: 同时运行的任务数
+        """
+        self.client = client
+        self.store = store or JobStore()
+        self.workers = max(1, workers)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._cancelled = set()
+        # 有新结果或状态变化时通知正在跟随结果的调用方
+        self._changed = asyncio.Condition()
+
+    async def start(self):
+        """启动 worker，并恢复上次未完成的任务"""
+        requeued = self.store.requeue_interrupted()
+        pending = self.store.pending_ids()
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        print(f"[Jobs] Started {self.workers} workers, resumed {len(pending)} pending jobs ({requeued} interrupted)")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # 正在运行的任务保持 running 状态，下次启动时由 requeue_interrupted 恢复
+        self.store.close()
+
+    def submit(self, kind: str, params: Dict) -> Dict:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = self.store.create(kind, params)
+        self._queue.put_nowait(job["id"])
+        print(f"[Jobs] Submitted {kind} job {job['id']}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        return self.store.list(status, limit)
+
+    async def cancel(self, job_id: str) -> Optional[Dict]:
+        """取消任务：pending 的任务直接标记，running 的任务在当前步骤结束后停止"""
+        job = self.store.get(job_id)
+        if not job or job["status"] in FINISHED_STATUSES:
+            return job
+        self._cancelled.add(job_id)
+        if job["status"] == PENDING:
+            self.store.set_status(job_id, CANCELLED)
+        await self._notify()
+        return self.store.get(job_id)
+
+    async def resume(self, job_id: str) -> Optional[Dict]:
+        """重新排队失败或取消的任务，从保存的 checkpoint 继续"""
+        job = self.store.get(job_id)
+        if not job or job["status"] not in (FAILED, CANCELLED):
+            return job
+        self._cancelled.discard(job_id)
+        self.store.set_status(job_id, PENDING)
+        self._queue.put_nowait(job_id)
+        return self.store.get(job_id)
+
+    async def follow(
+        self,
+        job_id: str,
+        after: int = 0,
+        wait: bool = True,
+        poll_interval: float = 5.0,
+    ) -> AsyncIterator[Tuple[int, Dict]]:
+        """分页读取 seq 之后的结果
+
+        Args:
+            job_id: 任务ID
+            after: 从该 seq 之后开始
+            wait: 读完已有结果后，任务未结束时是否继续等待新结果
+            poll_interval: 等待通知的最长间隔（秒）
+        """
+        while True:
+            job = self.store.get(job_id)
+            if job is None:
+                return
+            rows = self.store.results(job_id, after)
+            for seq, item in rows:
+                yield seq, item
+                after = seq
+            if rows:
+                continue
+            if not wait or job["status"] in FINISHED_STATUSES:
+                return
+            async with self._changed:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _requeue(self, job_id: str):
+        job = self.store.get(job_id)
+        if job and job["status"] == PENDING and job_id not in self._cancelled:
+            self._queue.put_nowait(job_id)
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Jobs] Worker error on job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str):
+        job = self.store.get(job_id)
+        if not job or job["status"] != PENDING:
+            return
+        if job_id in self._cancelled:
+            self._cancelled.discard(job_id)
+            self.store.set_status(job_id, CANCELLED)
+            return
+
+        self.store.set_status(job_id, RUNNING)
+        await self._notify()
+        print(f"[Jobs] Running {job['kind']} job {job_id} from checkpoint {job['checkpoint']}")
+
+        runner = getattr(self, f"_run_{job['kind']}")
+        status, error, retry_after = DONE, "", 0.0
+        try:
+            async for items, checkpoint, progress in runner(job["params"], job["checkpoint"]):
+                self.store.save_step(job_id, items, checkpoint, progress)
+                await self._notify()
+                if job_id in self._cancelled:
+                    status = CANCELLED
+                    break
+        except CookieExpiredError:
+            status, error = FAILED, "COOKIE_EXPIRED"
+        except CircuitOpenError as e:
+            retry_after = max(e.retry_after, 1.0)
+            status, error = PENDING, f"CIRCUIT_OPEN: {e.key}, retry in {retry_after:.0f}s"
+        except Exception as e:
+            status, error = FAILED, str(e)
+
+        # 运行中被取消时，除已完成外的任何结束方式都记为 cancelled，熔断后不再排队，重启后也不会恢复
+        if job_id in self._cancelled:
+            self._cancelled.discard(job_id)
+            if status != DONE:
+                status, error = CANCELLED, ""
+
+        self.store.set_status(job_id, status, error)
+        if status == PENDING:
+            asyncio.get_running_loop().call_later(retry_after, self._requeue, job_id)
+            print(f"[Jobs] Job {job_id} paused for {retry_after:.1f}s: {error}")
+        elif status == CANCELLED:
+            print(f"[Jobs] Cancelled job {job_id} after {self.store.get(job_id)['result_count']} results")
+        elif error == "COOKIE_EXPIRED":
+            print(f"[Jobs] Job {job_id} stopped: cookie expired")
+        elif status == FAILED:
+            print(f"[Jobs] Job {job_id} failed: {error}")
+        else:
+            print(f"[Jobs] Job {job_id} done")
+        await self._notify()
+
+    async def _run_search(self, params: Dict, checkpoint: Dict) -> AsyncIterator[JobStep]:
+        keywords: List[str] = params.get("keywords", [])
+        max_pages = params.get("max_pages", 5)
+        page_size = params.get("page_size", 20)
+        sort, note_type = search_types(params.get("sort", "general"), params.get("note_type", "all"))
+
+        index = checkpoint.get("keyword_index", 0)
+        page = checkpoint.get("page", 1)
+        search_id = checkpoint.get("search_id") or get_search_id()
+        while index < len(keywords):
+            keyword = keywords[index]
+            result = await self.client.get_note_by_keyword(
+                keyword=keyword,
+                search_id=search_id,
+                page=page,
+                page_size=page_size,
+                sort=sort,
+                note_type=note_type,
+            )
+            items = result.get("items", []) or (result.get("data") or {}).get("items", [])
+            if result.get("has_more") and items and page < max_pages:
+                page += 1
+            else:
+                index, page, search_id = index + 1, 1, get_search_id()
+            yield (
+                [{"keyword": keyword, "item": card.to_dict()} for card in map(NoteCard.from_item, items) if card],
+                {"keyword_index": index, "page": page, "search_id": search_id},
+                {"keywords_done": index, "keywords_total": len(keywords)},
+            )
+
+    async def _run_user_notes(self, params: Dict, checkpoint: Dict) -> AsyncIterator[JobStep]:
+        user_ids: List[str] = params.get("user_ids", [])
+        max_notes = params.get("max_notes", 200)
+
+        index = checkpoint.get("user_index", 0)
+        cursor = checkpoint.get("cursor", "")
+        fetched = checkpoint.get("fetched", 0)
+        while index < len(user_ids):
+            user_id = user_ids[index]
+            result = await self.client.get_user_notes(user_id=user_id, cursor=cursor, num=30)
+            items = (result.get("notes", []) or (result.get("data") or {}).get("notes", []))[:max_notes - fetched]
+            fetched += len(items)
+            cursor = result.get("cursor", "")
+            if not (result.get("has_more") and cursor and items and fetched < max_notes):
+                index, cursor, fetched = index + 1, "", 0
+            yield (
+                [
+                    {"user_id": user_id, "item": card.to_dict()}
+                    for card in (NoteCard.from_item(item, user_id) for item in items)
+                    if card
+                ],
+                {"user_index": index, "cursor": cursor, "fetched": fetched},
+                {"users_done": index, "users_total": len(user_ids)},
+            )
+
+    async def _run_notes(self, params: Dict, checkpoint: Dict) -> AsyncIterator[JobStep]:
+        note_infos: List[Dict] = params.get("notes", [])
+        max_concurrency = params.get("max_concurrency", 4)
+        chunk_size = max(SIGN_BATCH_SIZE, max_concurrency)
+
+        offset = checkpoint.get("offset", 0)
+        failed = checkpoint.get("failed", 0)
+        while offset < len(note_infos):
+            chunk = note_infos[offset:offset + chunk_size]
+            results = await self.client.get_notes_by_ids(chunk, max_concurrency=max_concurrency)
+            items = []
+            for info, result in zip(chunk, results):
+                if isinstance(result, (CookieExpiredError, CircuitOpenError)):
+                    # 这一块不保存，恢复后从 offset 重新开始
+                    raise result
+                if isinstance(result, Exception) or not result:
+                    failed += 1
+                    items.append({"note_id": info.get("note_id", ""), "error": str(result) if result else "Note not found"})
+                else:
+                    items.append({
+                        "note_id": info.get("note_id", ""),
+                        "item": note_detail(result, info.get("note_id", ""), info.get("xsec_token", ""), NOTE_URL_BATCH_FIELDS),
+                    })
+            offset += len(chunk)
+            yield (
+                items,
+                {"offset": offset, "failed": failed},
+                {"notes_done": offset, "notes_total": len(note_infos), "failed": failed},
+            )
+
+    async def _run_comments(self, params: Dict, checkpoint: Dict) -> AsyncIterator[JobStep]:
+        note_infos: List[Dict] = params.get("notes", [])
+        max_comments = params.get("max_comments", 5000)
+        concurrency = params.get("concurrency", 5)
+
+        index = checkpoint.get("note_index", 0)
+        harvest_checkpoint: Optional[Dict] = checkpoint.get("harvest")
+        fetched = checkpoint.get("fetched", 0)
+        while index < len(note_infos):
+            info = note_infos[index]
+            note_id = info.get("note_id", "")
+            result = await self.client.harvest_comments(
+                note_id=note_id,
+                xsec_token=info.get("xsec_token", ""),
+                concurrency=concurrency,
+                max_comments=max_comments - fetched,
+                max_requests=COMMENT_STEP_REQUESTS,
+                checkpoint=harvest_checkpoint,
+            )
+            fetched += len(result["comments"])
+            # 只有请求预算用完或熔断才在下一步继续这篇笔记；数量上限或出错则换下一篇
+            circuit_open = result["stop_reason"] == "circuit_open"
+            if result["complete"] or result["stop_reason"] not in ("max_requests", "circuit_open") or fetched >= max_comments:
+                index, harvest_checkpoint, fetched = index + 1, None, 0
+            else:
+                harvest_checkpoint = result["checkpoint"]
+            yield (
+                [{"note_id": note_id, "item": c.to_dict()} for c in result["comments"]],
+                {"note_index": index, "harvest": harvest_checkpoint, "fetched": fetched},
+                {"notes_done": index, "notes_total": len(note_infos)},
+            )
+            if circuit_open and harvest_checkpoint is not None:
+                # 已抓到的评论随上一步保存，冷却结束后从 checkpoint 继续
+                raise CircuitOpenError(f"comments:{note_id}", result.get("retry_after", 0.0), "circuit_open")
@@ -0,0 +1,88 @@
+// 签名 worker：在 Node 的 vm 沙箱里加载提取出来的签名脚本，按行收发 JSON。
+//
+// 用法: node sign_worker.cjs <签名脚本路径>
+// 启动后输出一行握手信息 {"ready": true|false, "error"?: string}，
+// 之后每读入一行 {"id", "pairs": [[sign_str, md5], ...], "local_storage"?: {...}}，输出一行 {"id", "b1", "x3": [...]}。
+// 带 local_storage 时先用它替换沙箱中 localStorage 的内容（Cookie 变化后更新 b1）。
+const fs = require('fs');
+const vm = require('vm');
+const readline = require('readline');
+
+const scriptPath = process.argv[2];
+
+const storage = new Map(Object.entries(JSON.parse(process.env.XHS_SIGN_LOCALSTORAGE || '{}')));
+const localStorage = {
+    getItem: (key) => (storage.has(key) ? storage.get(key) : null),
+    setItem: (key, value) => storage.set(key, String(value)),
+    removeItem: (key) => storage.delete(key),
+    clear: () => storage.clear(),
+};
+
+// 签名脚本只依赖少量浏览器全局对象，这里提供最小的替身
+const sandbox = {
+    localStorage,
+    navigator: {
+        userAgent: 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        platform: 'MacIntel',
+        language: 'zh-CN',
+    },
+    location: {
+        href: 'https://www.xiaohongshu.com/explore',
+        host: 'www.xiaohongshu.com',
+        hostname: 'www.xiaohongshu.com',
+        origin: 'https://www.xiaohongshu.com',
+        protocol: 'https:',
+        pathname: '/explore',
+    },
+    document: { cookie: '' },
+    // stdout 是 JSON 行协议，脚本里的 console 输出一律写到 stderr
+    console: new console.Console(process.stderr),
+    setTimeout,
+    clearTimeout,
+    setInterval,
+    clearInterval,
+};
+sandbox.window = sandbox;
+sandbox.self = sandbox;
+sandbox.globalThis = sandbox;
+
+const write = (message) => process.stdout.write(JSON.stringify(message) + '\n');
+
+const context = vm.createContext(sandbox);
+try {
+    vm.runInContext(fs.readFileSync(scriptPath, 'utf8'), context, { filename: scriptPath });
+} catch (e) {
+    write({ ready: false, error: `failed to load ${scriptPath}: ${e.message}` });
+    process.exit(1);
+}
+if (typeof context.mnsv2 !== 'function') {
+    write({ ready: false, error: 'window.mnsv2 is not defined by the script' });
+    process.exit(1);
+}
+write({ ready: true });
+
+const rl = readline.createInterface({ input: process.stdin, terminal: false });
+rl.on('line', (line) => {
+    if (!line.trim()) return;
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (e) {
+        console.error(`[sign_worker] bad request line: ${e.message}`);
+        return;
+    }
+    const { id, pairs } = request;
+    if (request.local_storage) {
+        storage.clear();
+        for (const [key, value] of Object.entries(request.local_storage)) storage.set(key, String(value));
+    }
+    const x3 = pairs.map(([signStr, md5]) => {
+        try {
+            return context.mnsv2(signStr, md5) || '';
+        } catch (e) {
+            return '';
+        }
+    });
+    write({ id, b1: localStorage.getItem('b1') || '', x3 });
+});
+rl.on('close', () => process.exit(0));
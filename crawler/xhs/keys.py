@@ -0,0 +1,34 @@
+"""
+限速桶和熔断器的键
+
+RateLimiter 和 CircuitBreaker 都按 (类型, 名称) 区分账号和代理线路，名称是完整的 a1 或代理地址：
+
+- key_id：统计和接口中使用的 ID，由完整名称计算，a1 前缀相同的两个账号、同一地址不同账号密码的
+  代理不会混在一起，也不暴露 a1 和代理密码
+- key_label：只用于显示的名称（代理去掉账号密码，a1 只显示前 8 位），不同的键可能相同
+"""
+import hashlib
+from typing import Tuple
+from urllib.parse import urlparse
+
+Key = Tuple[str, str]
+
+
+def key_label(kind: str, name: str) -> str:
+    """统计和日志中显示的名称"""
+    if kind == "endpoint":
+        return name
+    if kind == "proxy" and name != "direct":
+        parsed = urlparse(name)
+        name = f"{parsed.hostname}:{parsed.port}" if parsed.hostname else name
+    elif kind == "account":
+        name = name[:8]
+    return f"{kind}:{name}"
+
+
+def key_id(key: Key) -> str:
+    """由完整名称计算的 ID（如 account:3f1c9a0b2d4e），接口名没有敏感信息，直接使用（如 endpoint:search）"""
+    kind, name = key
+    if kind == "endpoint":
+        return f"{kind}:{name}"
+    return f"{kind}:{hashlib.sha256(name.encode('utf-8')).hexdigest()[:12]}"
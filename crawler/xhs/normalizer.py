@@ -0,0 +1,246 @@
+"""
+接口数据规整
+
+搜索、笔记详情、批量笔记、用户主页、评论等接口返回的原始字典结构各不相同，这里统一转成
+紧凑的 __slots__ 模型，各接口只选择需要输出的字段：
+
+1. 每个嵌套字典（user / interact_info / cover / video）只取一次，不重复链式 .get()
+2. 模型只保存需要的字段，原始字典可以立即丢弃
+3. 输出字段和顺序由各接口的字段元组决定，与原有接口返回格式保持一致
+4. dumps 优先使用 orjson（pip install orjson），未安装时退回标准库 json
+"""
+import json
+from operator import attrgetter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_EMPTY: Dict = {}
+
+
+def dumps(obj) -> bytes:
+    """序列化为 UTF-8 JSON（中文不转义）"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _user(raw: Optional[Dict], default_user_id: str = "") -> Dict:
+    raw = raw or _EMPTY
+    return {
+        "user_id": raw.get("user_id", default_user_id),
+        "nickname": raw.get("nickname", ""),
+        "avatar": raw.get("avatar", "") or raw.get("image", ""),
+    }
+
+
+def _image_url(image) -> str:
+    if isinstance(image, dict):
+        return image.get("url_default", "") or image.get("url", "")
+    return image or ""
+
+
+def _video_url(video: Optional[Dict]) -> str:
+    if not video:
+        return ""
+    h264 = ((video.get("media") or _EMPTY).get("stream") or _EMPTY).get("h264")
+    return h264[0].get("master_url", "") if h264 else ""
+
+
+# fields 元组 -> 一次取出全部字段的 attrgetter
+_getters: Dict[Tuple[str, ...], attrgetter] = {}
+
+
+class _Model:
+    __slots__ = ()
+
+    def to_dict(self, fields: Optional[Sequence[str]] = None) -> Dict:
+        """按 fields 的顺序输出字段，默认输出全部"""
+        fields = tuple(fields or self.__slots__)
+        getter = _getters.get(fields)
+        if getter is None:
+            getter = _getters[fields] = attrgetter(*fields)
+        return dict(zip(fields, getter(self)))
+
+
+class NoteCard(_Model):
+    """列表中的笔记卡片（搜索结果、用户主页笔记）"""
+
+    __slots__ = ("id", "xsec_token", "title", "desc", "type", "user", "cover", "liked_count")
+
+    @classmethod
+    def from_item(cls, item: Dict, default_user_id: str = "") -> Optional["NoteCard"]:
+        """
+        Args:
+            item: 列表中的一项，笔记数据在 note_card 中或直接在 item 上
+            default_user_id: 笔记中没有作者ID时使用的值（用户主页）
+        """
+        note = item.get("note_card") or item
+        if not note:
+            return None
+        self = cls()
+        self.id = item.get("id", "") or note.get("note_id", "")
+        self.xsec_token = item.get("xsec_token", "")
+        self.title = note.get("display_title", "") or note.get("title", "")
+        self.desc = note.get("desc", "")
+        self.type = note.get("type", "")
+        self.user = _user(note.get("user") or item.get("user"), default_user_id)
+        self.cover = _image_url(note.get("cover"))
+        self.liked_count = (note.get("interact_info") or _EMPTY).get("liked_count", "0")
+        return self
+
+
+class NoteDetail(_Model):
+    """笔记详情（/note/detail、/notes/by-ids、/notes/from-urls）"""
+
+    __slots__ = (
+        "id",
+        "xsec_token",
+        "title",
+        "desc",
+        "type",
+        "user",
+        "cover",
+        "images",
+        "video_url",
+        "liked_count",
+        "collected_count",
+        "comment_count",
+        "share_count",
+        "time",
+        "tag_list",
+    )
+
+    @classmethod
+    def from_card(cls, result: Dict, note_id: str = "", xsec_token: str = "") -> "NoteDetail":
+        """
+        Args:
+            result: get_note_by_id 返回的 note_card
+            note_id: 请求的笔记ID（note_card 中没有 note_id 时使用）
+            xsec_token: 请求时使用的安全令牌
+        """
+        interact_info = result.get("interact_info") or _EMPTY
+        images = []
+        for image in result.get("image_list") or ():
+            url = _image_url(image)
+            if url:
+                images.append(url)
+
+        self = cls()
+        self.id = result.get("note_id", note_id)
+        self.xsec_token = xsec_token
+        self.title = result.get("title", result.get("display_title", ""))
+        self.desc = result.get("desc", "")
+        self.type = result.get("type", "")
+        self.user = _user(result.get("user"))
+        self.cover = images[0] if images else ""
+        self.images = images
+        self.video_url = _video_url(result.get("video"))
+        self.liked_count = interact_info.get("liked_count", "0")
+        self.collected_count = interact_info.get("collected_count", "0")
+        self.comment_count = interact_info.get("comment_count", "0")
+        self.share_count = interact_info.get("share_count", "0")
+        self.time = result.get("time", 0)
+        self.tag_list = [t.get("name", "") for t in result.get("tag_list") or ()]
+        return self
+
+
+class UserProfile(_Model):
+    __slots__ = ("user_id", "nickname", "desc", "avatar", "followers", "followed", "notes_count", "liked_count")
+
+    @classmethod
+    def from_result(cls, result: Dict, user_id: str = "") -> "UserProfile":
+        """
+        Args:
+            result: get_user_info 的返回值，用户数据可能在 user / data 中
+            user_id: 返回值中没有用户ID时使用的值
+        """
+        data = result.get("user") or result.get("data") or result
+        self = cls()
+        self.user_id = data.get("user_id", user_id)
+        self.nickname = data.get("nickname", "")
+        self.desc = data.get("desc", "")
+        self.avatar = data.get("avatar", "") or data.get("image", "")
+        self.followers = data.get("followers", 0) or data.get("fans", 0)
+        self.followed = data.get("followed", 0) or data.get("follows", 0)
+        self.notes_count = data.get("notes_count", 0) or data.get("notes", 0)
+        self.liked_count = data.get("liked_count", 0) or data.get("likes", 0)
+        return self
+
+
+class Comment(_Model):
+    __slots__ = (
+        "id",
+        "content",
+        "user",
+        "like_count",
+        "create_time",
+        "sub_comment_count",
+        "sub_comments",
+        "sub_comments_error",
+        "reply_to_user",
+    )
+
+    @classmethod
+    def from_raw(cls, raw: Dict, with_sub_comments: bool = True) -> "Comment":
+        """
+        Args:
+            raw: 接口返回的一条评论
+            with_sub_comments: 是否规整其中的二级评论
+        """
+        reply_to = raw.get("reply_to_user")
+        self = cls()
+        self.id = raw.get("id", "")
+        self.content = raw.get("content", "")
+        self.user = _user(raw.get("user_info"))
+        self.like_count = raw.get("like_count", 0)
+        self.create_time = raw.get("create_time", 0)
+        self.sub_comment_count = raw.get("sub_comment_count", 0)
+        self.sub_comments = [
+            cls.from_raw(sub, with_sub_comments=False).to_dict(SUB_COMMENT_FIELDS)
+            for sub in raw.get("sub_comments") or ()
+        ] if with_sub_comments else []
+        self.sub_comments_error = raw.get("sub_comments_error", "")
+        self.reply_to_user = reply_to.get("nickname", "") if reply_to else ""
+        return self
+
+
+# 各接口输出的字段（顺序即输出顺序）
+NOTE_DETAIL_FIELDS: Tuple[str, ...] = (
+    "id", "title", "desc", "type", "user", "images", "video_url",
+    "liked_count", "collected_count", "comment_count", "share_count", "time", "tag_list",
+)
+NOTE_BATCH_FIELDS: Tuple[str, ...] = (
+    "id", "xsec_token", "title", "desc", "type", "user", "cover", "images",
+    "liked_count", "collected_count", "comment_count", "time", "tag_list",
+)
+NOTE_URL_BATCH_FIELDS: Tuple[str, ...] = NoteDetail.__slots__
+COMMENT_FIELDS: Tuple[str, ...] = (
+    "id", "content", "user", "like_count", "create_time", "sub_comment_count", "sub_comments", "sub_comments_error",
+)
+SUB_COMMENT_FIELDS: Tuple[str, ...] = ("id", "content", "user", "like_count", "create_time", "reply_to_user")
+
+
+def note_cards(items: List[Dict], default_user_id: str = "") -> List[Dict]:
+    """规整笔记列表（搜索结果、用户主页笔记）"""
+    cards = []
+    for item in items:
+        card = NoteCard.from_item(item, default_user_id)
+        if card is not None:
+            cards.append(card.to_dict())
+    return cards
+
+
+def note_detail(result: Dict, note_id: str = "", xsec_token: str = "", fields: Sequence[str] = NOTE_DETAIL_FIELDS) -> Dict:
+    return NoteDetail.from_card(result, note_id, xsec_token).to_dict(fields)
+
+
+def user_profile(result: Dict, user_id: str = "") -> Dict:
+    return UserProfile.from_result(result, user_id).to_dict()
+
+
+def comments(raw_comments: List[Dict], with_sub_comments: bool = True) -> List[Dict]:
+    return [Comment.from_raw(raw, with_sub_comments).to_dict(COMMENT_FIELDS) for raw in raw_comments]
@@ -0,0 +1,128 @@
+"""
+分页迭代
+
+把"请求一页 -> 取出列表 -> 拿到下一页游标"的循环封装成异步生成器：
+
+1. 惰性产出：调用方逐条消费，内存中最多只有当前页和预取的下一页
+2. 预取：产出当前页之前先发出下一页请求，网络等待与调用方处理重叠
+3. 提前结束：达到 limit 条或 stop_when(item) 为真时停止，未完成的预取请求会被取消
+
+页码分页（搜索）的下一页不依赖上一页的结果，fetch_numbered_pages 同时请求后面的多页，
+但仍按页码顺序产出。
+"""
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# extract(page, token) -> (items, next_token, has_more)
+PageExtractor = Callable[[Dict, Any], Tuple[List, Any, bool]]
+
+
+async def paginate(
+    fetch_page: Callable[[Any], Awaitable[Dict]],
+    extract: PageExtractor,
+    start: Any,
+    limit: Optional[int] = None,
+    stop_when: Optional[Callable[[Any], bool]] = None,
+    prefetch: bool = True,
+) -> AsyncIterator[Any]:
+    """
+    Args:
+        fetch_page: 根据游标（或页码）请求一页
+        extract: 从一页结果中取出 (条目列表, 下一页游标, 是否还有下一页)
+        start: 第一页的游标（或页码）
+        limit: 最多产出的条目数
+        stop_when: 对条目返回 True 时停止（该条目不会产出）
+        prefetch: 是否在产出当前页时预取下一页
+    """
+    if limit is not None and limit <= 0:
+        return
+
+    token = start
+    task: Optional[asyncio.Future] = asyncio.ensure_future(fetch_page(token))
+    produced = 0
+    try:
+        while task is not None:
+            page = await task
+            task = None
+            items, next_token, has_more = extract(page or {}, token)
+            has_more = has_more and bool(items)
+
+            # 本页就能满足 limit 时不再预取
+            need_more = limit is None or produced + len(items) < limit
+            if has_more and prefetch and need_more:
+                task = asyncio.ensure_future(fetch_page(next_token))
+
+            for item in items:
+                if stop_when is not None and stop_when(item):
+                    return
+                yield item
+                produced += 1
+                if limit is not None and produced >= limit:
+                    return
+
+            if has_more and task is None and need_more:
+                task = asyncio.ensure_future(fetch_page(next_token))
+            token = next_token
+    finally:
+        if task is not None and not task.done():
+            task.cancel()
+
+
+async def fetch_numbered_pages(
+    fetch_page: Callable[[int], Awaitable[Dict]],
+    extract: PageExtractor,
+    first: int = 1,
+    max_pages: int = 5,
+    max_concurrency: int = 3,
+) -> AsyncIterator[Tuple[int, List, bool]]:
+    """并发请求第 first .. first+max_pages-1 页，按页码顺序产出 (页码, 条目列表, 是否还有下一页)
+
+    同时最多有 max_concurrency 页在请求中（当前等待的页和之后的几页）。某页没有更多结果时
+    停止，之后已发出的请求会被取消；某页请求失败时异常直接抛出。
+
+    Args:
+        fetch_page: 根据页码请求一页
+        extract: 从一页结果中取出 (条目列表, 下一页页码, 是否还有下一页)
+        first: 第一页页码
+        max_pages: 最多请求的页数
+        max_concurrency: 同时请求的页数
+    """
+    last = first + max_pages - 1
+    max_concurrency = max(1, max_concurrency)
+    tasks: Dict[int, asyncio.Future] = {}
+    next_page = first
+    try:
+        for page_no in range(first, last + 1):
+            while next_page <= last and len(tasks) < max_concurrency:
+                tasks[next_page] = asyncio.ensure_future(fetch_page(next_page))
+                next_page += 1
+            page = await tasks.pop(page_no)
+            items, _, has_more = extract(page or {}, page_no)
+            has_more = has_more and bool(items)
+            yield page_no, items, has_more
+            if not has_more:
+                return
+    finally:
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # 已完成但不再需要的页，取出异常避免 "exception was never retrieved"
+                task.exception()
+
+
+def cursor_extractor(list_key: str) -> PageExtractor:
+    """游标分页接口（评论、用户笔记）的 extract"""
+    def extract(page: Dict, token: Any) -> Tuple[List, Any, bool]:
+        items = page.get(list_key, []) or (page.get("data") or {}).get(list_key, [])
+        cursor = page.get("cursor", "")
+        return items, cursor, bool(page.get("has_more")) and bool(cursor)
+    return extract
+
+
+def page_number_extractor(list_key: str) -> PageExtractor:
+    """页码分页接口（搜索）的 extract"""
+    def extract(page: Dict, token: Any) -> Tuple[List, Any, bool]:
+        items = page.get(list_key, []) or (page.get("data") or {}).get(list_key, [])
+        return items, token + 1, bool(page.get("has_more"))
+    return extract
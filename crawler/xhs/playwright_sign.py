@@ -1,12 +1,13 @@
 import hashlib
 import json
 import time
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import quote
 
 from playwright.async_api import Page
 
-from .xhs_sign import b64_encode, encode_utf8, get_trace_id, mrc
+from .signer_state import PageSignerState
+from .xhs_sign import b64_encode_bytes, encode_utf8_bytes, get_trace_id, mrc_fast
 
 def _build_sign_string(uri: str, data: Optional[Union[Dict, str]] = None, method: str = "POST") -> str:
     if method.upper() == "POST":
@@ -48,7 +49,7 @@ def _build_xs_payload(x3_value: str, data_type: str = "object") -> str:
         "x3": x3_value,
         "x4": data_type,
     }
-    return "XYS_" + b64_encode(encode_utf8(json.dumps(s, separators=(",", ":"))))
+    return "XYS_" + b64_encode_bytes(encode_utf8_bytes(json.dumps(s, separators=(",", ":"))))
 
 def _build_xs_common(a1: str, b1: str, x_s: str, x_t: str) -> str:
     payload = {
@@ -63,37 +64,84 @@ def _build_xs_common(a1: str, b1: str, x_s: str, x_t: str) -> str:
         "x6": x_t,
         "x7": x_s,
         "x8": b1,
-        "x9": mrc(x_t + x_s + b1),
+        "x9": mrc_fast(x_t + x_s + b1),
         "x10": 154,
         "x11": "normal",
     }
-    return b64_encode(encode_utf8(json.dumps(payload, separators=(",", ":"))))
+    return b64_encode_bytes(encode_utf8_bytes(json.dumps(payload, separators=(",", ":"))))
+
+# 一次 evaluate 内完成 mnsv2 探测、读取 b1（按需）和批量签名；mnsv2 不存在时返回 null
+_SIGN_MANY_JS = """
+([pairs, needB1]) => {
+    if (typeof window.mnsv2 !== 'function') return null;
+    return {
+        b1: needB1 ? (window.localStorage.getItem('b1') || '') : null,
+        x3: pairs.map(([s, m]) => {
+            try { return window.mnsv2(s, m) || ''; } catch (e) { return ''; }
+        }),
+    };
+}
+"""
 
 async def get_b1_from_localstorage(page: Page) -> str:
     try:
-        local_storage = await page.evaluate("() => window.localStorage")
-        return local_storage.get("b1", "")
+        b1 = await page.evaluate("() => window.localStorage.getItem('b1')")
+        return b1 or ""
     except Exception:
         return ""
 
-async def call_mnsv2(page: Page, sign_str: str, md5_str: str) -> str:
-    sign_str_escaped = sign_str.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n")
-    md5_str_escaped = md5_str.replace("\\", "\\\\").replace("'", "\\'")
+async def call_mnsv2_many(
+    page: Page,
+    pairs: List[Tuple[str, str]],
+    state: Optional[PageSignerState] = None,
+) -> Tuple[str, List[str]]:
+    """一次 CDP 往返计算多个 x3 值
+
+    Args:
+        page: 已加载 mnsv2 的页面
+        pairs: (sign_str, md5_str) 列表
+        state: 页面状态缓存。传入时复用缓存的 b1，失败只标记失效、由后台恢复；
+            不传时每次读取 b1，mnsv2 丢失会在当前请求里重新加载页面
+
+    Returns:
+        (b1, x3 列表)，x3 与 pairs 一一对应，失败的项为空字符串
+    """
+    if not pairs:
+        return (state.b1 or "") if state else "", []
+    args = [[list(p) for p in pairs], state is None or state.b1 is None]
     try:
-        has_mnsv2 = await page.evaluate("() => typeof window.mnsv2 === 'function'")
-        if not has_mnsv2:
+        result = await page.evaluate(_SIGN_MANY_JS, args)
+        if result is None and state is not None:
+            state.invalidate("window.mnsv2 not found")
+            return state.b1 or "", [""] * len(pairs)
+        if result is None:
             print("[Sign] window.mnsv2 not found, trying to load...")
             await page.goto("https://www.xiaohongshu.com/explore", wait_until="networkidle", timeout=30000)
-            has_mnsv2 = await page.evaluate("() => typeof window.mnsv2 === 'function'")
-            print(f"[Sign] After reload, mnsv2 available: {has_mnsv2}")
-        
-        result = await page.evaluate(f"window.mnsv2('{sign_str_escaped}', '{md5_str_escaped}')")
-        if not result:
-            print(f"[Sign] mnsv2 returned empty for md5={md5_str[:16]}...")
-        return result if result else ""
+            result = await page.evaluate(_SIGN_MANY_JS, args)
+            print(f"[Sign] After reload, mnsv2 available: {result is not None}")
+        if result is None:
+            return "", [""] * len(pairs)
+
+        x3_values = result.get("x3") or []
+        for (_, md5_str), x3 in zip(pairs, x3_values):
+            if not x3:
+                print(f"[Sign] mnsv2 returned empty for md5={md5_str[:16]}...")
+
+        b1 = result.get("b1")
+        if state is not None:
+            if b1 is not None:
+                state.b1 = b1
+            b1 = state.b1
+        return b1 or "", x3_values
     except Exception as e:
         print(f"[Sign] Error calling mnsv2: {e}")
-        return ""
+        if state is not None:
+            state.mark_failed(e)
+        return "", [""] * len(pairs)
+
+async def call_mnsv2(page: Page, sign_str: str, md5_str: str) -> str:
+    _, x3_values = await call_mnsv2_many(page, [(sign_str, md5_str)])
+    return x3_values[0]
 
 async def sign_xs_with_playwright(
     page: Page,
@@ -107,15 +155,9 @@ async def sign_xs_with_playwright(
     data_type = "object" if isinstance(data, (dict, list)) else "string"
     return _build_xs_payload(x3_value, data_type)
 
-async def sign_with_playwright(
-    page: Page,
-    uri: str,
-    data: Optional[Union[Dict, str]] = None,
-    a1: str = "",
-    method: str = "POST",
-) -> Dict[str, Any]:
-    b1 = await get_b1_from_localstorage(page)
-    x_s = await sign_xs_with_playwright(page, uri, data, method)
+def _build_signs(x3_value: str, data: Optional[Union[Dict, str]], a1: str, b1: str) -> Dict[str, Any]:
+    data_type = "object" if isinstance(data, (dict, list)) else "string"
+    x_s = _build_xs_payload(x3_value, data_type)
     x_t = str(int(time.time() * 1000))
     return {
         "x-s": x_s,
@@ -123,3 +165,51 @@ async def sign_with_playwright(
         "x-s-common": _build_xs_common(a1, b1, x_s, x_t),
         "x-b3-traceid": get_trace_id(),
     }
+
+def build_sign_pairs(requests: List[Tuple[str, Optional[Union[Dict, str]], str]]) -> List[Tuple[str, str]]:
+    """(uri, data, method) 列表 -> mnsv2 的 (sign_str, md5_str) 参数列表"""
+    sign_strs = [_build_sign_string(uri, data, method) for uri, data, method in requests]
+    return [(sign_str, _md5_hex(sign_str)) for sign_str in sign_strs]
+
+def build_signs_many(
+    requests: List[Tuple[str, Optional[Union[Dict, str]], str]],
+    x3_values: List[str],
+    a1: str,
+    b1: str,
+) -> List[Dict[str, Any]]:
+    """由 mnsv2 的结果组装每个请求的签名头"""
+    return [
+        _build_signs(x3_value, data, a1, b1)
+        for (_, data, _), x3_value in zip(requests, x3_values)
+    ]
+
+async def sign_many(
+    page: Page,
+    requests: List[Tuple[str, Optional[Union[Dict, str]], str]],
+    a1: str = "",
+    state: Optional[PageSignerState] = None,
+) -> List[Dict[str, Any]]:
+    """批量签名，所有请求共用一次 page.evaluate
+
+    Args:
+        page: 已加载 mnsv2 的页面
+        requests: (uri, data, method) 列表
+        a1: Cookie 中的 a1
+        state: 页面状态缓存，见 call_mnsv2_many
+
+    Returns:
+        与 requests 一一对应的签名头字典列表
+    """
+    pairs = build_sign_pairs(requests)
+    b1, x3_values = await call_mnsv2_many(page, pairs, state=state)
+    return build_signs_many(requests, x3_values, a1, b1)
+
+async def sign_with_playwright(
+    page: Page,
+    uri: str,
+    data: Optional[Union[Dict, str]] = None,
+    a1: str = "",
+    method: str = "POST",
+) -> Dict[str, Any]:
+    signs = await sign_many(page, [(uri, data, method)], a1=a1)
+    return signs[0]
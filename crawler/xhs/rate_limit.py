@@ -0,0 +1,144 @@
+"""
+请求限速
+
+批量接口的突发请求会触发 300012（IP 被封）和 471（验证码），之后整个服务一段时间内都不可用。
+RateLimiter 在每次发出请求前按令牌桶限速：
+
+1. 三类令牌桶：每个接口（search / feed / comment/page / comment/sub/page / user_posted / user）、
+   每个 Cookie 账号（a1）、每条代理线路（直连为 direct），一个请求要同时拿到三个桶的令牌
+2. 令牌可以预支：拿不到时计算需要等待的时间并 sleep，先到先得，不需要锁
+3. AIMD：请求成功时速率加性增加（不超过配置的上限），出现 IP 被封或验证码时速率减半
+   （不低于下限），同一个桶 decrease_interval 秒内只减一次，避免并发失败把速率连续减到底
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .keys import key_id, key_label
+
+# 接口路径 -> 限速使用的接口名
+ENDPOINTS = {
+    "/api/sns/web/v1/search/notes": "search",
+    "/api/sns/web/v1/feed": "feed",
+    "/api/sns/web/v2/comment/page": "comment/page",
+    "/api/sns/web/v2/comment/sub/page": "comment/sub/page",
+    "/api/sns/web/v1/user_posted": "user_posted",
+    "/api/sns/web/v1/user": "user",
+}
+
+# 默认限速：(每秒请求数, 突发容量)
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "search": (2, 4),
+    "feed": (5, 10),
+    "comment/page": (5, 10),
+    "comment/sub/page": (8, 16),
+    "user_posted": (3, 6),
+    "user": (3, 6),
+    "other": (5, 10),
+    "account": (10, 20),
+    "proxy": (10, 20),
+}
+
+
+class TokenBucket:
+    __slots__ = ("max_rate", "rate", "capacity", "tokens", "updated", "last_decrease")
+
+    def __init__(self, rate: float, capacity: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.last_decrease = 0.0
+
+    def reserve(self, now: float) -> float:
+        """取一个令牌（可以预支），返回需要等待的秒数"""
+        # 桶可能在取得 now 之后才创建，updated 比 now 晚时不回填
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        min_rate: float = 0.2,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        decrease_interval: float = 5.0,
+    ):
+        """
+        Args:
+            limits: 各接口及 account / proxy 的 (每秒请求数, 突发容量)，未配置的使用默认值
+            min_rate: AIMD 速率下限（每秒请求数）
+            increase: 每次成功增加的速率
+            decrease: 被封或验证码时速率乘以的系数
+            decrease_interval: 同一个桶两次减速的最小间隔（秒）
+        """
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.decrease_interval = decrease_interval
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self.decreases = 0
+
+    def _bucket(self, kind: str, name: str) -> TokenBucket:
+        bucket = self._buckets.get((kind, name))
+        if bucket is None:
+            rate, capacity = self.limits[name if kind == "endpoint" else kind]
+            bucket = self._buckets[(kind, name)] = TokenBucket(rate, capacity)
+        return bucket
+
+    def keys(self, uri: str, account: str, proxy_url: Optional[str]) -> List[Tuple[str, str]]:
+        """一个请求涉及的令牌桶"""
+        endpoint = ENDPOINTS.get(uri, "other")
+        return [("endpoint", endpoint), ("account", account or "anonymous"), ("proxy", proxy_url or "direct")]
+
+    async def acquire(self, keys: List[Tuple[str, str]]) -> float:
+        """从 keys 的每个桶各取一个令牌，返回等待的秒数"""
+        now = time.monotonic()
+        wait = max(self._bucket(kind, name).reserve(now) for kind, name in keys)
+        if wait > 0:
+            self.throttled += 1
+            self.wait_seconds += wait
+            await asyncio.sleep(wait)
+        return wait
+
+    def on_success(self, keys: List[Tuple[str, str]]):
+        for kind, name in keys:
+            bucket = self._bucket(kind, name)
+            if bucket.rate < bucket.max_rate:
+                bucket.rate = min(bucket.max_rate, bucket.rate + self.increase)
+
+    def on_block(self, keys: List[Tuple[str, str]]):
+        """出现 IP 被封或验证码：相关的桶减速"""
+        now = time.monotonic()
+        for kind, name in keys:
+            bucket = self._bucket(kind, name)
+            if now - bucket.last_decrease < self.decrease_interval:
+                continue
+            bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+            bucket.last_decrease = now
+            self.decreases += 1
+            print(f"[RateLimit] {key_label(kind, name)} slowed down to {bucket.rate:.2f} req/s")
+
+    def get_stats(self) -> Dict:
+        buckets = {}
+        for (kind, name), bucket in self._buckets.items():
+            # 按完整的 a1 / 代理地址区分，显示名称相同的桶不会互相覆盖
+            buckets[key_id((kind, name))] = {
+                "name": key_label(kind, name),
+                "rate": round(bucket.rate, 3),
+                "max_rate": bucket.max_rate,
+            }
+        return {
+            "throttled": self.throttled,
+            "wait_seconds": round(self.wait_seconds, 2),
+            "decreases": self.decreases,
+            "buckets": buckets,
+        }
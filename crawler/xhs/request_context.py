@@ -0,0 +1,73 @@
+"""
+单次请求上下文
+
+签名头（X-S / X-T / x-S-Common / X-B3-Traceid）和 Cookie 都是每个请求独有的，
+不能写进客户端共享的 headers 字典，否则并发请求会互相覆盖、发出别人的签名。
+
+RequestContext 在创建时保存一份 Cookie 快照，签名（使用 a1）和发送（Cookie 头）
+都基于这份快照，请求头每次新建，客户端的基础请求头保持只读。
+"""
+import json
+from typing import Dict, Mapping, Optional, Tuple
+
+
+class RequestContext:
+    __slots__ = ("method", "uri", "params", "payload", "cookie_dict", "headers")
+
+    def __init__(
+        self,
+        method: str,
+        uri: str,
+        params: Optional[Dict] = None,
+        payload: Optional[Dict] = None,
+        cookie_dict: Optional[Mapping[str, str]] = None,
+    ):
+        """
+        Args:
+            method: GET 或 POST
+            uri: 接口路径
+            params: GET 请求参数
+            payload: POST 请求体
+            cookie_dict: 创建时的 Cookie 快照（客户端整体替换 cookie_dict，不会原地修改）
+        """
+        if method == "GET" and params is None:
+            raise ValueError("params is required for GET")
+        if method == "POST" and payload is None:
+            raise ValueError("payload is required for POST")
+        self.method = method
+        self.uri = uri
+        self.params = params
+        self.payload = payload
+        self.cookie_dict = cookie_dict or {}
+        self.headers: Optional[Dict[str, str]] = None
+
+    @property
+    def a1(self) -> str:
+        return self.cookie_dict.get("a1", "")
+
+    @property
+    def signed(self) -> bool:
+        return self.headers is not None
+
+    def sign_request(self) -> Tuple[str, Dict, str]:
+        """签名后端需要的 (uri, data, method)"""
+        return self.uri, self.params if self.method == "GET" else self.payload, self.method
+
+    def body(self) -> Optional[str]:
+        if self.method != "POST":
+            return None
+        return json.dumps(self.payload, separators=(",", ":"), ensure_ascii=False)
+
+    def build_headers(self, base_headers: Mapping[str, str], signs: Dict) -> Dict[str, str]:
+        """基于只读的基础请求头新建本次请求的请求头"""
+        headers = dict(base_headers)
+        headers["X-S"] = signs["x-s"]
+        headers["X-T"] = signs["x-t"]
+        headers["x-S-Common"] = signs["x-s-common"]
+        headers["X-B3-Traceid"] = signs["x-b3-traceid"]
+        if self.method == "POST":
+            headers["Content-Type"] = "application/json;charset=UTF-8"
+        if self.cookie_dict:
+            headers["Cookie"] = "; ".join([f"{k}={v}" for k, v in self.cookie_dict.items()])
+        self.headers = headers
+        return headers
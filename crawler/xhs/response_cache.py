@@ -0,0 +1,145 @@
+"""
+接口响应缓存
+
+界面和自动抓取在几分钟内会反复获取同一批笔记和作者，每次都要一次 Playwright 签名和一次
+上游请求。ResponseCache 缓存笔记详情（get_note_by_id）和用户信息（get_user_info）：
+
+1. 内存 LRU：最多 max_entries 条，超出时淘汰最久未使用的
+2. 每类接口单独的 TTL（ttls），过期后重新请求
+3. 可选 SQLite 磁盘缓存（db_file）：内存未命中时查磁盘，命中后放回内存；服务重启后仍然有效
+4. 调用方可以跳过缓存（refresh），请求结果仍会写入缓存
+5. get_stats 返回命中、未命中、淘汰、过期次数，在 /health 中输出
+
+空结果（笔记不存在等）不缓存。
+"""
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .normalizer import dumps
+
+# 默认 TTL（秒）
+DEFAULT_TTLS = {
+    "note": 600,
+    "user": 1800,
+}
+
+# 每写入多少次清理一次磁盘上过期的条目
+_PURGE_EVERY = 500
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 2000, ttls: Optional[Dict[str, float]] = None, db_file: Optional[str] = None):
+        """
+        Args:
+            max_entries: 内存中最多缓存的条目数
+            ttls: 各类接口的 TTL（秒），如 {"note": 600, "user": 1800}
+            db_file: SQLite 文件路径，为空时只使用内存缓存
+        """
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self.conn: Optional[sqlite3.Connection] = None
+        if db_file:
+            os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+            self.conn = sqlite3.connect(db_file, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    endpoint TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (endpoint, key)
+                )
+                """
+            )
+            self._purge_disk()
+        self._writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def get(self, endpoint: str, key: str) -> Optional[Dict]:
+        """取缓存，未命中或已过期时返回 None"""
+        now = time.time()
+        entry = self._memory.get((endpoint, key))
+        if entry is not None:
+            if entry[0] > now:
+                self._memory.move_to_end((endpoint, key))
+                self.hits += 1
+                return entry[1]
+            del self._memory[(endpoint, key)]
+            self.expired += 1
+
+        if self.conn is not None:
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE endpoint = ? AND key = ?", (endpoint, key)
+            ).fetchone()
+            if row is not None and row[1] > now:
+                value = json.loads(row[0])
+                self._remember(endpoint, key, row[1], value)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def set(self, endpoint: str, key: str, value: Dict):
+        if not value:
+            return
+        expires_at = time.time() + self.ttls.get(endpoint, 600)
+        self._remember(endpoint, key, expires_at, value)
+        if self.conn is not None:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO response_cache (endpoint, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (endpoint, key, dumps(value).decode("utf-8"), expires_at),
+                )
+            self._writes += 1
+            if self._writes % _PURGE_EVERY == 0:
+                self._purge_disk()
+
+    def invalidate(self, endpoint: str, key: str):
+        self._memory.pop((endpoint, key), None)
+        if self.conn is not None:
+            with self.conn:
+                self.conn.execute("DELETE FROM response_cache WHERE endpoint = ? AND key = ?", (endpoint, key))
+
+    def _remember(self, endpoint: str, key: str, expires_at: float, value: Dict):
+        self._memory[(endpoint, key)] = (expires_at, value)
+        self._memory.move_to_end((endpoint, key))
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _purge_disk(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "disk": self.conn is not None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,90 @@
+"""
+请求重试策略
+
+原来整个 request 用 tenacity 固定重试 3 次、间隔 1 秒：Cookie 失效（461）和验证码（471）
+重试也不会成功，白白浪费几秒和签名；而签名在重试范围之外，重试时发出的还是同一组过期的
+X-S / X-T。RetryPolicy 先对失败分类，再决定是否重试：
+
+- transport（连接失败、超时）：重试，换一个代理
+- server（HTTP 5xx）：重试，保持代理
+- ip_blocked（业务码 300012）：有代理池时换代理重试，否则立即放弃（同一 IP 重试只会加重封禁）
+- cookie_expired（461）、captcha（471）、其他接口错误：立即放弃
+
+每次重试前重新签名（由客户端负责），间隔为带抖动的指数退避：random(0, min(max_delay, base_delay * 2^n))。
+"""
+import random
+from collections import Counter
+from typing import Dict
+
+import httpx
+
+from .exception import CaptchaRequiredError, CookieExpiredError, IPBlockedError, ServerError
+
+TRANSPORT = "transport"
+SERVER = "server"
+IP_BLOCKED = "ip_blocked"
+COOKIE_EXPIRED = "cookie_expired"
+CAPTCHA = "captcha"
+FATAL = "fatal"
+
+
+def classify(error: BaseException) -> str:
+    """失败类型"""
+    if isinstance(error, httpx.TransportError):
+        return TRANSPORT
+    if isinstance(error, ServerError):
+        return SERVER
+    if isinstance(error, IPBlockedError):
+        return IP_BLOCKED
+    if isinstance(error, CookieExpiredError):
+        return COOKIE_EXPIRED
+    if isinstance(error, CaptchaRequiredError):
+        return CAPTCHA
+    return FATAL
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        """
+        Args:
+            max_attempts: 最多尝试次数（含第一次）
+            base_delay: 退避基数（秒）
+            max_delay: 单次退避上限（秒）
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries: Counter = Counter()
+        self.give_ups: Counter = Counter()
+
+    def should_retry(self, kind: str, attempt: int, has_proxy: bool) -> bool:
+        """第 attempt 次尝试以 kind 失败后是否重试"""
+        if attempt >= self.max_attempts:
+            return False
+        if kind in (TRANSPORT, SERVER):
+            return True
+        if kind == IP_BLOCKED:
+            return has_proxy
+        return False
+
+    @staticmethod
+    def should_rotate(kind: str) -> bool:
+        """重试时是否换代理"""
+        return kind in (TRANSPORT, IP_BLOCKED)
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次失败后的等待时间（秒）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    def record(self, kind: str, retried: bool):
+        if retried:
+            self.retries[kind] += 1
+        else:
+            self.give_ups[kind] += 1
+
+    def get_stats(self) -> Dict:
+        return {
+            "max_attempts": self.max_attempts,
+            "retries": dict(self.retries),
+            "give_ups": dict(self.give_ups),
+        }
@@ -0,0 +1,149 @@
+"""
+搜索会话
+
+搜索接口用 search_id 标识一次搜索，翻页时需要带上同一个 search_id，否则每一页都是一次新的
+搜索，页与页之间的结果可能重复或遗漏。SearchSession 对应一次搜索：
+
+1. 按 (keyword, sort, note_type) 建立会话，整个会话使用同一个 search_id
+2. 会话有一个 token，/search 返回给调用方，翻页时带上即可继续同一次搜索
+3. 已获取的页按 TTL 缓存在内存中，重复查看同一页直接返回；同一页的并发请求只发出一次
+4. 会话按 LRU 保留 max_sessions 个，超过 session_ttl 没有使用的会话过期
+"""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from .help import get_search_id
+
+SessionKey = Tuple[str, str, int]
+
+
+class SearchSession:
+    def __init__(self, key: SessionKey, page_ttl: float):
+        self.key = key
+        self.token = uuid.uuid4().hex
+        self.search_id = get_search_id()
+        self.page_ttl = page_ttl
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        # (page, page_size) -> (获取时间, 结果)
+        self._pages: Dict[Tuple[int, int], Tuple[float, Dict]] = {}
+        self._inflight: Dict[Tuple[int, int], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_page(
+        self,
+        page: int,
+        page_size: int,
+        fetch: Callable[[str, int, int], Awaitable[Dict]],
+    ) -> Tuple[Dict, bool]:
+        """获取一页，返回 (结果, 是否来自缓存)
+
+        Args:
+            page: 页码
+            page_size: 每页数量
+            fetch: fetch(search_id, page, page_size) 请求一页
+        """
+        self.last_used = time.monotonic()
+        page_key = (page, page_size)
+        cached = self._pages.get(page_key)
+        if cached is not None and self.last_used - cached[0] < self.page_ttl:
+            self.hits += 1
+            return cached[1], True
+
+        future = self._inflight.get(page_key)
+        if future is not None:
+            self.hits += 1
+            return await asyncio.shield(future), True
+
+        self.misses += 1
+        future = asyncio.ensure_future(fetch(self.search_id, page, page_size))
+        self._inflight[page_key] = future
+        future.add_done_callback(lambda f: self._page_done(page_key, f))
+        return await asyncio.shield(future), False
+
+    def _page_done(self, page_key: Tuple[int, int], future: asyncio.Future):
+        # 调用方已取消时请求仍会完成，结果照样缓存
+        self._inflight.pop(page_key, None)
+        if not future.cancelled() and future.exception() is None:
+            self._pages[page_key] = (time.monotonic(), future.result())
+
+
+class SearchSessionStore:
+    def __init__(self, session_ttl: float = 600, page_ttl: float = 300, max_sessions: int = 256):
+        """
+        Args:
+            session_ttl: 会话多久不用后过期（秒），过期后重新生成 search_id
+            page_ttl: 已获取的页缓存多久（秒）
+            max_sessions: 最多保留的会话数
+        """
+        self.session_ttl = session_ttl
+        self.page_ttl = page_ttl
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, SearchSession]" = OrderedDict()
+        self._by_key: Dict[SessionKey, str] = {}
+        self._created = 0
+        self._expired = 0
+
+    def _expired_session(self, session: SearchSession, now: float) -> bool:
+        return now - session.last_used >= self.session_ttl
+
+    def _drop(self, token: str):
+        session = self._sessions.pop(token, None)
+        if session is not None and self._by_key.get(session.key) == token:
+            del self._by_key[session.key]
+
+    def get(
+        self,
+        keyword: str,
+        sort: str,
+        note_type: int,
+        token: Optional[str] = None,
+        refresh: bool = False,
+    ) -> SearchSession:
+        """取得 (keyword, sort, note_type) 的会话
+
+        token 对应的会话存在且参数一致时使用该会话；否则使用同参数的现有会话；refresh 为
+        True 或没有可用会话时新建。
+        """
+        key = (keyword, sort, note_type)
+        now = time.monotonic()
+        session = None
+        if not refresh:
+            for candidate in (token, self._by_key.get(key)):
+                session = self._sessions.get(candidate) if candidate else None
+                if session is None or session.key != key:
+                    session = None
+                    continue
+                if self._expired_session(session, now):
+                    self._drop(session.token)
+                    self._expired += 1
+                    session = None
+                    continue
+                break
+
+        if session is None:
+            session = SearchSession(key, self.page_ttl)
+            self._created += 1
+            self._sessions[session.token] = session
+            self._by_key[key] = session.token
+            while len(self._sessions) > self.max_sessions:
+                self._drop(next(iter(self._sessions)))
+        else:
+            self._sessions.move_to_end(session.token)
+        session.last_used = now
+        return session
+
+    def get_stats(self) -> Dict:
+        hits = sum(s.hits for s in self._sessions.values())
+        misses = sum(s.misses for s in self._sessions.values())
+        return {
+            "sessions": len(self._sessions),
+            "created": self._created,
+            "expired": self._expired,
+            "page_hits": hits,
+            "page_misses": misses,
+        }
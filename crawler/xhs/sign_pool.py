@@ -0,0 +1,228 @@
+"""
+签名页面池
+
+所有接口签名都需要在页面里调用 window.mnsv2，只用一个页面时所有签名都被串行化在
+同一个 Chromium 标签页上。页面池预先打开多个已加载 /explore 的页面，按请求租用：
+
+1. 公平排队：等待者按到达顺序获得页面（asyncio.Queue 的 FIFO 语义）
+2. 单页并发上限：每个页面同时最多执行 max_inflight_per_page 个签名
+3. 队列统计：等待深度、每页在途数量、租用次数和平均等待时间
+4. 状态缓存：每个页面一个 PageSignerState，不可用的页面暂停租用，
+   由后台 watchdog 恢复后再放回队列
+5. 租用超时：超过 lease_timeout 仍没有可用页面时抛出 SignPoolTimeoutError，
+   调用方（FallbackSigner）可以改用备用后端，而不是无限期等待
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from playwright.async_api import BrowserContext, Page
+
+from .exception import SignPoolTimeoutError
+from .signer_state import EXPLORE_URL, PageSignerState
+
+
+class SignPagePool:
+    def __init__(
+        self,
+        browser_context: BrowserContext,
+        size: int = 2,
+        max_inflight_per_page: int = 1,
+        warm_url: str = EXPLORE_URL,
+        warm_timeout: int = 60000,
+        watchdog_interval: float = 1.0,
+        lease_timeout: Optional[float] = 10.0,
+    ):
+        """
+        Args:
+            browser_context: 用于创建签名页面的浏览器上下文
+            size: 页面数量
+            max_inflight_per_page: 单个页面同时进行的签名数量上限
+            warm_url: 预热页面地址，加载后页面中才有 window.mnsv2
+            warm_timeout: 预热超时时间（毫秒）
+            watchdog_interval: 后台检查页面状态的间隔（秒）
+            lease_timeout: 等待可用页面的超时时间（秒），None 表示一直等待
+        """
+        self.browser_context = browser_context
+        self.size = max(1, size)
+        self.max_inflight_per_page = max(1, max_inflight_per_page)
+        self.warm_url = warm_url
+        self.warm_timeout = warm_timeout
+        self.watchdog_interval = watchdog_interval
+        self.lease_timeout = lease_timeout
+        self.pages: List[Page] = []
+        self.states: List[PageSignerState] = []
+        self._owned_pages: List[Page] = []
+        self._slots: asyncio.Queue = asyncio.Queue()
+        self._parked: List[int] = []
+        self._inflight: List[int] = []
+        self._leases: List[int] = []
+        self._waiting = 0
+        self._max_waiting = 0
+        self._total_leases = 0
+        self._total_wait = 0.0
+        self._lease_timeouts = 0
+        self._wakeup = asyncio.Event()
+        self._watchdog_task: Optional[asyncio.Task] = None
+        self._recover_tasks = set()
+
+    async def start(self, pages: Optional[List[Page]] = None):
+        """创建并预热页面，启动后台 watchdog
+
+        Args:
+            pages: 已经加载好的页面，会直接加入池中，不足 size 的部分新建
+        """
+        adopted = list(pages or [])[: self.size]
+        for page in adopted:
+            self._add_page(page)
+
+        missing = self.size - len(adopted)
+        if missing > 0:
+            new_pages = await asyncio.gather(*[self._open_page() for _ in range(missing)])
+            for page in new_pages:
+                self._owned_pages.append(page)
+                self._add_page(page)
+
+        await asyncio.gather(*[state.probe() for state in self.states])
+        self._watchdog_task = asyncio.create_task(self._watchdog())
+        ready = sum(1 for state in self.states if state.ready)
+        print(f"[SignPool] Started with {len(self.pages)} pages ({ready} ready), max_inflight_per_page={self.max_inflight_per_page}")
+
+    async def _open_page(self) -> Page:
+        page = await self.browser_context.new_page()
+        await page.goto(self.warm_url, wait_until="networkidle", timeout=self.warm_timeout)
+        try:
+            await page.wait_for_function("() => typeof window.mnsv2 === 'function'", timeout=self.warm_timeout)
+        except Exception as e:
+            print(f"[SignPool] window.mnsv2 not ready after warm-up: {e}")
+        return page
+
+    def _add_page(self, page: Page):
+        index = len(self.pages)
+        self.pages.append(page)
+        self.states.append(PageSignerState(page, reload_url=self.warm_url))
+        self._inflight.append(0)
+        self._leases.append(0)
+        for _ in range(self.max_inflight_per_page):
+            self._slots.put_nowait(index)
+
+    async def _watchdog(self):
+        """后台恢复不可用的页面，恢复后把暂停的租用名额放回队列"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.watchdog_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            for index, state in enumerate(self.states):
+                if state.ready or state.recovering:
+                    # 页面已恢复（例如导航完成后重新探测成功），放回暂停的名额
+                    if state.ready:
+                        self._release_parked(index)
+                    continue
+                state.recovering = True
+                task = asyncio.create_task(self._recover(index))
+                self._recover_tasks.add(task)
+                task.add_done_callback(self._recover_tasks.discard)
+
+    async def _recover(self, index: int):
+        if await self.states[index].recover():
+            self._release_parked(index)
+
+    def _release_parked(self, index: int):
+        if index not in self._parked:
+            return
+        remaining = []
+        for parked in self._parked:
+            if parked == index:
+                self._slots.put_nowait(parked)
+            else:
+                remaining.append(parked)
+        self._parked = remaining
+
+    @asynccontextmanager
+    async def lease(self):
+        """租用一个可用的签名页面状态（state.page 为页面），退出上下文时归还
+
+        Raises:
+            SignPoolTimeoutError: lease_timeout 内没有可用页面（全部在忙或不可用）
+        """
+        if not self.pages:
+            raise RuntimeError("Sign pool not started")
+
+        self._waiting += 1
+        self._max_waiting = max(self._max_waiting, self._waiting)
+        start = time.monotonic()
+        try:
+            # Queue.get 被取消时不会取走名额，超时不会丢失页面
+            async with asyncio.timeout(self.lease_timeout):
+                while True:
+                    index = await self._slots.get()
+                    if self.states[index].ready:
+                        break
+                    # 页面不可用：暂停这个名额，交给 watchdog 恢复
+                    self._parked.append(index)
+                    self._wakeup.set()
+        except TimeoutError:
+            self._lease_timeouts += 1
+            ready = sum(1 for state in self.states if state.ready)
+            raise SignPoolTimeoutError(
+                f"No sign page available after {self.lease_timeout:g}s "
+                f"({ready}/{len(self.pages)} ready, {self._waiting} waiting)"
+            ) from None
+        finally:
+            self._waiting -= 1
+
+        self._total_wait += time.monotonic() - start
+        self._total_leases += 1
+        self._leases[index] += 1
+        self._inflight[index] += 1
+        try:
+            yield self.states[index]
+        finally:
+            self._inflight[index] -= 1
+            if self.states[index].ready:
+                self._slots.put_nowait(index)
+            else:
+                self._parked.append(index)
+                self._wakeup.set()
+
+    def invalidate_b1(self):
+        """Cookie 变化后调用，所有页面在下一次签名时重新读取 b1"""
+        for state in self.states:
+            state.invalidate_b1()
+
+    def get_stats(self) -> Dict:
+        """获取页面池统计信息"""
+        return {
+            "size": len(self.pages),
+            "ready": sum(1 for state in self.states if state.ready),
+            "max_inflight_per_page": self.max_inflight_per_page,
+            "queue_depth": self._waiting,
+            "max_queue_depth": self._max_waiting,
+            "idle_slots": self._slots.qsize(),
+            "parked_slots": len(self._parked),
+            "total_leases": self._total_leases,
+            "avg_wait_ms": round(self._total_wait / self._total_leases * 1000, 2) if self._total_leases else 0.0,
+            "lease_timeouts": self._lease_timeouts,
+            "pages": [
+                {"index": i, "inflight": self._inflight[i], "leases": self._leases[i], **self.states[i].get_stats()}
+                for i in range(len(self.pages))
+            ],
+        }
+
+    async def close(self):
+        """停止 watchdog，关闭池自己创建的页面（传入的页面由调用方负责）"""
+        if self._watchdog_task:
+            self._watchdog_task.cancel()
+            self._watchdog_task = None
+        for task in list(self._recover_tasks):
+            task.cancel()
+        for page in self._owned_pages:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        self._owned_pages.clear()
@@ -0,0 +1,274 @@
+"""
+签名后端
+
+签名的核心是 mnsv2(sign_str, md5) -> x3，其余部分（x-s、x-s-common 的组装）都在 Python
+里完成。SignerBackend 只负责批量计算 x3 和提供 b1，具体实现：
+
+1. PlaywrightSigner：在 Chromium 页面里调用 window.mnsv2（页面池或单个页面）
+2. NodeSigner：把提取出来的签名脚本加载到一个 Node 子进程（vm 沙箱）里执行，
+   不需要整个浏览器，内存和启动时间都小得多
+3. FallbackSigner：优先使用主后端，失败或返回空值时改用备用后端
+"""
+import abc
+import asyncio
+import itertools
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from playwright.async_api import Page
+
+from .playwright_sign import build_sign_pairs, build_signs_many, call_mnsv2_many
+from .sign_pool import SignPagePool
+
+SignRequest = Tuple[str, Optional[Union[Dict, str]], str]
+
+NODE_WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "js", "sign_worker.cjs")
+
+
+class SignerBackend(abc.ABC):
+    name = "base"
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abc.abstractmethod
+    async def call_mnsv2_many(self, pairs: List[Tuple[str, str]]) -> Tuple[str, List[str]]:
+        """批量计算 x3
+
+        Args:
+            pairs: (sign_str, md5_str) 列表
+
+        Returns:
+            (b1, x3 列表)，x3 与 pairs 一一对应，失败的项为空字符串
+        """
+
+    async def sign_many(self, requests: List[SignRequest], a1: str = "") -> List[Dict[str, Any]]:
+        """批量签名
+
+        Args:
+            requests: (uri, data, method) 列表
+            a1: Cookie 中的 a1
+
+        Returns:
+            与 requests 一一对应的签名头字典列表
+        """
+        if not requests:
+            return []
+        b1, x3_values = await self.call_mnsv2_many(build_sign_pairs(requests))
+        return build_signs_many(requests, x3_values, a1, b1)
+
+    def invalidate_b1(self):
+        """Cookie 变化后调用"""
+        pass
+
+    def get_stats(self) -> Dict:
+        return {"backend": self.name}
+
+
+class PlaywrightSigner(SignerBackend):
+    name = "playwright"
+
+    def __init__(self, sign_pool: SignPagePool = None, page: Page = None):
+        """
+        Args:
+            sign_pool: 签名页面池，优先使用
+            page: 没有页面池时直接使用的页面
+        """
+        self.sign_pool = sign_pool
+        self.page = page
+
+    async def call_mnsv2_many(self, pairs: List[Tuple[str, str]]) -> Tuple[str, List[str]]:
+        if self.sign_pool:
+            # 从页面池租用一个签名页面，多个请求可以并行签名
+            async with self.sign_pool.lease() as state:
+                return await call_mnsv2_many(state.page, pairs, state=state)
+        return await call_mnsv2_many(self.page, pairs)
+
+    def invalidate_b1(self):
+        if self.sign_pool:
+            self.sign_pool.invalidate_b1()
+
+    def get_stats(self) -> Dict:
+        return {
+            "backend": self.name,
+            "sign_pool": self.sign_pool.get_stats() if self.sign_pool else None,
+        }
+
+
+class NodeSigner(SignerBackend):
+    name = "node"
+
+    def __init__(
+        self,
+        script_path: str,
+        local_storage: Optional[Dict[str, str]] = None,
+        node_path: str = "node",
+        timeout: float = 10.0,
+        b1_source: Optional[Callable[[], Awaitable[str]]] = None,
+    ):
+        """
+        Args:
+            script_path: 从页面中提取出的签名脚本，执行后需要定义 window.mnsv2
+            local_storage: 沙箱中 window.localStorage 的初始内容（例如 b1）
+            node_path: node 可执行文件
+            timeout: 单次批量签名的超时时间（秒）
+            b1_source: 读取当前 b1（例如浏览器页面的 localStorage）。invalidate_b1 之后的下一次签名
+                重新读取，随签名请求一起发给 worker；不传时 b1 保持 local_storage 中的初始值
+        """
+        self.script_path = script_path
+        self.local_storage = dict(local_storage or {})
+        self.node_path = node_path
+        self.timeout = timeout
+        self.b1_source = b1_source
+        self._b1_stale = False
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._write_lock = asyncio.Lock()
+        self._total_calls = 0
+        self._total_signatures = 0
+        self._failures = 0
+        self._bad_lines = 0
+
+    async def start(self):
+        env = dict(os.environ, XHS_SIGN_LOCALSTORAGE=json.dumps(self.local_storage))
+        self._process = await asyncio.create_subprocess_exec(
+            self.node_path,
+            NODE_WORKER_SCRIPT,
+            self.script_path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=env,
+            limit=16 * 1024 * 1024,
+        )
+        # worker 第一行输出握手信息，确认脚本已加载并且 mnsv2 可用
+        line = await asyncio.wait_for(self._process.stdout.readline(), timeout=self.timeout)
+        hello = json.loads(line or b"{}")
+        if not hello.get("ready"):
+            await self.close()
+            raise RuntimeError(f"Node signer not ready: {hello.get('error', 'no handshake')}")
+        self._reader_task = asyncio.create_task(self._read_loop())
+        print(f"[Signer] Node worker started (pid={self._process.pid}) with {self.script_path}")
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self._process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    message = None
+                if not isinstance(message, dict):
+                    # 不是协议消息（例如脚本绕过沙箱打印的内容），跳过这一行
+                    self._bad_lines += 1
+                    print(f"[Signer] Ignoring non-protocol line from node worker: {line[:200]!r}")
+                    continue
+                future = self._pending.pop(message.get("id"), None)
+                if future and not future.done():
+                    future.set_result(message)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("Node signer exited"))
+            self._pending.clear()
+
+    async def call_mnsv2_many(self, pairs: List[Tuple[str, str]]) -> Tuple[str, List[str]]:
+        if not pairs:
+            return "", []
+        if not self._process or self._process.returncode is not None:
+            raise RuntimeError("Node signer not running")
+
+        request: Dict[str, Any] = {"pairs": [list(p) for p in pairs]}
+        if self._b1_stale and self.b1_source is not None:
+            # Cookie 变化后 b1 可能改变，与这一批签名一起更新 worker 的 localStorage
+            self._b1_stale = False
+            self.local_storage["b1"] = await self.b1_source()
+            request["local_storage"] = self.local_storage
+
+        request_id = request["id"] = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        line = json.dumps(request, ensure_ascii=False) + "\n"
+        try:
+            async with self._write_lock:
+                self._process.stdin.write(line.encode("utf-8"))
+                await self._process.stdin.drain()
+            message = await asyncio.wait_for(future, timeout=self.timeout)
+        except Exception:
+            self._pending.pop(request_id, None)
+            self._failures += 1
+            raise
+
+        self._total_calls += 1
+        self._total_signatures += len(pairs)
+        return message.get("b1", ""), message.get("x3") or [""] * len(pairs)
+
+    def invalidate_b1(self):
+        self._b1_stale = True
+
+    def get_stats(self) -> Dict:
+        return {
+            "backend": self.name,
+            "running": bool(self._process and self._process.returncode is None),
+            "pid": self._process.pid if self._process else None,
+            "calls": self._total_calls,
+            "signatures": self._total_signatures,
+            "failures": self._failures,
+            "bad_lines": self._bad_lines,
+        }
+
+    async def close(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._process and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+        self._process = None
+
+
+class FallbackSigner(SignerBackend):
+    name = "fallback"
+
+    def __init__(self, primary: SignerBackend, fallback: SignerBackend):
+        self.primary = primary
+        self.fallback = fallback
+        self._fallbacks = 0
+
+    async def start(self):
+        await self.primary.start()
+        await self.fallback.start()
+
+    async def close(self):
+        await self.primary.close()
+        await self.fallback.close()
+
+    async def call_mnsv2_many(self, pairs: List[Tuple[str, str]]) -> Tuple[str, List[str]]:
+        try:
+            b1, x3_values = await self.primary.call_mnsv2_many(pairs)
+            if all(x3_values):
+                return b1, x3_values
+            print(f"[Signer] {self.primary.name} returned empty signatures, falling back to {self.fallback.name}")
+        except Exception as e:
+            print(f"[Signer] {self.primary.name} failed ({e}), falling back to {self.fallback.name}")
+        self._fallbacks += 1
+        return await self.fallback.call_mnsv2_many(pairs)
+
+    def invalidate_b1(self):
+        self.primary.invalidate_b1()
+        self.fallback.invalidate_b1()
+
+    def get_stats(self) -> Dict:
+        return {
+            "backend": self.name,
+            "fallbacks": self._fallbacks,
+            "primary": self.primary.get_stats(),
+            "fallback": self.fallback.get_stats(),
+        }
@@ -0,0 +1,117 @@
+"""
+签名页面状态缓存
+
+每次签名都去页面里探测 window.mnsv2、读取 localStorage 的 b1 会多出 CDP 往返，
+而且 mnsv2 丢失时在请求路径上重新加载页面要等几十秒。这里为每个签名页面缓存：
+
+- mnsv2 是否可用（ready）
+- b1 的值
+
+以下情况会让缓存失效：
+1. 页面主框架发生导航：mnsv2 需要重新探测
+2. Cookie 变化：b1 需要重新读取（下一次签名顺带读取，不额外往返）
+3. 签名 evaluate 失败：mnsv2 需要重新探测
+
+不可用的页面由后台 watchdog 调用 recover() 恢复，请求本身不承担恢复开销。
+"""
+import time
+from typing import Optional
+
+from playwright.async_api import Page
+
+EXPLORE_URL = "https://www.xiaohongshu.com/explore"
+
+_PROBE_JS = """
+() => ({
+    ready: typeof window.mnsv2 === 'function',
+    b1: window.localStorage.getItem('b1') || '',
+})
+"""
+
+
+class PageSignerState:
+    def __init__(self, page: Page, reload_url: str = EXPLORE_URL, reload_timeout: int = 30000):
+        """
+        Args:
+            page: 签名页面
+            reload_url: 恢复时重新加载的地址
+            reload_timeout: 恢复超时时间（毫秒）
+        """
+        self.page = page
+        self.reload_url = reload_url
+        self.reload_timeout = reload_timeout
+        self.ready = False
+        self.b1: Optional[str] = None
+        self.recovering = False
+        self.recoveries = 0
+        self.failures = 0
+        self.last_invalidated_reason = ""
+        self.last_recovered_at = 0.0
+        page.on("framenavigated", self._on_frame_navigated)
+
+    def _on_frame_navigated(self, frame):
+        if frame == self.page.main_frame:
+            self.invalidate("navigation")
+
+    def invalidate(self, reason: str):
+        """标记 mnsv2 需要重新探测（同时丢弃 b1）"""
+        if self.ready:
+            print(f"[SignerState] Page invalidated: {reason}")
+        self.ready = False
+        self.b1 = None
+        self.last_invalidated_reason = reason
+
+    def invalidate_b1(self):
+        """Cookie 变化后 b1 可能改变，下一次签名时重新读取"""
+        self.b1 = None
+
+    def mark_failed(self, error: Exception):
+        self.failures += 1
+        self.invalidate(f"evaluate failed: {error}")
+
+    async def probe(self) -> bool:
+        """一次 evaluate 探测 mnsv2 并读取 b1"""
+        try:
+            result = await self.page.evaluate(_PROBE_JS)
+        except Exception as e:
+            print(f"[SignerState] Probe failed: {e}")
+            return False
+        self.b1 = result.get("b1", "")
+        self.ready = bool(result.get("ready"))
+        return self.ready
+
+    async def recover(self) -> bool:
+        """恢复页面：先直接探测，失败再重新加载页面并等待 mnsv2"""
+        self.recovering = True
+        try:
+            if await self.probe():
+                return True
+
+            print(f"[SignerState] window.mnsv2 not found, reloading {self.reload_url}...")
+            try:
+                await self.page.goto(self.reload_url, wait_until="networkidle", timeout=self.reload_timeout)
+                await self.page.wait_for_function(
+                    "() => typeof window.mnsv2 === 'function'", timeout=self.reload_timeout
+                )
+            except Exception as e:
+                print(f"[SignerState] Reload failed: {e}")
+                return False
+
+            ready = await self.probe()
+            if ready:
+                self.recoveries += 1
+                self.last_recovered_at = time.time()
+            print(f"[SignerState] After reload, mnsv2 available: {ready}")
+            return ready
+        finally:
+            self.recovering = False
+
+    def get_stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "has_b1": bool(self.b1),
+            "recovering": self.recovering,
+            "recoveries": self.recoveries,
+            "failures": self.failures,
+            "last_invalidated_reason": self.last_invalidated_reason,
+        }
@@ -0,0 +1,52 @@
+"""
+相同请求合并（single-flight）
+
+界面打开一篇笔记的同时自动抓取也在获取这篇笔记，或者多个用户同时打开同一个作者时，客户端会
+在同一时刻签名并发出完全相同的请求。SingleFlight 按 (接口, 规范化参数) 合并正在进行中的调用：
+
+1. 同一个 key 同时只执行一次，后到的调用等待并共享同一个结果或异常
+2. 调用完成后立即移除，之后的调用重新执行（缓存由 ResponseCache 负责）
+3. 某个等待方被取消不影响共享的请求，其他等待方照常拿到结果
+4. 统计执行次数和被合并的调用次数
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """执行 func()，相同 key 的调用正在进行时直接等待它的结果
+
+        Args:
+            key: 接口和规范化参数组成的 key，如 ("note", note_id, xsec_token)
+            func: 实际发出请求的协程函数
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.executed += 1
+        future = asyncio.ensure_future(func())
+        self._inflight[key] = future
+        future.add_done_callback(lambda f: self._done(key, f))
+        return await asyncio.shield(future)
+
+    def _done(self, key: Hashable, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # 所有等待方都已取消时，取出异常避免 "exception was never retrieved"
+        if not future.cancelled():
+            future.exception()
+
+    def get_stats(self) -> Dict:
+        return {
+            "inflight": len(self._inflight),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,187 @@
+"""
+评论词频索引
+
+获取笔记关键词原本需要把全部评论拉到前端，再整体提交给 /wordcloud 重新分词。TermIndex 在
+抓取评论时增量建立词频：
+
+1. 客户端每拿到一页评论（含二级评论）就 feed 进来，不阻塞抓取请求
+2. 每条评论按 ID 去重，只分词一次；分词在线程中批量执行，不占用事件循环
+3. 同时维护单篇笔记和全局的词频计数，top_terms 直接查询，无需重新分词
+4. 单篇笔记的计数按 LRU 保留 max_notes 篇，淘汰的笔记仍计入全局计数；评论 ID 与 LRU 分开保存，
+   淘汰后再次 feed 的笔记只计入新评论，不会在全局重复计数
+
+安装 jieba 时使用 jieba 分词，否则退回按字符切分（中文取相邻两字，英文和数字取整词）。
+"""
+import asyncio
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import jieba
+except ImportError:
+    jieba = None
+
+STOPWORDS = frozenset(
+    """
+    我们 你们 他们 她们 它们 这个 那个 这些 那些 这样 那样 什么 怎么 为什么 没有 就是 不是 还是 真的
+    一个 一下 一样 自己 可以 觉得 感觉 因为 所以 但是 如果 然后 已经 还有 现在 时候 知道 应该 这么 那么
+    哈哈 哈哈哈 哈哈哈哈 啊啊 呜呜 评论 回复
+    """.split()
+)
+
+_WORD_RE = re.compile(r"[一-鿿]+|[A-Za-z][A-Za-z0-9']+")
+_VALID_RE = re.compile(r"^[一-鿿A-Za-z][一-鿿A-Za-z0-9']*$")
+# 评论中的表情，如 [笑哭R]
+_EMOJI_RE = re.compile(r"\[[^\[\]]{1,8}\]")
+
+
+def _fallback_cut(text: str) -> Iterable[str]:
+    for match in _WORD_RE.finditer(text):
+        word = match.group()
+        if "一" <= word[0] <= "鿿":
+            for i in range(len(word) - 1):
+                yield word[i:i + 2]
+        else:
+            yield word.lower()
+
+
+class _NoteTerms:
+    __slots__ = ("counter", "comments", "updated_at")
+
+    def __init__(self):
+        self.counter: Counter = Counter()
+        self.comments = 0
+        self.updated_at = 0.0
+
+
+class TermIndex:
+    def __init__(self, max_notes: int = 1000, min_length: int = 2, stopwords: Iterable[str] = STOPWORDS):
+        """
+        Args:
+            max_notes: 保留单篇词频的笔记数
+            min_length: 最短词长
+            stopwords: 停用词
+        """
+        self.max_notes = max_notes
+        self.min_length = min_length
+        self.stopwords = frozenset(stopwords)
+        self._notes: "OrderedDict[str, _NoteTerms]" = OrderedDict()
+        self._global: Counter = Counter()
+        # 已计入的评论 ID（按笔记），不随 _notes 淘汰
+        self._seen: Dict[str, Set[str]] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._comments = 0
+        self._evicted = 0
+        self._tokenize_ms = 0.0
+
+    async def start(self):
+        """启动后台分词任务；jieba 词典在线程中加载"""
+        if jieba is not None:
+            jieba.setLogLevel(60)
+            await asyncio.to_thread(jieba.initialize)
+        else:
+            print("[TermIndex] jieba not installed, using character bigrams")
+        self._task = asyncio.create_task(self._consume())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def feed(self, note_id: str, comments: List[Dict]):
+        """加入一页评论（包括其中的 sub_comments），立即返回"""
+        if self._task is None or not note_id or not comments:
+            return
+        self._queue.put_nowait((note_id, comments))
+
+    async def flush(self):
+        """等待已 feed 的评论全部计入"""
+        if self._task is not None:
+            await self._queue.join()
+
+    def _tokenize(self, text: str) -> List[str]:
+        text = _EMOJI_RE.sub(" ", text)
+        words = jieba.lcut(text) if jieba is not None else _fallback_cut(text)
+        return [
+            w for w in (w.strip() for w in words)
+            if len(w) >= self.min_length and w not in self.stopwords and _VALID_RE.match(w)
+        ]
+
+    def _tokenize_many(self, texts: List[str]) -> List[List[str]]:
+        return [self._tokenize(text) for text in texts]
+
+    def _note(self, note_id: str) -> _NoteTerms:
+        terms = self._notes.get(note_id)
+        if terms is None:
+            terms = self._notes[note_id] = _NoteTerms()
+            while len(self._notes) > self.max_notes:
+                self._notes.popitem(last=False)
+                self._evicted += 1
+        else:
+            self._notes.move_to_end(note_id)
+        return terms
+
+    async def _consume(self):
+        while True:
+            note_id, comments = await self._queue.get()
+            try:
+                terms = self._note(note_id)
+                seen = self._seen.setdefault(note_id, set())
+                texts = []
+                stack = list(comments)
+                while stack:
+                    comment = stack.pop()
+                    stack.extend(comment.get("sub_comments") or ())
+                    comment_id = comment.get("id", "")
+                    content = comment.get("content", "")
+                    if not comment_id or comment_id in seen:
+                        continue
+                    seen.add(comment_id)
+                    if content:
+                        texts.append(content)
+                if texts:
+                    start = time.perf_counter()
+                    tokens_list = await asyncio.to_thread(self._tokenize_many, texts)
+                    self._tokenize_ms += (time.perf_counter() - start) * 1000
+                    for tokens in tokens_list:
+                        terms.counter.update(tokens)
+                        self._global.update(tokens)
+                    terms.comments += len(texts)
+                    terms.updated_at = time.time()
+                    self._comments += len(texts)
+            except Exception as e:
+                print(f"[TermIndex] Error indexing comments of {note_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def top_terms(self, note_id: Optional[str] = None, k: int = 50) -> List[Tuple[str, int]]:
+        """词频最高的 k 个词，note_id 为空时查询全局"""
+        if note_id:
+            terms = self._notes.get(note_id)
+            return terms.counter.most_common(k) if terms else []
+        return self._global.most_common(k)
+
+    def frequencies(self, note_id: Optional[str] = None, k: int = 100) -> Dict[str, int]:
+        """词云渲染使用的 {词: 次数}"""
+        return dict(self.top_terms(note_id, k))
+
+    def note_stats(self, note_id: str) -> Optional[Dict]:
+        terms = self._notes.get(note_id)
+        if terms is None:
+            return None
+        return {"comments": terms.comments, "terms": len(terms.counter), "updated_at": terms.updated_at}
+
+    def get_stats(self) -> Dict:
+        return {
+            "tokenizer": "jieba" if jieba is not None else "bigram",
+            "notes": len(self._notes),
+            "evicted_notes": self._evicted,
+            "comments": self._comments,
+            "terms": len(self._global),
+            "pending_pages": self._queue.qsize(),
+            "tokenize_ms": round(self._tokenize_ms, 2),
+        }
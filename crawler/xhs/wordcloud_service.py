@@ -0,0 +1,218 @@
+"""
+词云渲染服务
+
+jieba 分词、WordCloud.generate 和 PNG 编码都是纯 CPU 的同步操作，直接在接口里执行会卡住
+事件循环，期间所有抓取请求都要等待；jieba 首次使用还要加载词典（约 1 秒）。这里把它们放到
+独立的进程池中：
+
+1. 进程池在 lifespan 中启动，每个进程启动时预先加载 jieba 词典和 wordcloud
+2. 渲染结果按评论内容的哈希缓存（LRU），相同内容直接返回
+3. 相同内容的并发请求只渲染一次
+4. 每次请求返回分词、渲染、编码和排队耗时
+5. 也可以直接使用词频（TermIndex.frequencies）渲染，跳过分词
+
+需要安装：pip install wordcloud jieba pillow
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+WORDCLOUD_OPTIONS = {
+    "width": 800,
+    "height": 400,
+    "background_color": "white",
+    "font_path": None,  # 如果需要中文，需要指定字体路径
+    "max_words": 100,
+    "relative_scaling": 0.5,
+}
+
+
+def _init_worker():
+    """进程启动时执行：加载 jieba 词典，导入 wordcloud"""
+    try:
+        import jieba
+        from wordcloud import WordCloud
+        jieba.setLogLevel(60)
+        jieba.initialize()
+        # 首次渲染要加载字体和排版模块，这里先渲染一张小图
+        WordCloud(width=64, height=32, font_path=WORDCLOUD_OPTIONS["font_path"]).generate_from_frequencies({"warmup": 1})
+    except ImportError:
+        # 未安装时由 _render 抛出 ImportError
+        pass
+
+
+def _warmup() -> bool:
+    import jieba  # noqa: F401
+    import wordcloud  # noqa: F401
+    return True
+
+
+def _encode(wordcloud, timing: Dict, start: float) -> Dict:
+    image = wordcloud.to_image()
+    rendered = time.perf_counter()
+
+    img_buffer = io.BytesIO()
+    image.save(img_buffer, format="PNG")
+    img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
+
+    timing["render_ms"] = round((rendered - start) * 1000, 2)
+    timing["encode_ms"] = round((time.perf_counter() - rendered) * 1000, 2)
+    return {"image": f"data:image/png;base64,{img_base64}", "timing": timing}
+
+
+def _render(comments: List[str]) -> Dict:
+    """在工作进程中执行：分词、渲染、编码为 base64 PNG"""
+    import jieba
+    from wordcloud import WordCloud
+
+    start = time.perf_counter()
+    word_text = " ".join(jieba.cut(" ".join(comments)))
+    tokenized = time.perf_counter()
+
+    wordcloud = WordCloud(**WORDCLOUD_OPTIONS).generate(word_text)
+    return _encode(wordcloud, {"tokenize_ms": round((tokenized - start) * 1000, 2)}, tokenized)
+
+
+def _render_frequencies(frequencies: Dict[str, int]) -> Dict:
+    """在工作进程中执行：按已有词频渲染"""
+    from wordcloud import WordCloud
+
+    start = time.perf_counter()
+    wordcloud = WordCloud(**WORDCLOUD_OPTIONS).generate_from_frequencies(frequencies)
+    return _encode(wordcloud, {}, start)
+
+
+class WordCloudService:
+    def __init__(self, workers: int = 1, cache_size: int = 128):
+        """
+        Args:
+            workers: 渲染进程数
+            cache_size: 缓存的渲染结果数量
+        """
+        self.workers = max(1, workers)
+        self.cache_size = cache_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._renders = 0
+        self._hits = 0
+        self._coalesced = 0
+        self._render_ms = 0.0
+
+    async def start(self):
+        """启动进程池并在后台预热（不阻塞服务启动）"""
+        # 浏览器线程运行中 fork 不安全，使用 spawn
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        self._warmup_task = asyncio.create_task(self._warmup())
+
+    async def _warmup(self):
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        try:
+            # 同时提交 workers 个任务，让每个进程都启动并加载词典
+            await asyncio.gather(*[loop.run_in_executor(self._pool, _warmup) for _ in range(self.workers)])
+            print(f"[WordCloud] {self.workers} workers ready in {time.monotonic() - start:.2f}s")
+        except ImportError:
+            print("[WordCloud] wordcloud / jieba not installed, rendering disabled")
+        except Exception as e:
+            print(f"[WordCloud] Warmup failed: {e}")
+
+    @staticmethod
+    def cache_key(parts: List[str]) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    async def render(self, comments: List[str]) -> Dict:
+        """分词并渲染词云
+
+        Returns:
+            {"image": "data:image/png;base64,...", "cached": bool, "coalesced": bool, "timing": {...}}
+            cached 只表示命中渲染缓存；coalesced 表示等待了其他请求正在进行的同一次渲染
+        """
+        return await self._run("text:" + self.cache_key(comments), _render, comments)
+
+    async def render_frequencies(self, frequencies: Dict[str, int]) -> Dict:
+        """按词频渲染词云（词频变化后缓存自然失效）"""
+        if not frequencies:
+            raise ValueError("No terms to render")
+        key = "freq:" + self.cache_key([f"{term}\t{count}" for term, count in sorted(frequencies.items())])
+        return await self._run(key, _render_frequencies, frequencies)
+
+    async def _run(self, key: str, func, arg) -> Dict:
+        if self._pool is None:
+            raise RuntimeError("WordCloud service not started")
+
+        start = time.perf_counter()
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self._hits += 1
+            return {
+                "image": cached["image"],
+                "cached": True,
+                "coalesced": False,
+                "timing": {"total_ms": round((time.perf_counter() - start) * 1000, 2)},
+            }
+
+        future = self._inflight.get(key)
+        if future is None:
+            # 渲染和写缓存都在共享任务中完成，发起请求被取消时等待方仍能拿到结果，结果也照常缓存
+            future = asyncio.ensure_future(self._render_shared(key, func, arg))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            coalesced = False
+        else:
+            self._coalesced += 1
+            coalesced = True
+        result = await asyncio.shield(future)
+
+        total_ms = (time.perf_counter() - start) * 1000
+        timing = dict(result["timing"])
+        # 排队和进程间传输的时间
+        timing["queue_ms"] = round(max(total_ms - sum(timing.values()), 0.0), 2)
+        timing["total_ms"] = round(total_ms, 2)
+        return {"image": result["image"], "cached": False, "coalesced": coalesced, "timing": timing}
+
+    async def _render_shared(self, key: str, func, arg) -> Dict:
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        result = await loop.run_in_executor(self._pool, func, arg)
+        self._renders += 1
+        self._render_ms += (time.perf_counter() - start) * 1000
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def get_stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "ready": self._warmup_task is not None and self._warmup_task.done(),
+            "renders": self._renders,
+            "cache_hits": self._hits,
+            "coalesced": self._coalesced,
+            "cache_size": len(self._cache),
+            "avg_render_ms": round(self._render_ms / self._renders, 2) if self._renders else 0.0,
+        }
+
+    async def close(self):
+        if self._warmup_task and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            print("[WordCloud] Worker pool closed")
@@ -1,5 +1,7 @@
+import base64
 import ctypes
 import random
+import zlib
 from urllib.parse import quote
 
 BASE64_CHARS = list("ZmserbBoHQtNP+wOcza/LpngG8yJq42KWYj0DSfdikx3VT16IlUAFM97hECvuRX5")
@@ -109,5 +111,29 @@ def b64_encode(data: list) -> str:
 
     return "".join(chunks)
 
+# ---------------------------------------------------------------------------
+# 快速实现：直接处理 bytes，结果与上面的逐字节实现完全一致。
+# 上面的实现保留作为对照，签名流程使用下面的版本。
+# ---------------------------------------------------------------------------
+
+_STD_BASE64_CHARS = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+_BASE64_TRANSLATION = bytes.maketrans(_STD_BASE64_CHARS, "".join(BASE64_CHARS).encode("ascii"))
+
+def encode_utf8_bytes(s: str) -> bytes:
+    """等价于 bytes(encode_utf8(s))：percent-encode 后再解码的结果就是 UTF-8 字节"""
+    return s.encode("utf-8")
+
+def b64_encode_bytes(data: bytes) -> str:
+    """等价于 b64_encode(list(data))：标准 base64 后按自定义字母表替换字符"""
+    return base64.b64encode(data).translate(_BASE64_TRANSLATION).decode("ascii")
+
+def mrc_fast(e: str) -> int:
+    """等价于 mrc(e)：CRC32_TABLE 是标准 CRC-32 表，用 zlib.crc32 计算前 57 个字符"""
+    if not e:
+        # 原实现没有进入循环时，状态保持有符号的 -1
+        return -1 ^ -1 ^ 3988292384
+    state = zlib.crc32(e[:57].encode("latin-1")) ^ 0xFFFFFFFF
+    return state ^ -1 ^ 3988292384
+
 def get_trace_id() -> str:
     return "".join(random.choice("abcdef0123456789") for _ in range(16))
@@ -56,6 +56,7 @@ export const Admin: React.FC<Props> = ({ user, experiment, onStartExperiment })
   const [xhsSearchQuery, setXhsSearchQuery] = useState('');
   const [xhsSearchResults, setXhsSearchResults] = useState<XHSNote[]>([]);
   const [xhsSearchPage, setXhsSearchPage] = useState(1);
+  const [xhsSearchSession, setXhsSearchSession] = useState<string | undefined>(undefined);
   const [xhsHasMore, setXhsHasMore] = useState(false);
   const [isXhsSearching, setIsXhsSearching] = useState(false);
   const [isXhsLoadingMore, setIsXhsLoadingMore] = useState(false);
@@ -347,7 +348,7 @@ export const Admin: React.FC<Props> = ({ user, experiment, onStartExperiment })
       setXhsError('');
       const currentPage = loadMore ? xhsSearchPage + 1 : 1;
       try {
-          const result = await searchXHSNotes(xhsSearchQuery.trim(), currentPage, 20, xhsSort, 'image');
+          const result = await searchXHSNotes(xhsSearchQuery.trim(), currentPage, 20, xhsSort, 'image', loadMore ? xhsSearchSession : undefined);
           console.log('[XHS Search] Full result:', result);
           console.log('[XHS Search] Result keys:', result ? Object.keys(result) : 'null');
           
@@ -372,6 +373,7 @@ export const Admin: React.FC<Props> = ({ user, experiment, onStartExperiment })
           } else {
                   setXhsSearchResults(notes);
               }
+              setXhsSearchSession(result.session);
               setXhsHasMore(result.has_more || result.hasMore || false);
               
               if (notes.length === 0) {
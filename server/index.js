@@ -995,6 +995,22 @@ app.post('/api/ai/generate-keywords', async (req, res) => {
 // --- XHS CRAWLER PROXY ENDPOINTS ---
 const CRAWLER_URL = 'http://localhost:8000';
 
+// 批量接口的流式响应（NDJSON / SSE）直接转发，不等待全部结果
+const pipeCrawlerStream = (response, res) => {
+    const contentType = response.headers.get('content-type') || '';
+    if (!contentType.includes('application/x-ndjson') && !contentType.includes('text/event-stream')) {
+        return false;
+    }
+    res.status(response.status);
+    res.setHeader('Content-Type', contentType);
+    res.setHeader('Cache-Control', 'no-cache');
+    res.setHeader('X-Accel-Buffering', 'no');
+    res.flushHeaders();
+    response.body.pipe(res);
+    res.on('close', () => response.body.destroy());
+    return true;
+};
+
 // XHS Crawler health check
 app.get('/api/xhs/health', async (req, res) => {
     try {
@@ -1006,6 +1022,17 @@ app.get('/api/xhs/health', async (req, res) => {
     }
 });
 
+// XHS account / proxy circuit breaker state
+app.get('/api/xhs/breakers', async (req, res) => {
+    try {
+        const response = await fetch(`${CRAWLER_URL}/breakers`);
+        const data = await response.json();
+        res.status(response.status).json(data);
+    } catch (e) {
+        res.status(500).json({ error: 'Crawler service not available', detail: e.message });
+    }
+});
+
 // XHS Cookie status check
 app.get('/api/xhs/cookie-status', async (req, res) => {
     try {
@@ -1082,6 +1109,32 @@ app.post('/api/xhs/search', async (req, res) => {
     }
 });
 
+// XHS multi-keyword search (多关键词合并去重)
+app.post('/api/xhs/search/batch', async (req, res) => {
+    try {
+        const response = await fetch(`${CRAWLER_URL}/search/batch`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(req.body)
+        });
+
+        if (!response.ok) {
+            const errorText = await response.text();
+            try {
+                const errorJson = JSON.parse(errorText);
+                return res.status(response.status).json({ error: errorJson.detail || errorJson.message || 'Request failed' });
+            } catch {
+                return res.status(response.status).json({ error: errorText || 'Request failed' });
+            }
+        }
+
+        res.json(await response.json());
+    } catch (e) {
+        console.error('[Server] XHS batch search error:', e);
+        res.status(500).json({ error: e.message || 'Failed to search notes' });
+    }
+});
+
 // XHS get note detail
 app.post('/api/xhs/note/detail', async (req, res) => {
     try {
@@ -1147,9 +1200,10 @@ app.post('/api/xhs/notes/by-ids', async (req, res) => {
     try {
         const response = await fetch(`${CRAWLER_URL}/notes/by-ids`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: { 'Content-Type': 'application/json', 'Accept': req.get('Accept') || 'application/json' },
             body: JSON.stringify(req.body)
         });
+        if (pipeCrawlerStream(response, res)) return;
         const data = await response.json();
         res.json(data);
     } catch (e) {
@@ -1162,9 +1216,10 @@ app.post('/api/xhs/notes/from-urls', async (req, res) => {
     try {
         const response = await fetch(`${CRAWLER_URL}/notes/from-urls`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: { 'Content-Type': 'application/json', 'Accept': req.get('Accept') || 'application/json' },
             body: JSON.stringify(req.body)
         });
+        if (pipeCrawlerStream(response, res)) return;
         const data = await response.json();
         res.json(data);
     } catch (e) {
@@ -1177,9 +1232,10 @@ app.post('/api/xhs/user/from-url', async (req, res) => {
     try {
         const response = await fetch(`${CRAWLER_URL}/user/from-url`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: { 'Content-Type': 'application/json', 'Accept': req.get('Accept') || 'application/json' },
             body: JSON.stringify(req.body)
         });
+        if (pipeCrawlerStream(response, res)) return;
         const data = await response.json();
         res.json(data);
     } catch (e) {
@@ -1,5 +1,5 @@
 import { Article, UserProfile, ContentMedia, TraceRun, TraceStep } from '../types';
-import { searchXHSNotes, getXHSNoteDetail, XHSNote, XHSNoteDetail } from './xhsService';
+import { searchXHSNotesBatch, getXHSNoteDetail, XHSNote, XHSNoteDetail } from './xhsService';
 import { db } from './db';
 
 // ==================== 关键词生成 Prompt 拆分 ====================
@@ -457,6 +457,9 @@ function parseNumber(str: string | number): number {
 }
 
 
+// 单次批量搜索的关键词数（crawler 的 XHS_BATCH_SEARCH_MAX_KEYWORDS 默认 50）
+const BATCH_SEARCH_KEYWORDS = 50;
+
 export async function crawlAndImportByKeywords(
   keywords: string[],
   notesPerKeyword: number = 5,
@@ -478,6 +481,22 @@ export async function crawlAndImportByKeywords(
   }));
   onProgress?.(progress);
 
+  // 一次请求搜索全部关键词（crawler 端并发执行），下面逐个关键词导入
+  const searchResults = new Map<string, XHSNote[]>();
+  for (let start = 0; start < keywords.length; start += BATCH_SEARCH_KEYWORDS) {
+    try {
+      const batch = await searchXHSNotesBatch(keywords.slice(start, start + BATCH_SEARCH_KEYWORDS), 1, 'general', 'image');
+      const notesById = new Map<string, XHSNote>(batch.notes.map(n => [n.id, n]));
+      for (const k of batch.keywords) {
+        if (!k.error) {
+          searchResults.set(k.keyword, k.note_ids.map(id => notesById.get(id)!).filter(Boolean));
+        }
+      }
+    } catch (e: any) {
+      log(`批量搜索出错: ${e.message}`);
+    }
+  }
+
   for (let i = 0; i < keywords.length; i++) {
     const keyword = keywords[i];
     progress[i].status = 'crawling';
@@ -488,15 +507,15 @@ export async function crawlAndImportByKeywords(
 
     try {
       // 使用 'general' 排序 + 'image' 类型，只获取图文内容
-      const searchResult = await searchXHSNotes(keyword, 1, 20, 'general', 'image');
-      if (!searchResult.success || !searchResult.notes) {
+      const searchNotes = searchResults.get(keyword.trim());
+      if (!searchNotes) {
         log(`  搜索失败或无结果`);
         progress[i].status = 'failed';
         if (trace && stepId) await trace.completeStep(stepId, null, '搜索失败');
         continue;
       }
 
-      const notes = searchResult.notes.slice(0, notesPerKeyword);
+      const notes = searchNotes.slice(0, notesPerKeyword);
       progress[i].notesFound = notes.length;
       log(`  找到 ${notes.length} 篇笔记`);
 
@@ -120,12 +120,14 @@ export async function searchXHSNotes(
   page: number = 1,
   page_size: number = 20,
   sort: string = 'general',
-  note_type: string = 'all'
-): Promise<{ success: boolean; has_more: boolean; notes: XHSNote[] }> {
+  note_type: string = 'all',
+  session?: string
+): Promise<{ success: boolean; has_more: boolean; session?: string; cached?: boolean; notes: XHSNote[] }> {
+  // session 为上一页返回的搜索会话，翻页时带上以保证结果连续
   const res = await fetch('/api/xhs/search', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ keyword, page, page_size, sort, note_type })
+    body: JSON.stringify({ keyword, page, page_size, sort, note_type, session })
   });
   if (!res.ok) {
     const error = await res.json();
@@ -134,6 +136,33 @@ export async function searchXHSNotes(
   return res.json();
 }
 
+export interface XHSBatchSearchKeyword {
+  keyword: string;
+  note_ids: string[];
+  pages: number;
+  has_more: boolean;
+  error?: string;
+}
+
+export async function searchXHSNotesBatch(
+  keywords: string[],
+  pages: number = 1,
+  sort: string = 'general',
+  note_type: string = 'all'
+): Promise<{ success: boolean; notes: (XHSNote & { matched_keywords: string[] })[]; keywords: XHSBatchSearchKeyword[]; total: number }> {
+  // 一次请求搜索全部关键词，notes 已去重，keywords 中是每个关键词按排名的 note_ids
+  const res = await fetch('/api/xhs/search/batch', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ keywords, pages, sort, note_type })
+  });
+  if (!res.ok) {
+    const error = await res.json();
+    throw new Error(error.error || 'Batch search failed');
+  }
+  return res.json();
+}
+
 export async function getXHSNoteDetail(
   note_id: string,
   xsec_token: string = '',